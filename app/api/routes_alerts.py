@@ -0,0 +1,121 @@
+import logging
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.db.database import get_db
+from app.db import schemas
+from app.services import alerts
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/", response_model=list[schemas.AlertRule])
+def read_alert_rules(
+        cg_id: str | None = None,
+        after_id: int | None = None,
+        limit: int = Query(default=settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+        db: Session = Depends(get_db)
+):
+    """
+    Retrieve a page of price alert rules ordered by ID.
+
+    Args:
+        cg_id (str | None): Only return the rules of this crypto.
+        after_id (int | None): The last ID of the previous page.
+        limit (int): Page size.
+        db (Session): The database session dependency.
+
+    Returns:
+        list[schemas.AlertRule]: The rules.
+    """
+    return alerts.list_rules(db, cg_id, after_id, limit)
+
+
+@router.post("/", response_model=schemas.AlertRule)
+def create_alert_rule(rule_create: schemas.AlertRuleCreate, db: Session = Depends(get_db)):
+    """
+    Create a price alert rule on a tracked crypto.
+
+    "above" and "below" rules fire whenever a price refresh crosses the threshold
+    in their direction. "percent_change" rules fire when the price moved by the
+    threshold (in percent) either way from the reference price, which is then
+    reset to the new price. Fired rules are appended to the alert stream.
+
+    Args:
+        rule_create (schemas.AlertRuleCreate): The crypto, kind and threshold of the rule.
+        db (Session): The database session dependency.
+
+    Returns:
+        schemas.AlertRule: The created rule.
+    """
+    return alerts.create_rule(db, rule_create.cg_id, rule_create.kind, rule_create.threshold)
+
+
+@router.get("/events", response_model=list[schemas.AlertEvent])
+async def read_alert_events(count: int = Query(default=100, ge=1, le=1000)):
+    """
+    Retrieve the most recently fired alerts from the alert stream, newest first.
+
+    Consumers that need every event should read the Redis stream (ALERT_STREAM_KEY) directly, e.g. with a
+    consumer group.
+
+    Args:
+        count (int): Maximum number of events.
+
+    Returns:
+        list[schemas.AlertEvent]: The fired alerts.
+    """
+    return await alerts.recent_events(count)
+
+
+@router.get("/{rule_id}", response_model=schemas.AlertRule)
+def read_alert_rule(rule_id: int, db: Session = Depends(get_db)):
+    """
+    Retrieve a price alert rule by its ID.
+
+    Args:
+        rule_id (int): The ID of the rule.
+        db (Session): The database session dependency.
+
+    Returns:
+        schemas.AlertRule: The rule.
+    """
+    return alerts.get_rule(db, rule_id)
+
+
+@router.put("/{rule_id}", response_model=schemas.AlertRule)
+def update_alert_rule(rule_id: int, update_data: schemas.AlertRuleUpdate, db: Session = Depends(get_db)):
+    """
+    Update the kind or threshold of a price alert rule, re-arming it at the current price.
+
+    Args:
+        rule_id (int): The ID of the rule.
+        update_data (schemas.AlertRuleUpdate): The fields to update.
+        db (Session): The database session dependency.
+
+    Returns:
+        schemas.AlertRule: The updated rule.
+    """
+    updated = alerts.update_rule(db, rule_id, update_data.model_dump(exclude_unset=True))
+    logger.info(f"Updated alert rule: {rule_id}")
+    return updated
+
+
+@router.delete("/{rule_id}")
+def delete_alert_rule(rule_id: int, db: Session = Depends(get_db)):
+    """
+    Delete a price alert rule by its ID.
+
+    Args:
+        rule_id (int): The ID of the rule.
+        db (Session): The database session dependency.
+
+    Returns:
+        dict: A confirmation message.
+    """
+    alerts.delete_rule(db, rule_id)
+    logger.info(f"Deleted alert rule: {rule_id}")
+    return {"detail": "Deleted"}
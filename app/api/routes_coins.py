@@ -0,0 +1,30 @@
+import logging
+
+from fastapi import APIRouter, Query
+
+from app.db import schemas
+from app.services import coingecko
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/suggest", response_model=list[schemas.CoinSuggestion])
+async def suggest_coins(
+        q: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(default=10, ge=1, le=50)
+):
+    """
+    Suggest coins of the CoinGecko catalog for a partial symbol, name or ID.
+
+    Exact matches rank first, then prefix matches on symbol, ID, name and name
+    words, then fuzzy matches. Meant for type-ahead in the add form.
+
+    Args:
+        q (str): What the user typed so far.
+        limit (int): Maximum number of suggestions.
+
+    Returns:
+        list[schemas.CoinSuggestion]: The best matching coins, best first.
+    """
+    return await coingecko.suggest_coins(q, limit)
@@ -1,52 +1,263 @@
+import json
 import logging
-import time
+from datetime import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.core.settings import settings
+from app.db.database import get_db, get_read_db
 from app.db import schemas
-from app.services import crypto_service, coingecko
+from app.services import crypto_service, export, refresh_policy, serialization
+from app.services.clients import price_broadcaster
+from app.services.http_cache import cached_json_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.get("/", response_model=list[schemas.Crypto])
-def read_cryptos(db: Session = Depends(get_db)):
+@router.get("/", response_model=schemas.CryptoPage)
+async def read_cryptos(
+        request: Request,
+        limit: int = Query(default=settings.PAGE_SIZE_DEFAULT, ge=1),
+        cursor: str | None = None,
+        sort: Literal["id", "cg_id", "symbol", "name", "price"] = "id",
+        order: Literal["asc", "desc"] = "asc",
+        q: str | None = None,
+        symbol: str | None = None,
+        name_prefix: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        db: Session | AsyncSession = Depends(get_read_db)
+):
     """
-    Retrieve a list of all cryptos from the database.
+    Retrieve a page of cryptos from the database.
+
+    Pages are walked with the ``next_cursor`` token of the previous response
+    (keyset pagination), so every page costs the same regardless of its depth.
+    Responses are cached per data version and support conditional GET via ETag.
 
     Args:
-        db (Session): The database session dependency.
+        request (Request): The incoming HTTP request.
+        limit (int): Page size, capped at the server-side maximum.
+        cursor (str | None): The ``next_cursor`` token of the previous page.
+        sort (str): Column to sort by.
+        order (str): Sort direction, "asc" or "desc".
+        q (str | None): Filter by case-insensitive substring of symbol or name.
+        symbol (str | None): Filter by exact symbol.
+        name_prefix (str | None): Filter by case-insensitive name prefix.
+        min_price (float | None): Filter by minimum price.
+        max_price (float | None): Filter by maximum price.
+        db (Session | AsyncSession): The read database session dependency.
+
+    Returns:
+        schemas.CryptoPage: The crypto items and the cursor of the next page.
+    """
+    async def build():
+        page = await crypto_service.list_cryptos_page(
+            db, limit, cursor, sort, order, rows=settings.FAST_SERIALIZATION,
+            search=q, symbol=symbol, name_prefix=name_prefix, min_price=min_price, max_price=max_price
+        )
+        logger.info(f"Retrieved {len(page['items'])} cryptos")
+        if settings.FAST_SERIALIZATION:
+            return serialization.dump_crypto_page(page["items"], page["next_cursor"])
+        return schemas.CryptoPage.model_validate(page, from_attributes=True).model_dump_json().encode()
+
+    return await cached_json_response(request, build)
+
+
+@router.websocket("/stream")
+async def stream_prices_ws(websocket: WebSocket):
+    """
+    Stream price changes to a WebSocket client.
+
+    Every message is a JSON object ``{"type": "prices", "changes": [...]}`` containing
+    only coins whose price moved. Changes are coalesced per coin for slow clients.
+
+    Args:
+        websocket (WebSocket): The WebSocket connection.
+    """
+    await websocket.accept()
+    try:
+        async with price_broadcaster.subscribe() as subscriber:
+            while True:
+                changes = await subscriber.next(timeout=settings.STREAM_HEARTBEAT_SECONDS)
+                if changes:
+                    await websocket.send_json({"type": "prices", "changes": changes})
+                else:
+                    await websocket.send_json({"type": "heartbeat"})
+    except WebSocketDisconnect:
+        logger.debug("Price stream WebSocket client disconnected")
+
+
+@router.get("/stream")
+async def stream_prices_sse(request: Request):
+    """
+    Stream price changes as Server-Sent Events.
+
+    Each event carries the same JSON payload as the WebSocket stream; a comment line
+    is sent as a heartbeat when nothing changed.
+
+    Args:
+        request (Request): The incoming HTTP request.
+
+    Returns:
+        StreamingResponse: A ``text/event-stream`` response.
+    """
+    async def events():
+        async with price_broadcaster.subscribe() as subscriber:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                changes = await subscriber.next(timeout=settings.STREAM_HEARTBEAT_SECONDS)
+                if changes:
+                    yield f"data: {json.dumps({'type': 'prices', 'changes': changes})}\n\n"
+                else:
+                    yield ": heartbeat\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _export_response(request: Request, body, fmt: str, filename: str) -> StreamingResponse:
+    """
+    Wrap an export body in a streaming download response.
+    """
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"', "Vary": "Accept-Encoding"}
+    if _accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=export.MEDIA_TYPES[fmt], headers=headers)
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """
+    Tell whether the client accepts gzip, honouring q-values.
+
+    ``gzip;q=0`` refuses it, and ``*`` stands for it when gzip is not listed.
+    """
+    weights = {}
+    for item in request.headers.get("accept-encoding", "").lower().split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip()] = weight
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in weights:
+            return weights[coding] > 0
+    return False
+
+
+@router.get("/export")
+def export_cryptos(request: Request, format: Literal["ndjson", "csv"] = "ndjson"):
+    """
+    Export all cryptos as newline-delimited JSON or CSV.
+
+    Rows are streamed from a server-side cursor, so memory stays flat whatever the
+    size of the table. The body is gzip-compressed on the fly when the client sends
+    ``Accept-Encoding: gzip``.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        format (str): "ndjson" or "csv".
+
+    Returns:
+        StreamingResponse: The export, with ``cg_id``, ``symbol``, ``name``, ``price`` and ``last_updated`` per row.
+    """
+    body = export.export_cryptos(format, gzip=_accepts_gzip(request))
+    return _export_response(request, body, format, "cryptos")
+
+
+@router.get("/export/history")
+def export_price_history(
+        request: Request,
+        format: Literal["ndjson", "csv"] = "ndjson",
+        cg_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None
+):
+    """
+    Export raw price points as newline-delimited JSON or CSV, streamed like ``GET /cryptos/export``.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        format (str): "ndjson" or "csv".
+        cg_id (str | None): Only export the points of this crypto.
+        start (datetime | None): Inclusive UTC start of the range.
+        end (datetime | None): Inclusive UTC end of the range.
 
     Returns:
-        list[schemas.Crypto]: A list of crypto items.
+        StreamingResponse: The export, with ``cg_id``, ``timestamp`` and ``price`` per row, ordered by crypto and time.
     """
-    cryptos = crypto_service.list_cryptos(db)
-    logger.info(f"Retrieved {len(cryptos)} cryptos")
-    return cryptos
+    body = export.export_price_history(format, gzip=_accepts_gzip(request), cg_id=cg_id, start=start, end=end)
+    return _export_response(request, body, format, "price_history")
 
 
 @router.get("/{cg_id}", response_model=schemas.Crypto)
-def read_crypto(cg_id: str, db: Session = Depends(get_db)):
+async def read_crypto(request: Request, cg_id: str, db: Session | AsyncSession = Depends(get_read_db)):
     """
     Retrieve a specific crypto by its CoinGecko ID.
 
+    Responses are cached per data version and support conditional GET via ETag.
+    Reads raise the refresh priority of the crypto.
+
     Args:
+        request (Request): The incoming HTTP request.
         cg_id (str): The CoinGecko ID of the crypto.
-        db (Session): The database session dependency.
+        db (Session | AsyncSession): The read database session dependency.
 
     Returns:
         schemas.Crypto: The requested crypto object.
     """
-    crypto = crypto_service.get_crypto_by_id(db, cg_id)
-    logger.info(f"Retrieved crypto: {cg_id}")
-    return crypto
+    async def build():
+        if settings.FAST_SERIALIZATION:
+            row = await crypto_service.get_crypto_row_by_id(db, cg_id)
+            logger.info(f"Retrieved crypto: {cg_id}")
+            return serialization.dump_crypto(row)
+        crypto = await crypto_service.get_crypto_by_id(db, cg_id)
+        logger.info(f"Retrieved crypto: {cg_id}")
+        return schemas.Crypto.model_validate(crypto, from_attributes=True).model_dump_json().encode()
+
+    response = await cached_json_response(request, build)
+    await refresh_policy.record_read(cg_id)
+    return response
+
+
+@router.get("/{cg_id}/history", response_model=list[schemas.PriceCandle])
+async def read_price_history(
+        cg_id: str,
+        interval: Literal["1m", "1h", "1d"] = "1h",
+        start: datetime | None = None,
+        end: datetime | None = None,
+        db: Session | AsyncSession = Depends(get_read_db)
+):
+    """
+    Retrieve the price history of a crypto, downsampled into OHLC buckets.
+
+    Args:
+        cg_id (str): The CoinGecko ID of the crypto.
+        interval (str): Bucket size: "1m", "1h" or "1d".
+        start (datetime | None): UTC start of the range (defaults depend on the interval).
+        end (datetime | None): UTC end of the range (defaults to now).
+        db (Session | AsyncSession): The read database session dependency.
+
+    Returns:
+        list[schemas.PriceCandle]: OHLC buckets ordered by time.
+    """
+    candles = await crypto_service.get_price_history(db, cg_id, interval, start, end)
+    await refresh_policy.record_read(cg_id)
+    logger.info(f"Retrieved {len(candles)} {interval} candles for crypto: {cg_id}")
+    return candles
 
 
 @router.post("/", response_model=schemas.Crypto)
-def create_crypto(crypto_create: schemas.CryptoCreate, db: Session = Depends(get_db)):
+async def create_crypto(crypto_create: schemas.CryptoCreate, db: Session = Depends(get_db)):
     """
     Create a new crypto record based on provided symbol.
 
@@ -57,11 +268,29 @@ def create_crypto(crypto_create: schemas.CryptoCreate, db: Session = Depends(get
     Returns:
         schemas.Crypto: The created crypto object.
     """
-    crypto = crypto_service.create_crypto_from_query(db, crypto_create.symbol)
+    crypto = await crypto_service.create_crypto_from_query(db, crypto_create.symbol)
     logger.info(f"Created crypto: {crypto.cg_id}")
     return crypto
 
 
+@router.post("/bulk", response_model=list[schemas.CryptoBulkResult])
+async def create_cryptos_bulk(bulk_create: schemas.CryptoBulkCreate, db: Session = Depends(get_db)):
+    """
+    Create many crypto records at once from symbols, names or CoinGecko IDs.
+
+    Args:
+        bulk_create (schemas.CryptoBulkCreate): The symbols to add.
+        db (Session): The database session dependency.
+
+    Returns:
+        list[schemas.CryptoBulkResult]: Per-item results (created / duplicate / ambiguous / not found / unavailable).
+    """
+    results = await crypto_service.bulk_create_cryptos(db, bulk_create.symbols)
+    created = sum(1 for result in results if result["status"] == "created")
+    logger.info(f"Bulk created {created} cryptos")
+    return results
+
+
 @router.put("/{cg_id}", response_model=schemas.Crypto)
 def update_crypto(cg_id: str, update_data: schemas.CryptoUpdate, db: Session = Depends(get_db)):
     """
@@ -98,7 +327,7 @@ def delete_crypto(cg_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/update-prices/")
-def update_all_prices(db: Session = Depends(get_db)):
+async def update_all_prices(db: Session = Depends(get_db)):
     """
     Update the prices for all cryptos stored in the database by fetching data from CoinGecko.
 
@@ -106,20 +335,12 @@ def update_all_prices(db: Session = Depends(get_db)):
         db (Session): The database session dependency.
 
     Returns:
-        dict: A summary of updated cryptos and their new prices.
-    """
-    cryptos = crypto_service.list_cryptos(db)
-    updated = []
-    for crypto in cryptos:
-        start = time.time()
-        data = coingecko.fetch_crypto_data(crypto.cg_id)
-        duration = round(time.time() - start, 2)
-        logger.info(f"Fetched {crypto.cg_id} in {duration}s")
-        if data and data["price"]:
-            updated_crypto = crypto_service.update_crypto_price(db, crypto, data["price"])
-            updated.append({
-                "cg_id": updated_crypto.cg_id,
-                "new_price": updated_crypto.price
-            })
-    logger.info(f"Updated prices for {len(updated)} cryptos")
+        dict: The cryptos whose price changed, with their old and new prices.
+
+    Raises:
+        HTTPException: 409 if a price refresh is already running.
+    """
+    updated = await crypto_service.refresh_prices_exclusive(db)
+    if updated is None:
+        raise HTTPException(status_code=409, detail="A price refresh is already running")
     return {"updated": updated}
@@ -0,0 +1,68 @@
+import logging
+
+from fastapi import APIRouter
+
+from app.core import scheduler
+from app.core.settings import settings
+from app.services import coingecko
+from app.services.clients import (
+    coin_catalog, coingecko_flights, coingecko_rate_limiter, refresh_lock, scheduler_lease, worker_registry
+)
+from app.services.http_cache import response_cache
+from app.services.cluster import WORKER_ID
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/cache")
+async def read_cache_stats():
+    """
+    Report cache and request coalescing counters of this process, and the state of the coin catalog.
+
+    ``responses`` covers the serialized read responses cached per process.
+    ``coin_catalog`` counts the queries and IDs this process looked up in the coin
+    catalog that were found (hits) or not (misses).
+    ``single_flight`` counts CoinGecko fetches made by this process and calls that
+    shared a fetch made by another call. ``coins_list`` reports the version and age
+    of the coin catalog in Redis, and whether it is stale.
+
+    Returns:
+        dict: Counters per cache and the coin catalog state.
+    """
+    return {
+        "responses": response_cache.stats(),
+        "coin_catalog": coin_catalog.stats(),
+        "single_flight": coingecko_flights.stats(),
+        "coins_list": await coingecko.coins_list_status(),
+    }
+
+
+@router.get("/rate-limit")
+async def read_rate_limit():
+    """
+    Report the CoinGecko call budget left in the shared rate limiter.
+
+    Returns:
+        dict: Tokens left, capacity, refill rate and remaining pause after a 429.
+    """
+    return await coingecko_rate_limiter.remaining()
+
+
+@router.get("/scheduler")
+async def read_scheduler_state():
+    """
+    Report which process holds the scheduler lease and whether a price refresh is running.
+
+    Returns:
+        dict: This worker's ID and role, the lease holder, the refresh lock holder and,
+        with sharding enabled, the live workers the coins are split across.
+    """
+    return {
+        "worker_id": WORKER_ID,
+        "is_leader": scheduler.is_leader(),
+        "leader": await scheduler_lease.holder(),
+        "refresh_lock": await refresh_lock.holder(),
+        "sharding": settings.SCHEDULER_SHARDING,
+        "workers": await worker_registry.live_workers() if settings.SCHEDULER_SHARDING else None,
+    }
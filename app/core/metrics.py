@@ -0,0 +1,138 @@
+import functools
+import inspect
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Buckets in seconds shared by the latency histograms (1 ms .. 30 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "coingecko_request_duration_seconds", "Latency of single CoinGecko API calls",
+    ["endpoint", "status"], buckets=LATENCY_BUCKETS
+)
+DB_OPERATION_SECONDS = Histogram(
+    "db_operation_duration_seconds", "Duration of CRUD operations, including their commit",
+    ["operation"], buckets=LATENCY_BUCKETS
+)
+DB_COMMIT_SECONDS = Histogram(
+    "db_commit_duration_seconds", "Duration of session commits (flush and COMMIT)",
+    buckets=LATENCY_BUCKETS
+)
+REFRESH_SECONDS = Histogram(
+    "price_refresh_duration_seconds", "Duration of price refresh runs",
+    ["mode"], buckets=LATENCY_BUCKETS + (60, 120, 300)
+)
+REFRESH_COINS = Histogram(
+    "price_refresh_coins", "Number of coins whose price was refreshed per run",
+    ["mode"], buckets=(0, 1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+SCHEDULER_LAG_SECONDS = Histogram(
+    "scheduler_job_lag_seconds", "Delay between the scheduled and the actual start of a job",
+    ["job"], buckets=LATENCY_BUCKETS
+)
+SCHEDULER_MISSED = Counter(
+    "scheduler_job_missed", "Job runs skipped because they started too late", ["job"]
+)
+ALERT_EVALUATION_SECONDS = Histogram(
+    "alert_evaluation_duration_seconds", "Time to find the alert rules fired by a price refresh",
+    buckets=LATENCY_BUCKETS
+)
+ALERTS_FIRED = Counter(
+    "alerts_fired", "Price alert rules fired", ["kind"]
+)
+
+
+def observe_db(func):
+    """
+    Decorator recording the duration of a (sync or async) CRUD function under its name.
+    """
+    histogram = DB_OPERATION_SECONDS.labels(operation=func.__name__)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with histogram.time():
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with histogram.time():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(Session, "before_commit")
+def _commit_started(session):
+    session.info["commit_started"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_finished(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
+
+class CacheCollector:
+    """
+    Exposes hit/miss counters and the hit ratio of caches that keep their own counters.
+
+    Args:
+        caches (dict[str, Callable[[], dict]]): Cache name -> function returning
+            a dict with ``hits`` and ``misses``.
+    """
+
+    def __init__(self, caches: dict):
+        self.caches = caches
+
+    def describe(self):
+        # Unchecked collector: registering it does not call collect(), so the caches are not touched on import
+        return []
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Cache hits / lookups since process start", labels=["cache"])
+        for name, stats in self.caches.items():
+            counters = stats()
+            lookups = counters["hits"] + counters["misses"]
+            hits.add_metric([name], counters["hits"])
+            misses.add_metric([name], counters["misses"])
+            ratio.add_metric([name], counters["hits"] / lookups if lookups else 0.0)
+        yield from (hits, misses, ratio)
+
+
+def register_caches(caches: dict):
+    """
+    Register a ``CacheCollector`` for the given caches with the default registry.
+    """
+    REGISTRY.register(CacheCollector(caches))
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    With several worker processes, set ``PROMETHEUS_MULTIPROC_DIR`` so that the
+    metrics of all workers are aggregated (cache counters are then left out).
+
+    Returns:
+        tuple[bytes, str]: The exposition body and its content type.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,30 +1,125 @@
 import logging
+from datetime import datetime
 
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from redis.exceptions import RedisError
+
+from app.core.metrics import SCHEDULER_LAG_SECONDS, SCHEDULER_MISSED
+
+from app.core.settings import settings
 from app.db.database import SessionLocal
-from app.services import coingecko
-from app.db import crud
+from app.services import crypto_service
+from app.services.clients import scheduler_lease, worker_registry
+from app.services.cluster import WORKER_ID, shard_owner
 
 logger = logging.getLogger(__name__)
-scheduler = BackgroundScheduler()
+scheduler = AsyncIOScheduler()
+
+# Whether this process held the leader lease at its last renewal
+_is_leader = False
+
+
+def _record_job_event(event):
+    """
+    Record how late a job started, or that a run was missed altogether.
+    """
+    if event.code == EVENT_JOB_MISSED:
+        SCHEDULER_MISSED.labels(event.job_id).inc()
+        return
+    for run_time in event.scheduled_run_times:
+        lag = (datetime.now(run_time.tzinfo) - run_time).total_seconds()
+        SCHEDULER_LAG_SECONDS.labels(event.job_id).observe(max(0.0, lag))
+
+
+scheduler.add_listener(_record_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED)
+
+
+def is_leader() -> bool:
+    """
+    Return whether this process currently runs the cluster-wide scheduled jobs.
+    """
+    return _is_leader
+
+
+async def heartbeat_job():
+    """
+    Scheduled job that takes or renews the leader lease and, with sharding, announces this worker.
+
+    Runs several times per lease lifetime. If Redis is unreachable the process steps
+    down, so that no job runs more than once across the cluster.
+    """
+    global _is_leader
+
+    try:
+        leader = await scheduler_lease.acquire(WORKER_ID)
+        if settings.SCHEDULER_SHARDING:
+            await worker_registry.heartbeat(WORKER_ID)
+    except RedisError:
+        logger.warning("Could not renew the scheduler lease, pausing scheduled jobs in this process")
+        leader = False
+    if leader != _is_leader:
+        logger.info(f"Scheduler leadership {'acquired' if leader else 'lost'} by {WORKER_ID}")
+    _is_leader = leader
+
+
+async def resign():
+    """
+    Give up the leader lease and leave the worker registry, e.g. on shutdown.
+    """
+    global _is_leader
+
+    _is_leader = False
+    try:
+        await scheduler_lease.release(WORKER_ID)
+        await worker_registry.leave(WORKER_ID)
+    except RedisError:
+        logger.warning("Could not release the scheduler lease, it will expire on its own")
+
+
+async def update_prices_job():
+    """
+    Scheduled job that refreshes the most urgent cryptos due for a price update.
+
+    Each tick spends REFRESH_CALLS_PER_TICK CoinGecko calls on the due cryptos that are
+    the most stale, most read or most volatile. Without sharding only the leader
+    refreshes, under the cluster-wide refresh lock. With sharding every live worker
+    refreshes the coins that hash to it, with its own budget; the coin leases taken
+    by ``refresh_prices`` keep it from overlapping a manual refresh, or another
+    worker that still refreshes the coin under the previous set of workers.
+    """
+    budget = settings.REFRESH_CALLS_PER_TICK * settings.PRICE_BATCH_SIZE
+    db = SessionLocal()
+    try:
+        if settings.SCHEDULER_SHARDING:
+            workers = await worker_registry.live_workers()
+            if WORKER_ID not in workers:
+                logger.info("Skipping price update, this worker is not registered yet")
+                return
+            logger.info(f"Scheduled job: Updating crypto prices (shard {workers.index(WORKER_ID) + 1}/{len(workers)})...")
+            await crypto_service.refresh_prices(
+                db, owns=lambda cg_id: shard_owner(cg_id, workers) == WORKER_ID, budget=budget
+            )
+        elif _is_leader:
+            logger.info("Scheduled job: Updating crypto prices...")
+            await crypto_service.refresh_prices_exclusive(db, budget=budget)
+    except Exception:
+        logger.exception("Error while updating crypto prices")
+    finally:
+        db.close()
 
 
-def update_prices_job():
+def compact_price_history_job():
     """
-    Scheduled job that fetches updated prices for all cryptos from CoinGecko and updates the database.
+    Scheduled job that rolls old raw price points into coarser buckets (leader only).
     """
-    logger.info("Scheduled job: Updating crypto prices...")
+    if not _is_leader:
+        return
+    logger.info("Scheduled job: Compacting price history...")
     db = SessionLocal()
-    updated = 0
     try:
-        cryptos = crud.get_all_cryptos(db)
-        for crypto in cryptos:
-            data = coingecko.fetch_crypto_data(crypto.cg_id)
-            if data and data["price"]:
-                crud.update_crypto_price(db, crypto, data["price"])
-                updated += 1
-        logger.info(f"Updated prices for {updated} cryptos")
-    except Exception as e:
-        logger.exception("Error while updating crypto prices", e)
+        crypto_service.compact_price_history(db)
+    except Exception:
+        logger.exception("Error while compacting price history")
     finally:
         db.close()
@@ -8,30 +8,138 @@ class Settings(BaseSettings):
 
     Attributes:
         DATABASE_URL (str): Database connection URL.
+        DB_ASYNC (bool): Serve read routes from an async engine (asyncpg for PostgreSQL, aiosqlite for SQLite).
+        DB_POOL_SIZE (int): Number of connections kept open in each engine's pool.
+        DB_MAX_OVERFLOW (int): Connections allowed beyond ``DB_POOL_SIZE`` under load.
+        DB_POOL_TIMEOUT (float): Seconds to wait for a pooled connection before failing.
+        DB_POOL_PRE_PING (bool): Test pooled connections before use, replacing dead ones.
+        DB_POOL_RECYCLE (int): Age in seconds after which pooled connections are replaced (-1 disables).
+        WARMUP_TIMEOUT_SECONDS (int): Seconds after startup from which optional warm-up stages that keep
+            failing are given up, so that the process reports ready without them.
         REDIS_HOST (str): Redis server host.
         REDIS_PORT (int): Redis server port.
-        REDIS_CACHE_TTL (int): Cache TTL (Time-To-Live) for Redis in seconds.
+        REDIS_CACHE_TTL (int): Age in seconds after which the cached coins list is refreshed in the background.
+        COINS_LIST_HARD_TTL (int): Age in seconds after which the coins list still being served is reported stale.
         COINGECKO_API_BASE (str): Base URL for the CoinGecko API.
-        UPDATE_INTERVAL_MINUTES (int): Interval in minutes for scheduled tasks.
+        COINGECKO_TIMEOUT (float): Timeout in seconds for a single CoinGecko request.
+        COINGECKO_MAX_CONCURRENCY (int): Maximum number of CoinGecko requests in flight per process.
+        COINGECKO_MAX_CONNECTIONS (int): Size of the CoinGecko HTTP connection pool.
+        COINGECKO_MAX_KEEPALIVE (int): Number of idle keep-alive connections kept in the pool.
+        COINGECKO_RATE_LIMIT_PER_MINUTE (float): CoinGecko calls per minute shared by all replicas.
+        COINGECKO_RATE_LIMIT_BURST (int): Maximum number of calls that may be made in a burst.
+        COINGECKO_MAX_RETRIES (int): Retries for throttled (429/503) CoinGecko responses.
+        COINGECKO_BACKOFF_BASE (float): Base delay in seconds for exponential backoff.
+        COINGECKO_BACKOFF_MAX (float): Upper bound in seconds for a single backoff delay.
+        SINGLE_FLIGHT_LOCK_SECONDS (int): Upper bound in seconds for which one process holds the lock of a
+            coalesced CoinGecko fetch before another may take over.
+        UPDATE_INTERVAL_MINUTES (int): Slowest refresh cadence in minutes, used for cryptos nobody reads.
+        REFRESH_TICK_SECONDS (int): Interval in seconds of the scheduled price refresh.
+        REFRESH_CALLS_PER_TICK (int): CoinGecko price calls spent per refresh tick on the most urgent cryptos.
+        REFRESH_MIN_INTERVAL_SECONDS (int): Fastest refresh cadence in seconds, used for cryptos read just now.
+        REFRESH_READ_HALF_LIFE_MINUTES (int): Half-life in minutes of the refresh boost a read gives a crypto.
+        SCHEDULER_LEASE_SECONDS (int): Lifetime in seconds of the scheduler leader lease and worker heartbeats.
+        SCHEDULER_SHARDING (bool): Split scheduled price refreshes across all live workers by CoinGecko ID.
+        REFRESH_LOCK_SECONDS (int): Upper bound in seconds for which a price refresh holds the cluster-wide lock.
+        PRICE_BATCH_SIZE (int): Number of coin IDs requested per CoinGecko price call.
+        PRICE_CHANGE_EPSILON (float): Relative price change at or below which a refreshed price is not written.
+        BULK_CREATE_MAX_ITEMS (int): Maximum number of items accepted by the bulk create endpoint.
+        PAGE_SIZE_DEFAULT (int): Default page size of list endpoints.
+        PAGE_SIZE_MAX (int): Maximum page size of list endpoints.
+        DASHBOARD_PAGE_SIZE (int): Number of cryptos shown per dashboard page.
+        EXPORT_BATCH_SIZE (int): Rows fetched from the database cursor and encoded per chunk of export responses.
+        PRICE_STREAM_CHANNEL (str): Redis pub/sub channel carrying price-change deltas.
+        STREAM_HEARTBEAT_SECONDS (int): Interval in seconds of keep-alive messages on price streams.
+        ALERT_STREAM_KEY (str): Redis stream fired price alerts are appended to.
+        ALERT_STREAM_MAXLEN (int): Approximate number of entries the alert stream is trimmed to.
+        FAST_SERIALIZATION (bool): Serve crypto read routes from column tuples encoded with orjson.
+        HTTP_CACHE_MAX_AGE (int): ``max-age`` in seconds sent in Cache-Control of cached read endpoints.
+        RESPONSE_CACHE_TTL (int): TTL in seconds of serialized responses cached per process.
+        RESPONSE_CACHE_MAX_ENTRIES (int): Maximum number of serialized responses cached per process.
+        RESPONSE_CACHE_MAX_BYTES (int): Maximum total size in bytes of serialized responses cached per process.
+        PRICE_HISTORY_HOURLY_AFTER_DAYS (int): Age in days after which raw price points are rolled into hourly buckets.
+        PRICE_HISTORY_DAILY_AFTER_DAYS (int): Age in days after which price points are rolled into daily buckets.
+        PRICE_HISTORY_COMPACT_INTERVAL_HOURS (int): Interval in hours for the price history compaction job.
+        PRICE_HISTORY_MAX_BUCKETS (int): Maximum number of OHLC buckets a price history request may span.
 
     Configuration is loaded from environment variables or defaults.
     """
     # Database
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
+    DB_ASYNC: bool = Field(default=False, env="DB_ASYNC")
+    DB_POOL_SIZE: int = Field(default=5, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, env="DB_POOL_TIMEOUT")
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    DB_POOL_RECYCLE: int = Field(default=1800, env="DB_POOL_RECYCLE")
+
+    # Startup
+    WARMUP_TIMEOUT_SECONDS: int = Field(default=60, env="WARMUP_TIMEOUT_SECONDS")
 
     # Redis
     REDIS_HOST: str = Field(default="redis", env="REDIS_HOST")
     REDIS_PORT: int = Field(default=6379, env="REDIS_PORT")
     REDIS_CACHE_TTL: int = Field(default=3600, env="REDIS_CACHE_TTL")
+    COINS_LIST_HARD_TTL: int = Field(default=86400, env="COINS_LIST_HARD_TTL")
 
     # Coingecko
     COINGECKO_API_BASE: str = Field(default="https://api.coingecko.com/api/v3", env="COINGECKO_API_BASE")
+    COINGECKO_TIMEOUT: float = Field(default=10.0, env="COINGECKO_TIMEOUT")
+    COINGECKO_MAX_CONCURRENCY: int = Field(default=10, env="COINGECKO_MAX_CONCURRENCY")
+    COINGECKO_MAX_CONNECTIONS: int = Field(default=20, env="COINGECKO_MAX_CONNECTIONS")
+    COINGECKO_MAX_KEEPALIVE: int = Field(default=10, env="COINGECKO_MAX_KEEPALIVE")
+    COINGECKO_RATE_LIMIT_PER_MINUTE: float = Field(default=30, env="COINGECKO_RATE_LIMIT_PER_MINUTE")
+    COINGECKO_RATE_LIMIT_BURST: int = Field(default=5, env="COINGECKO_RATE_LIMIT_BURST")
+    COINGECKO_MAX_RETRIES: int = Field(default=3, env="COINGECKO_MAX_RETRIES")
+    COINGECKO_BACKOFF_BASE: float = Field(default=1.0, env="COINGECKO_BACKOFF_BASE")
+    COINGECKO_BACKOFF_MAX: float = Field(default=60.0, env="COINGECKO_BACKOFF_MAX")
+    SINGLE_FLIGHT_LOCK_SECONDS: int = Field(default=120, env="SINGLE_FLIGHT_LOCK_SECONDS")
 
     # Update interval
     UPDATE_INTERVAL_MINUTES: int = Field(default=10, env="UPDATE_INTERVAL_MINUTES")
+    REFRESH_TICK_SECONDS: int = Field(default=60, env="REFRESH_TICK_SECONDS")
+    REFRESH_CALLS_PER_TICK: int = Field(default=1, env="REFRESH_CALLS_PER_TICK")
+    REFRESH_MIN_INTERVAL_SECONDS: int = Field(default=60, env="REFRESH_MIN_INTERVAL_SECONDS")
+    REFRESH_READ_HALF_LIFE_MINUTES: int = Field(default=30, env="REFRESH_READ_HALF_LIFE_MINUTES")
+    SCHEDULER_LEASE_SECONDS: int = Field(default=30, env="SCHEDULER_LEASE_SECONDS")
+    SCHEDULER_SHARDING: bool = Field(default=False, env="SCHEDULER_SHARDING")
+    REFRESH_LOCK_SECONDS: int = Field(default=600, env="REFRESH_LOCK_SECONDS")
+    PRICE_BATCH_SIZE: int = Field(default=250, env="PRICE_BATCH_SIZE")
+    PRICE_CHANGE_EPSILON: float = Field(default=0.0, env="PRICE_CHANGE_EPSILON")
+    BULK_CREATE_MAX_ITEMS: int = Field(default=1000, env="BULK_CREATE_MAX_ITEMS")
+
+    # Pagination
+    PAGE_SIZE_DEFAULT: int = Field(default=100, env="PAGE_SIZE_DEFAULT")
+    PAGE_SIZE_MAX: int = Field(default=1000, env="PAGE_SIZE_MAX")
+    DASHBOARD_PAGE_SIZE: int = Field(default=50, env="DASHBOARD_PAGE_SIZE")
+    EXPORT_BATCH_SIZE: int = Field(default=1000, env="EXPORT_BATCH_SIZE")
+
+    # Live price streaming
+    PRICE_STREAM_CHANNEL: str = Field(default="prices:updates", env="PRICE_STREAM_CHANNEL")
+    STREAM_HEARTBEAT_SECONDS: int = Field(default=15, env="STREAM_HEARTBEAT_SECONDS")
+
+    # Price alerts
+    ALERT_STREAM_KEY: str = Field(default="alerts:events", env="ALERT_STREAM_KEY")
+    ALERT_STREAM_MAXLEN: int = Field(default=100000, env="ALERT_STREAM_MAXLEN")
+
+    # Read path serialization
+    FAST_SERIALIZATION: bool = Field(default=False, env="FAST_SERIALIZATION")
+
+    # HTTP response caching
+    HTTP_CACHE_MAX_AGE: int = Field(default=0, env="HTTP_CACHE_MAX_AGE")
+    RESPONSE_CACHE_TTL: int = Field(default=300, env="RESPONSE_CACHE_TTL")
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=1024, env="RESPONSE_CACHE_MAX_ENTRIES")
+    RESPONSE_CACHE_MAX_BYTES: int = Field(default=32 * 1024 * 1024, env="RESPONSE_CACHE_MAX_BYTES")
+
+    # Price history retention
+    PRICE_HISTORY_HOURLY_AFTER_DAYS: int = Field(default=7, env="PRICE_HISTORY_HOURLY_AFTER_DAYS")
+    PRICE_HISTORY_DAILY_AFTER_DAYS: int = Field(default=90, env="PRICE_HISTORY_DAILY_AFTER_DAYS")
+    PRICE_HISTORY_COMPACT_INTERVAL_HOURS: int = Field(default=6, env="PRICE_HISTORY_COMPACT_INTERVAL_HOURS")
+    PRICE_HISTORY_MAX_BUCKETS: int = Field(default=2000, env="PRICE_HISTORY_MAX_BUCKETS")
 
     class Config:
         env_file = ".env"
+        # Settings that were retired may still be present in existing .env files
+        extra = "ignore"
 
 
 settings = Settings()
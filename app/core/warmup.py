@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Delay before retrying a failed stage: first delay and upper bound, in seconds
+RETRY_INITIAL = 1.0
+RETRY_MAX = 30.0
+
+
+class Stage:
+    """
+    One step of the warm-up.
+
+    Attributes:
+        name (str): Name of the stage, as reported by ``WarmUp.status``.
+        run (Callable[[], Awaitable]): Does the work; raises to be retried.
+        required (bool): Whether the process may not report ready until the stage succeeded. Optional
+            stages are given up once WARMUP_TIMEOUT_SECONDS have passed since the start of the warm-up.
+        state (str): "pending", "running", "done" or "failed" (given up).
+        attempts (int): Number of runs so far.
+        seconds (float | None): Duration of the successful run.
+        error (str | None): Error of the last failed run.
+    """
+
+    def __init__(self, name: str, run: Callable[[], Awaitable], required: bool = True):
+        self.name = name
+        self.run = run
+        self.required = required
+        self.state = "pending"
+        self.attempts = 0
+        self.seconds = None
+        self.error = None
+
+
+class WarmUp:
+    """
+    Runs the startup stages of the process in the background, in order, retrying failures.
+
+    The server starts accepting connections right away (liveness), while the
+    readiness probe reports ready only once every stage has completed, so that a new
+    process gets traffic with its schema in place and its caches warm.
+    """
+
+    def __init__(self, stages: list[Stage]):
+        self.stages = stages
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether every stage has completed (required stages successfully).
+        """
+        return self.finished_at is not None
+
+    def start(self):
+        """
+        Start the warm-up on the running event loop.
+        """
+        self.started_at = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Cancel the warm-up if it is still running.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        deadline = self.started_at + settings.WARMUP_TIMEOUT_SECONDS
+        for stage in self.stages:
+            await self._run_stage(stage, deadline)
+        self.finished_at = time.monotonic()
+        logger.info(f"Warm-up finished in {self.finished_at - self.started_at:.3f}s, ready to serve")
+
+    async def _run_stage(self, stage: Stage, deadline: float):
+        delay = RETRY_INITIAL
+        stage.state = "running"
+        while True:
+            stage.attempts += 1
+            started = time.monotonic()
+            try:
+                await stage.run()
+            except Exception as e:
+                stage.error = f"{type(e).__name__}: {e}"
+                if not stage.required and time.monotonic() + delay > deadline:
+                    stage.state = "failed"
+                    logger.warning(
+                        f"Warm-up stage '{stage.name}' given up after {stage.attempts} attempts: {stage.error}"
+                    )
+                    return
+                logger.warning(f"Warm-up stage '{stage.name}' failed, retrying in {delay:g}s: {stage.error}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX)
+                continue
+            stage.state = "done"
+            stage.seconds = round(time.monotonic() - started, 3)
+            stage.error = None
+            logger.info(f"Warm-up stage '{stage.name}' done in {stage.seconds:.3f}s")
+            return
+
+    def status(self) -> dict:
+        """
+        Return whether the process is ready and the state of every stage.
+        """
+        return {
+            "ready": self.ready,
+            "stages": {
+                stage.name: {
+                    "state": stage.state,
+                    "required": stage.required,
+                    "attempts": stage.attempts,
+                    "seconds": stage.seconds,
+                    "error": stage.error,
+                }
+                for stage in self.stages
+            },
+        }
@@ -1,7 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import Integer, and_, case, cast, delete, func, insert, literal_column, or_, select, update
 from sqlalchemy.orm import Session
+from app.core.metrics import observe_db
 from app.db import models
+from app.db.search import escape_like, search_condition
+
+# Columns GET /cryptos/ can be sorted by; also the columns selected for plain-row reads
+SORT_COLUMNS = {
+    "id": models.Crypto.id,
+    "cg_id": models.Crypto.cg_id,
+    "symbol": models.Crypto.symbol,
+    "name": models.Crypto.name,
+    "price": models.Crypto.price,
+}
 
 
+@observe_db
 def get_crypto_by_id(db: Session, cg_id: str):
     """
     Retrieve a crypto record by its CoinGecko ID.
@@ -13,9 +28,39 @@ def get_crypto_by_id(db: Session, cg_id: str):
     Returns:
         models.Crypto: The crypto record, or None if not found.
     """
-    return db.query(models.Crypto).filter(models.Crypto.cg_id == cg_id.lower()).first()
+    return db.scalars(crypto_by_id_query(cg_id)).first()
 
 
+def crypto_by_id_query(cg_id: str):
+    """
+    Build the query selecting a crypto record by its CoinGecko ID.
+    """
+    return select(models.Crypto).where(models.Crypto.cg_id == cg_id.lower())
+
+
+@observe_db
+def get_crypto_row_by_id(db: Session, cg_id: str):
+    """
+    Retrieve the columns of a crypto record as a plain row, without building an ORM object.
+
+    Args:
+        db (Session): The database session.
+        cg_id (str): The CoinGecko ID of the crypto.
+
+    Returns:
+        Row: The row with ``id``, ``cg_id``, ``symbol``, ``name`` and ``price``, or None if not found.
+    """
+    return db.execute(crypto_row_by_id_query(cg_id)).first()
+
+
+def crypto_row_by_id_query(cg_id: str):
+    """
+    Build the query selecting the columns of a crypto record by its CoinGecko ID.
+    """
+    return select(*SORT_COLUMNS.values()).where(models.Crypto.cg_id == cg_id.lower())
+
+
+@observe_db
 def create_crypto(db: Session, crypto: models.Crypto):
     """
     Add a new crypto record to the database.
@@ -33,6 +78,135 @@ def create_crypto(db: Session, crypto: models.Crypto):
     return crypto
 
 
+@observe_db
+def get_existing_cg_ids(db: Session, cg_ids: list[str]) -> set[str]:
+    """
+    Return which of the given CoinGecko IDs are already stored, using a single IN query.
+
+    Args:
+        db (Session): The database session.
+        cg_ids (list[str]): Lowercase CoinGecko IDs to check.
+
+    Returns:
+        set[str]: The IDs that already exist in the database.
+    """
+    if not cg_ids:
+        return set()
+    return set(db.scalars(select(models.Crypto.cg_id).where(models.Crypto.cg_id.in_(cg_ids))))
+
+
+@observe_db
+def create_cryptos(db: Session, rows: list[dict]):
+    """
+    Insert many crypto records in a single multi-row statement and one transaction.
+
+    Args:
+        db (Session): The database session.
+        rows (list[dict]): Rows with ``cg_id``, ``symbol``, ``name`` and ``price`` keys.
+    """
+    if not rows:
+        return
+    db.execute(insert(models.Crypto), rows)
+    db.commit()
+
+
+@observe_db
+def get_cryptos_page(
+        db: Session,
+        limit: int,
+        sort: str = "id",
+        descending: bool = False,
+        after: tuple | None = None,
+        search: str | None = None,
+        symbol: str | None = None,
+        name_prefix: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        rows: bool = False
+):
+    """
+    Retrieve one page of crypto records using keyset pagination.
+
+    Rows are ordered by the sort column with ``id`` as a tie-breaker, and a page
+    starts right after the ``(sort value, id)`` pair of the previous page's last
+    row, so every page costs the same regardless of how deep it is. Rows whose sort
+    value is NULL come last in both orders.
+
+    Args:
+        db (Session): The database session.
+        limit (int): Maximum number of records to return.
+        sort (str): Name of the sort column, one of ``SORT_COLUMNS``.
+        descending (bool): Whether to sort in descending order.
+        after (tuple | None): ``(sort value, id)`` of the last row of the previous page.
+        search (str | None): Only return records whose symbol or name contains this (case-insensitive).
+        symbol (str | None): Only return records with this symbol.
+        name_prefix (str | None): Only return records whose name starts with this (case-insensitive).
+        min_price (float | None): Only return records with a price of at least this value.
+        max_price (float | None): Only return records with a price of at most this value.
+        rows (bool): Select plain column tuples instead of ORM objects.
+
+    Returns:
+        list[models.Crypto] | list[Row]: The records of the page.
+    """
+    query = cryptos_page_query(db, limit, sort, descending, after, search, symbol, name_prefix,
+                               min_price, max_price, rows)
+    if rows:
+        return db.execute(query).all()
+    return db.scalars(query).all()
+
+
+def cryptos_page_query(
+        db: Session,
+        limit: int,
+        sort: str = "id",
+        descending: bool = False,
+        after: tuple | None = None,
+        search: str | None = None,
+        symbol: str | None = None,
+        name_prefix: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        rows: bool = False
+):
+    """
+    Build the keyset pagination query of ``get_cryptos_page`` (same arguments).
+    """
+    column = SORT_COLUMNS[sort]
+    crypto_id = models.Crypto.id
+    query = select(*SORT_COLUMNS.values()) if rows else select(models.Crypto)
+
+    if search:
+        query = query.where(search_condition(db, search))
+    if symbol:
+        query = query.where(models.Crypto.symbol == symbol.lower())
+    if name_prefix:
+        pattern = f"{escape_like(name_prefix.lower())}%"
+        query = query.where(func.lower(models.Crypto.name).like(pattern, escape="\\"))
+    if min_price is not None:
+        query = query.where(models.Crypto.price >= min_price)
+    if max_price is not None:
+        query = query.where(models.Crypto.price <= max_price)
+
+    # Rows without a sort value (e.g. no price yet) come last in both orders, by ID
+    if after is not None:
+        value, last_id = after
+        after_id = crypto_id < last_id if descending else crypto_id > last_id
+        if column is crypto_id:
+            query = query.where(after_id)
+        elif value is None:
+            query = query.where(column.is_(None), after_id)
+        else:
+            beyond = column < value if descending else column > value
+            query = query.where(or_(beyond, and_(column == value, after_id), column.is_(None)))
+
+    if descending:
+        query = query.order_by(column.desc().nulls_last(), crypto_id.desc())
+    else:
+        query = query.order_by(column.asc().nulls_last(), crypto_id.asc())
+    return query.limit(limit)
+
+
+@observe_db
 def get_all_cryptos(db: Session):
     """
     Retrieve all crypto records from the database.
@@ -46,6 +220,75 @@ def get_all_cryptos(db: Session):
     return db.query(models.Crypto).all()
 
 
+def cryptos_export_query():
+    """
+    Build the query selecting the exported columns of all crypto records, ordered by ID.
+    """
+    crypto = models.Crypto
+    return select(crypto.cg_id, crypto.symbol, crypto.name, crypto.price, crypto.last_updated).order_by(crypto.id)
+
+
+def price_history_export_query(cg_id: str | None = None, start: datetime | None = None, end: datetime | None = None):
+    """
+    Build the query selecting price points with the CoinGecko ID of their crypto, ordered by crypto and time.
+
+    Args:
+        cg_id (str | None): Only export the points of this crypto.
+        start (datetime | None): Inclusive UTC start of the range.
+        end (datetime | None): Inclusive UTC end of the range.
+    """
+    history = models.PriceHistory
+    query = (
+        select(models.Crypto.cg_id, history.timestamp, history.price)
+        .join(models.Crypto, models.Crypto.id == history.crypto_id)
+        .order_by(history.crypto_id, history.timestamp)
+    )
+    if cg_id is not None:
+        query = query.where(models.Crypto.cg_id == cg_id.lower())
+    if start is not None:
+        query = query.where(history.timestamp >= start)
+    if end is not None:
+        query = query.where(history.timestamp <= end)
+    return query
+
+
+def stream_rows(db: Session, query, batch_size: int):
+    """
+    Run a query on a server-side cursor and yield its rows in batches.
+
+    Only one batch is held in memory at a time, whatever the size of the result.
+
+    Args:
+        db (Session): The database session; it must stay open while the batches are consumed.
+        query: The select statement.
+        batch_size (int): Number of rows fetched from the cursor per batch.
+
+    Yields:
+        list[Row]: The next batch of rows.
+    """
+    result = db.execute(query.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
+
+
+@observe_db
+def get_due_cryptos(db: Session, now: datetime):
+    """
+    Retrieve the crypto records whose price is due for a refresh.
+
+    Args:
+        db (Session): The database session.
+        now (datetime): The current UTC time.
+
+    Returns:
+        list[models.Crypto]: Records never refreshed or with ``next_due`` at or before ``now``.
+    """
+    return db.scalars(
+        select(models.Crypto).where(or_(models.Crypto.next_due.is_(None), models.Crypto.next_due <= now))
+    ).all()
+
+
+@observe_db
 def update_crypto(db: Session, cg_id: str, updated_fields: dict):
     """
     Update specific fields of a crypto record.
@@ -68,6 +311,7 @@ def update_crypto(db: Session, cg_id: str, updated_fields: dict):
     return crypto
 
 
+@observe_db
 def delete_crypto(db: Session, cg_id: str):
     """
     Delete a crypto record by its CoinGecko ID.
@@ -82,11 +326,14 @@ def delete_crypto(db: Session, cg_id: str):
     crypto = get_crypto_by_id(db, cg_id)
     if not crypto:
         return None
+    db.execute(delete(models.PriceHistory).where(models.PriceHistory.crypto_id == crypto.id))
+    db.execute(delete(models.AlertRule).where(models.AlertRule.crypto_id == crypto.id))
     db.delete(crypto)
     db.commit()
     return crypto
 
 
+@observe_db
 def update_crypto_price(db: Session, crypto: models.Crypto, new_price: float):
     """
     Update the price of a specific crypto.
@@ -103,3 +350,305 @@ def update_crypto_price(db: Session, crypto: models.Crypto, new_price: float):
     db.commit()
     db.refresh(crypto)
     return crypto
+
+
+@observe_db
+def update_crypto_prices(db: Session, updates: list[dict], points: list[dict], epsilon: float = 0.0,
+                         postponed: list[dict] = ()) -> list[dict]:
+    """
+    Apply the prices of a refresh, their price history points and the postponed refreshes in a single transaction.
+
+    Records are updated with executemany statements keyed by primary key. A price that
+    moved by no more than ``epsilon`` relative to the stored one is not written.
+
+    Args:
+        db (Session): The database session.
+        updates (list[dict]): One row per refreshed crypto with ``id``, ``cg_id``, ``old_price``
+            and ``price``, plus other columns to set on every refreshed record (e.g. ``last_updated``).
+        points (list[dict]): Price history rows with ``crypto_id``, ``timestamp`` and ``price`` keys.
+        epsilon (float): Relative price change at or below which the stored price is kept.
+        postponed (list[dict]): Rows with ``id`` and ``next_due`` of the cryptos refreshed
+            without a price (e.g. CoinGecko returned none), whose next refresh is moved.
+
+    Returns:
+        list[dict]: The cryptos whose price was written, as
+        ``{"cg_id": ..., "new_price": ..., "old_price": ...}`` items.
+    """
+    changed_rows = []
+    unchanged_rows = []
+    changed = []
+    for row in updates:
+        values = {key: value for key, value in row.items() if key not in ("cg_id", "old_price")}
+        old_price = row["old_price"]
+        if old_price is None or abs(row["price"] - old_price) > epsilon * abs(old_price):
+            changed_rows.append(values)
+            changed.append({"cg_id": row["cg_id"], "new_price": row["price"], "old_price": old_price})
+        else:
+            del values["price"]
+            unchanged_rows.append(values)
+
+    for rows in (changed_rows, unchanged_rows, postponed):
+        if rows:
+            db.execute(update(models.Crypto), rows)
+    if points:
+        db.execute(insert(models.PriceHistory), points)
+    db.commit()
+    return changed
+
+
+@observe_db
+def add_price_points(db: Session, points: list[dict]):
+    """
+    Bulk insert price history points in a single multi-row statement.
+
+    Args:
+        db (Session): The database session.
+        points (list[dict]): Rows with ``crypto_id``, ``timestamp`` and ``price`` keys.
+    """
+    if not points:
+        return
+    db.execute(insert(models.PriceHistory), points)
+    db.commit()
+
+
+def _bucket_start(db: Session, bucket_seconds: int):
+    """
+    Build a SQL expression truncating ``PriceHistory.timestamp`` to epoch seconds of its bucket.
+    """
+    # Rendered inline so that identical expressions compare equal in GROUP BY / PARTITION BY
+    bucket_seconds = literal_column(str(int(bucket_seconds)), Integer)
+    if db.get_bind().dialect.name == "sqlite":
+        epoch = cast(func.strftime("%s", models.PriceHistory.timestamp), Integer)
+        return (epoch // bucket_seconds) * bucket_seconds
+    epoch = func.extract("epoch", models.PriceHistory.timestamp)
+    return func.floor(epoch / bucket_seconds) * bucket_seconds
+
+
+@observe_db
+def get_price_candles(db: Session, crypto_id: int, bucket_seconds: int, start: datetime, end: datetime):
+    """
+    Downsample the price history of a crypto into OHLC buckets, computed in SQL.
+
+    Args:
+        db (Session): The database session.
+        crypto_id (int): ID of the crypto record.
+        bucket_seconds (int): Size of a bucket in seconds.
+        start (datetime): Inclusive UTC start of the range.
+        end (datetime): Inclusive UTC end of the range.
+
+    Returns:
+        list[Row]: Rows with ``bucket`` (epoch seconds), ``open``, ``high``, ``low``, ``close`` and ``points``.
+    """
+    return db.execute(price_candles_query(db, crypto_id, bucket_seconds, start, end)).all()
+
+
+def price_candles_query(db: Session, crypto_id: int, bucket_seconds: int, start: datetime, end: datetime):
+    """
+    Build the OHLC downsampling query of ``get_price_candles`` (same arguments).
+    """
+    history = models.PriceHistory
+    bucket = _bucket_start(db, bucket_seconds)
+    ranked = (
+        select(
+            bucket.label("bucket"),
+            history.price,
+            func.row_number().over(partition_by=bucket, order_by=history.timestamp.asc()).label("rn_open"),
+            func.row_number().over(partition_by=bucket, order_by=history.timestamp.desc()).label("rn_close"),
+        )
+        .where(history.crypto_id == crypto_id, history.timestamp >= start, history.timestamp <= end)
+        .subquery()
+    )
+    query = (
+        select(
+            ranked.c.bucket,
+            func.max(case((ranked.c.rn_open == 1, ranked.c.price))).label("open"),
+            func.max(ranked.c.price).label("high"),
+            func.min(ranked.c.price).label("low"),
+            func.max(case((ranked.c.rn_close == 1, ranked.c.price))).label("close"),
+            func.count().label("points"),
+        )
+        .group_by(ranked.c.bucket)
+        .order_by(ranked.c.bucket)
+    )
+    return query
+
+
+@observe_db
+def compact_price_history(db: Session, older_than: datetime, bucket_seconds: int) -> int:
+    """
+    Roll price points older than a cutoff into coarser buckets.
+
+    Within each bucket only the points carrying its OHLC values are kept: the first
+    (open), the highest, the lowest and the last (close) one, so candles computed
+    over compacted buckets are unchanged. The cutoff is rounded down to a bucket
+    boundary, so that a bucket is either compacted as a whole or not at all.
+
+    Args:
+        db (Session): The database session.
+        older_than (datetime): Only points before this UTC time are compacted.
+        bucket_seconds (int): Size of the coarser bucket in seconds.
+
+    Returns:
+        int: The number of deleted price points.
+    """
+    history = models.PriceHistory
+    epoch = int((older_than - datetime(1970, 1, 1)).total_seconds())
+    older_than = datetime.utcfromtimestamp(epoch - epoch % bucket_seconds)
+    bucket = (history.crypto_id, _bucket_start(db, bucket_seconds))
+
+    def first(*order_by):
+        return func.row_number().over(partition_by=bucket, order_by=order_by) == 1
+
+    ranked = (
+        select(
+            history.id,
+            or_(
+                first(history.timestamp.asc(), history.id.asc()),
+                first(history.timestamp.desc(), history.id.desc()),
+                first(history.price.desc(), history.id.asc()),
+                first(history.price.asc(), history.id.asc()),
+            ).label("ohlc"),
+        )
+        .where(history.timestamp < older_than)
+        .subquery()
+    )
+    keep = select(ranked.c.id).where(ranked.c.ohlc)
+    result = db.execute(
+        delete(history)
+        .where(history.timestamp < older_than, history.id.not_in(keep))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def alert_rules_query():
+    """
+    Build the query selecting alert rules as plain rows, with the CoinGecko ID of their crypto.
+    """
+    rule = models.AlertRule
+    return (
+        select(rule.id, models.Crypto.cg_id, rule.kind, rule.threshold, rule.reference_price,
+               rule.created_at, rule.last_triggered_at)
+        .join(models.Crypto, models.Crypto.id == rule.crypto_id)
+    )
+
+
+@observe_db
+def get_alert_rule(db: Session, rule_id: int):
+    """
+    Retrieve an alert rule by its ID.
+
+    Args:
+        db (Session): The database session.
+        rule_id (int): The ID of the rule.
+
+    Returns:
+        Row: The rule with its ``cg_id`` (see ``alert_rules_query``), or None if not found.
+    """
+    return db.execute(alert_rules_query().where(models.AlertRule.id == rule_id)).first()
+
+
+@observe_db
+def get_alert_rules(db: Session, cg_id: str | None = None, after_id: int | None = None, limit: int = 100):
+    """
+    Retrieve a page of alert rules ordered by ID.
+
+    Args:
+        db (Session): The database session.
+        cg_id (str | None): Only return the rules of this crypto.
+        after_id (int | None): Only return rules with a greater ID (the last ID of the previous page).
+        limit (int): Maximum number of rules.
+
+    Returns:
+        list[Row]: The rules with their ``cg_id``.
+    """
+    query = alert_rules_query().order_by(models.AlertRule.id).limit(limit)
+    if cg_id is not None:
+        query = query.where(models.Crypto.cg_id == cg_id.lower())
+    if after_id is not None:
+        query = query.where(models.AlertRule.id > after_id)
+    return db.execute(query).all()
+
+
+@observe_db
+def get_alert_rule_states(db: Session):
+    """
+    Retrieve what the alert engine needs of every alert rule.
+
+    Returns:
+        list[Row]: Rows with ``id``, ``cg_id``, ``kind``, ``threshold`` and ``reference_price``.
+    """
+    rule = models.AlertRule
+    return db.execute(
+        select(rule.id, models.Crypto.cg_id, rule.kind, rule.threshold, rule.reference_price)
+        .join(models.Crypto, models.Crypto.id == rule.crypto_id)
+    ).all()
+
+
+@observe_db
+def create_alert_rule(db: Session, rule: models.AlertRule) -> int:
+    """
+    Insert a new alert rule.
+
+    Args:
+        db (Session): The database session.
+        rule (models.AlertRule): The rule to insert.
+
+    Returns:
+        int: The ID of the new rule.
+    """
+    db.add(rule)
+    db.commit()
+    return rule.id
+
+
+@observe_db
+def update_alert_rule(db: Session, rule_id: int, updated_fields: dict) -> bool:
+    """
+    Update specific fields of an alert rule.
+
+    Args:
+        db (Session): The database session.
+        rule_id (int): The ID of the rule to update.
+        updated_fields (dict): A dictionary of fields to update with their new values.
+
+    Returns:
+        bool: Whether the rule exists.
+    """
+    result = db.execute(update(models.AlertRule).where(models.AlertRule.id == rule_id).values(**updated_fields))
+    db.commit()
+    return result.rowcount > 0
+
+
+@observe_db
+def delete_alert_rule(db: Session, rule_id: int) -> bool:
+    """
+    Delete an alert rule by its ID.
+
+    Returns:
+        bool: Whether the rule existed.
+    """
+    result = db.execute(delete(models.AlertRule).where(models.AlertRule.id == rule_id))
+    db.commit()
+    return result.rowcount > 0
+
+
+@observe_db
+def record_alert_triggers(db: Session, triggered: list[dict]):
+    """
+    Store when alert rules fired, and the new reference price of re-armed "percent_change" rules.
+
+    Records are updated with executemany statements keyed by primary key.
+
+    Args:
+        db (Session): The database session.
+        triggered (list[dict]): One row per fired rule with ``id`` and ``last_triggered_at``,
+            plus ``reference_price`` for rules measured from a new reference price.
+    """
+    rearmed = [row for row in triggered if "reference_price" in row]
+    fired = [row for row in triggered if "reference_price" not in row]
+    for rows in (rearmed, fired):
+        if rows:
+            db.execute(update(models.AlertRule), rows)
+    db.commit()
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import observe_db
+from app.db import crud
+
+# Async counterparts of the read functions in app.db.crud, for the async engine.
+# They execute the same statements as their sync versions.
+
+
+@observe_db
+async def get_crypto_by_id(db: AsyncSession, cg_id: str):
+    """
+    Retrieve a crypto record by its CoinGecko ID (see ``crud.get_crypto_by_id``).
+    """
+    return (await db.scalars(crud.crypto_by_id_query(cg_id))).first()
+
+
+@observe_db
+async def get_crypto_row_by_id(db: AsyncSession, cg_id: str):
+    """
+    Retrieve the columns of a crypto record as a plain row (see ``crud.get_crypto_row_by_id``).
+    """
+    return (await db.execute(crud.crypto_row_by_id_query(cg_id))).first()
+
+
+@observe_db
+async def get_cryptos_page(db: AsyncSession, limit: int, rows: bool = False, **options):
+    """
+    Retrieve one page of crypto records using keyset pagination (see ``crud.get_cryptos_page``).
+    """
+    query = crud.cryptos_page_query(db, limit, rows=rows, **options)
+    if rows:
+        return (await db.execute(query)).all()
+    return (await db.scalars(query)).all()
+
+
+@observe_db
+async def get_price_candles(db: AsyncSession, crypto_id: int, bucket_seconds: int, start: datetime, end: datetime):
+    """
+    Downsample the price history of a crypto into OHLC buckets (see ``crud.get_price_candles``).
+    """
+    return (await db.execute(crud.price_candles_query(db, crypto_id, bucket_seconds, start, end))).all()
@@ -1,13 +1,58 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.settings import settings
 
+# Async drivers used for DB_ASYNC, per sync dialect
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def _pool_options(url: URL) -> dict:
+    """
+    Build the connection pool arguments for an engine from the settings.
+    """
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    # In-memory SQLite databases live in a single connection and have no sized pool
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+def _async_url(url: URL) -> URL:
+    """
+    Return the URL of the same database for its async driver.
+    """
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"DB_ASYNC is not supported for {backend} databases")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
 # Database engine and session setup
-engine = create_engine(settings.DATABASE_URL)
+database_url = make_url(settings.DATABASE_URL)
+engine = create_engine(database_url, **_pool_options(database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Optional async engine for the read path; needs asyncpg or aiosqlite installed
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(_async_url(database_url), **_pool_options(database_url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     """
@@ -20,8 +65,54 @@ def get_db():
         db.close()
 
 
+async def get_read_db():
+    """
+    Provides a database session for read-only API requests.
+
+    This is an ``AsyncSession`` on the async engine when DB_ASYNC is enabled, and a
+    regular session otherwise (its queries are then run in the threadpool).
+    """
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """
     Initialize the database by creating tables based on the defined models.
+
+    Columns and indexes are also created for tables that already existed, so that
+    columns and indexes added to models later are applied to existing databases,
+    along with the dialect-specific indexes used for substring search.
     """
+    from app.db.search import create_search_indexes
+
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    create_search_indexes(engine)
+
+
+def _add_missing_columns():
+    """
+    Add model columns missing from existing tables (nullable, or with a server default).
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg} NOT NULL"
+                conn.execute(text(ddl))
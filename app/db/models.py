@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from .database import Base
 
 
@@ -12,11 +12,72 @@ class Crypto(Base):
         symbol (str): The crypto symbol (e.g., "btc").
         name (str): The full name of the cryptocurrency.
         price (float): The current price of the cryptocurrency.
+        last_updated (datetime): UTC time the price was last refreshed from CoinGecko.
+        next_due (datetime): UTC time from which the price is due for its next refresh.
+        volatility (float): EWMA of absolute log returns between refreshes, per square-root minute.
     """
     __tablename__ = "cryptos"
+    __table_args__ = (
+        # Keyset pagination indexes: (sort column, id)
+        Index("ix_cryptos_name_id", "name", "id"),
+        Index("ix_cryptos_price_id", "price", "id"),
+        Index("ix_cryptos_next_due", "next_due"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     cg_id = Column(String, unique=True, index=True)  # coingecko id - for example "bitcoin"
     symbol = Column(String, index=True)  # for example "btc"
     name = Column(String)
     price = Column(Float)
+    last_updated = Column(DateTime)
+    next_due = Column(DateTime)  # NULL means due right away
+    volatility = Column(Float, nullable=False, default=0.0, server_default="0")
+
+
+class PriceHistory(Base):
+    """
+    Represents a single observed price of a cryptocurrency at a point in time.
+
+    Attributes:
+        id (int): Primary key for the price point.
+        crypto_id (int): ID of the crypto record the price belongs to.
+        timestamp (datetime): UTC time the price was observed.
+        price (float): The observed price in USD.
+    """
+    __tablename__ = "price_history"
+    __table_args__ = (
+        Index("ix_price_history_crypto_id_timestamp", "crypto_id", "timestamp"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    crypto_id = Column(Integer, ForeignKey("cryptos.id", ondelete="CASCADE"), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    price = Column(Float, nullable=False)
+
+
+class AlertRule(Base):
+    """
+    Represents a user-defined price alert on a cryptocurrency.
+
+    Attributes:
+        id (int): Primary key for the rule.
+        crypto_id (int): ID of the crypto record the rule watches.
+        kind (str): "above" (price crosses the threshold upwards), "below" (downwards) or
+            "percent_change" (price moves by the threshold in percent from the reference price, either way).
+        threshold (float): Price in USD, or percentage for "percent_change" rules.
+        reference_price (float): Price when the rule was created, last updated or (for "percent_change") last fired.
+        created_at (datetime): UTC time the rule was created.
+        last_triggered_at (datetime): UTC time the rule last fired, NULL if never.
+    """
+    __tablename__ = "alert_rules"
+    __table_args__ = (
+        Index("ix_alert_rules_crypto_id", "crypto_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    crypto_id = Column(Integer, ForeignKey("cryptos.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)
+    threshold = Column(Float, nullable=False)
+    reference_price = Column(Float)
+    created_at = Column(DateTime, nullable=False)
+    last_triggered_at = Column(DateTime)
@@ -1,6 +1,7 @@
-from typing import Optional
+from datetime import datetime
+from typing import Literal, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class CryptoBase(BaseModel):
@@ -22,6 +23,46 @@ class CryptoCreate(CryptoBase):
     pass
 
 
+class CryptoBulkCreate(BaseModel):
+    """
+    Model for creating many cryptocurrency entries at once.
+
+    Attributes:
+        symbols (list[str]): Symbols, names or CoinGecko IDs of the cryptocurrencies to add.
+    """
+    symbols: list[str]
+
+
+class CryptoBulkResult(BaseModel):
+    """
+    Outcome of a single item of a bulk create request.
+
+    Attributes:
+        query (str): The symbol, name or ID as sent by the client.
+        status (str): "created", "duplicate", "ambiguous", "not_found" or "unavailable" (no price).
+        cg_id (Optional[str]): The resolved CoinGecko ID, if any.
+        options (list[str]): Candidate coins for an ambiguous symbol.
+    """
+    query: str
+    status: Literal["created", "duplicate", "ambiguous", "not_found", "unavailable"]
+    cg_id: Optional[str] = None
+    options: list[str] = []
+
+
+class CoinSuggestion(BaseModel):
+    """
+    Model representing a coin of the CoinGecko catalog suggested for a partial query.
+
+    Attributes:
+        id (str): The CoinGecko ID of the coin.
+        symbol (str): The symbol of the coin.
+        name (str): The full name of the coin.
+    """
+    id: str
+    symbol: str
+    name: str
+
+
 class Crypto(CryptoBase):
     """
     Full model representing a cryptocurrency record with additional fields.
@@ -52,3 +93,120 @@ class CryptoUpdate(BaseModel):
     # No update for symbol as it is the primary key
     name: Optional[str] = None
     price: Optional[float] = None
+
+
+class PriceCandle(BaseModel):
+    """
+    Model representing an OHLC price bucket.
+
+    Attributes:
+        timestamp (datetime): UTC start of the bucket.
+        open (float): First price observed in the bucket.
+        high (float): Highest price observed in the bucket.
+        low (float): Lowest price observed in the bucket.
+        close (float): Last price observed in the bucket.
+        points (int): Number of raw price points in the bucket.
+    """
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    points: int
+
+
+class CryptoPage(BaseModel):
+    """
+    Model representing one page of cryptocurrencies.
+
+    Attributes:
+        items (list[Crypto]): The cryptocurrencies on this page.
+        next_cursor (Optional[str]): Opaque token for the next page, or None on the last page.
+    """
+    items: list[Crypto]
+    next_cursor: Optional[str] = None
+
+
+class AlertRuleCreate(BaseModel):
+    """
+    Model for creating a price alert rule.
+
+    Attributes:
+        cg_id (str): The CoinGecko ID of a tracked cryptocurrency.
+        kind (str): "above", "below" or "percent_change".
+        threshold (float): Price in USD, or percentage for "percent_change" rules.
+    """
+    cg_id: str
+    kind: Literal["above", "below", "percent_change"]
+    threshold: float = Field(gt=0)
+
+
+class AlertRuleUpdate(BaseModel):
+    """
+    Model for updating a price alert rule.
+
+    Fields left out are kept; they cannot be set to null.
+
+    Fields:
+        kind (Optional[str]): The new kind of the rule.
+        threshold (Optional[float]): The new threshold of the rule.
+    """
+    kind: Optional[Literal["above", "below", "percent_change"]] = None
+    threshold: Optional[float] = Field(default=None, gt=0)
+
+    @field_validator("kind", "threshold")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may be left out but not null")
+        return value
+
+
+class AlertRule(BaseModel):
+    """
+    Model representing a price alert rule.
+
+    Attributes:
+        id (int): The ID of the rule.
+        cg_id (str): The CoinGecko ID of the watched cryptocurrency.
+        kind (str): "above", "below" or "percent_change".
+        threshold (float): Price in USD, or percentage for "percent_change" rules.
+        reference_price (Optional[float]): Price the percentage of a "percent_change" rule is measured from.
+        created_at (datetime): UTC time the rule was created.
+        last_triggered_at (Optional[datetime]): UTC time the rule last fired.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    cg_id: str
+    kind: Literal["above", "below", "percent_change"]
+    threshold: float
+    reference_price: Optional[float] = None
+    created_at: datetime
+    last_triggered_at: Optional[datetime] = None
+
+
+class AlertEvent(BaseModel):
+    """
+    Model representing a fired price alert, as published to the alert stream.
+
+    Attributes:
+        id (str): The ID of the stream entry.
+        rule_id (int): The ID of the rule that fired.
+        cg_id (str): The CoinGecko ID of the cryptocurrency.
+        kind (str): The kind of the rule.
+        threshold (float): The threshold of the rule.
+        reference_price (Optional[float]): The reference price a "percent_change" rule fired against.
+        previous_price (float): The price before the refresh.
+        price (float): The price that fired the rule.
+        triggered_at (datetime): UTC time the rule fired.
+    """
+    id: str
+    rule_id: int
+    cg_id: str
+    kind: str
+    threshold: float
+    reference_price: Optional[float] = None
+    previous_price: float
+    price: float
+    triggered_at: datetime
@@ -0,0 +1,115 @@
+import logging
+
+from sqlalchemy import func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+# SQLite FTS5 table mirroring cryptos.symbol/name, kept in sync by triggers
+SQLITE_SEARCH_TABLE = "cryptos_search"
+
+# Trigram indexes cannot match queries shorter than this
+TRIGRAM_MIN_LENGTH = 3
+
+_sqlite_search_enabled = False
+
+SQLITE_SEARCH_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE {SQLITE_SEARCH_TABLE} USING fts5(
+        symbol, name, content='cryptos', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_ai AFTER INSERT ON cryptos BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, symbol, name) VALUES (new.id, new.symbol, new.name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_ad AFTER DELETE ON cryptos BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, symbol, name)
+        VALUES ('delete', old.id, old.symbol, old.name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_au AFTER UPDATE OF symbol, name ON cryptos BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, symbol, name)
+        VALUES ('delete', old.id, old.symbol, old.name);
+        INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, symbol, name) VALUES (new.id, new.symbol, new.name);
+    END
+    """,
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}) VALUES ('rebuild')",
+]
+
+
+def create_search_indexes(engine: Engine):
+    """
+    Create the indexes used for case-insensitive substring search on symbol and name.
+
+    On PostgreSQL these are pg_trgm GIN indexes on ``lower(symbol)`` and ``lower(name)``.
+    On SQLite an FTS5 trigram table is used instead, kept in sync with triggers.
+    If the index cannot be created, search still works through a table scan.
+    """
+    global _sqlite_search_enabled
+
+    dialect = engine.dialect.name
+    try:
+        if dialect == "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for column in ("symbol", "name"):
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS ix_cryptos_{column}_trgm "
+                        f"ON cryptos USING gin (lower({column}) gin_trgm_ops)"
+                    ))
+        elif dialect == "sqlite":
+            with engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": SQLITE_SEARCH_TABLE}
+                ).first()
+                if not exists:
+                    for statement in SQLITE_SEARCH_DDL:
+                        conn.execute(text(statement))
+            _sqlite_search_enabled = True
+    except DBAPIError:
+        logger.warning("Could not create search indexes, dashboard search will scan the table", exc_info=True)
+
+
+def escape_like(value: str) -> str:
+    """
+    Escape LIKE wildcards so that user input is matched literally (escape character is backslash).
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_condition(db: Session, query: str):
+    """
+    Build a WHERE condition matching cryptos whose symbol or name contains the query (case-insensitive).
+
+    Args:
+        db (Session): The database session.
+        query (str): The search text.
+
+    Returns:
+        ColumnElement: The condition to add to a ``select(models.Crypto)``.
+    """
+    query = query.lower()
+    if _sqlite_search_enabled and db.get_bind().dialect.name == "sqlite" and len(query) >= TRIGRAM_MIN_LENGTH:
+        phrase = '"' + query.replace('"', '""') + '"'
+        search_table = table(SQLITE_SEARCH_TABLE)
+        matches = (
+            select(literal_column("rowid"))
+            .select_from(search_table)
+            .where(literal_column(SQLITE_SEARCH_TABLE).op("MATCH")(phrase))
+        )
+        return models.Crypto.id.in_(matches)
+
+    pattern = f"%{escape_like(query)}%"
+    return or_(
+        func.lower(models.Crypto.symbol).like(pattern, escape="\\"),
+        func.lower(models.Crypto.name).like(pattern, escape="\\"),
+    )
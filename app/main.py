@@ -1,14 +1,25 @@
-from threading import Thread
+import time
+from datetime import datetime
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy import text
 
+from app.core import metrics
 from app.core.logging import setup_logging
-from app.core.scheduler import scheduler, update_prices_job
+from app.core.scheduler import scheduler, heartbeat_job, resign, update_prices_job, compact_price_history_job
 from app.core.settings import settings
-from app.db.database import engine, init_db
-from app.db.models import Base
+from app.core.warmup import Stage, WarmUp
+from app.db.database import async_engine, init_db
+from app.services import coingecko
+from app.services.clients import cg, coin_catalog, coingecko_flights, is_built, price_broadcaster, scheduler_lease
+from app.services.http_cache import response_cache
+from app.api.routes_alerts import router as alerts_router
+from app.api.routes_coins import router as coins_router
 from app.api.routes_crypto import router as crypto_router
+from app.api.routes_system import router as system_router
 from app.ui.routes_web import router as ui_router
 
 # Set up logging
@@ -17,29 +28,150 @@ setup_logging()
 # Initialize FastAPI app
 app = FastAPI()
 
-# --- Database Setup ---
-init_db()  # Initialize the database (create tables)
-
 # --- Mount static files and templates ---
 app.mount("/static", StaticFiles(directory="app/static"), name="static")  # Serve static files
 
 # --- Include routers for different API routes ---
 app.include_router(ui_router)  # UI-related routes
 app.include_router(crypto_router, prefix="/cryptos", tags=["Cryptos"])  # Crypto-related routes
+app.include_router(coins_router, prefix="/coins", tags=["Coins"])  # CoinGecko catalog lookups
+app.include_router(alerts_router, prefix="/alerts", tags=["Alerts"])  # Price alert rules and fired alerts
+app.include_router(system_router, prefix="/system", tags=["System"])  # Operational/debug routes
 
 
-# --- Scheduler Setup ---
-@app.on_event("startup")
-def start_scheduler():
+# --- Metrics ---
+metrics.register_caches({
+    "responses": response_cache.stats,
+    "coin_catalog": lambda: coin_catalog.stats(),
+    "coingecko_single_flight": lambda: coingecko_flights.stats(),
+})
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """
+    Record the latency of every HTTP request under its route template (not the raw path).
+    """
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_SECONDS.labels(
+        request.method, route.path if route else "unmatched", response.status_code
+    ).observe(time.perf_counter() - started)
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """
+    Expose the application metrics in the Prometheus text format.
+    """
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+# --- Probes ---
+@app.get("/healthz", include_in_schema=False)
+def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+def readiness():
+    """
+    Readiness probe: 200 once the warm-up has completed, 503 with the state of its stages before.
+    """
+    status = warm_up.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+# --- Startup ---
+async def init_database():
+    """
+    Create the database schema and open the first pooled connection of the async engine, if enabled.
+    """
+    await run_in_threadpool(init_db)
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+
+async def start_scheduler():
     """
     Start the scheduler to update cryptocurrency prices at the specified interval.
 
-    Runs the price update job in a separate thread on startup, and schedules it
-    to run periodically based on the configuration in settings.
+    The price update job runs on the event loop right after startup and then every
+    REFRESH_TICK_SECONDS, refreshing the cryptos that are due most urgently. Only the
+    process holding the leader lease runs it (or every worker its shard, with
+    SCHEDULER_SHARDING); APScheduler never starts a job while its previous run is
+    still going.
+
+    The warm-up retries a failed stage, so this can run again: the jobs replace
+    the ones already added and a running scheduler is not started twice.
     """
-    # Run price updates in a separate thread
-    Thread(target=update_prices_job, daemon=True).start()
+    # Take part in leader election before the first run, then renew the lease well before it expires
+    await heartbeat_job()
+    scheduler.add_job(
+        heartbeat_job,
+        "interval",
+        seconds=max(1, settings.SCHEDULER_LEASE_SECONDS / 3),
+        id="heartbeat",
+        replace_existing=True
+    )
+    # Add the price update job to the scheduler with an interval, first run immediately
+    scheduler.add_job(
+        update_prices_job,
+        "interval",
+        seconds=settings.REFRESH_TICK_SECONDS,
+        next_run_time=datetime.now(),
+        id="update_prices",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        compact_price_history_job,
+        "interval",
+        hours=settings.PRICE_HISTORY_COMPACT_INTERVAL_HOURS,
+        id="compact_price_history",
+        replace_existing=True
+    )
+    if not scheduler.running:
+        scheduler.start()
+
+
+# Nothing touches the database or Redis on import: the schema, the scheduler and the
+# caches are set up in the background once the server is accepting connections
+warm_up = WarmUp([
+    Stage("database", init_database),
+    Stage("scheduler", start_scheduler),
+    # An unreachable Coingecko should not keep the process out of rotation; lookups load the catalog on demand
+    Stage("coin_catalog", coingecko.warm_up, required=False),
+])
 
-    # Add the price update job to the scheduler with an interval
-    scheduler.add_job(update_prices_job, "interval", minutes=settings.UPDATE_INTERVAL_MINUTES)
-    scheduler.start()
+
+@app.on_event("startup")
+async def start_warm_up():
+    """
+    Start the warm-up in the background, so that the server accepts connections (and liveness probes) right away.
+    """
+    warm_up.start()
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    """
+    Stop the warm-up, the scheduler (handing over its lease) and the price stream, and close the pooled connections.
+    """
+    await warm_up.stop()
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    if is_built(scheduler_lease):
+        await resign()
+    if is_built(price_broadcaster):
+        await price_broadcaster.stop()
+    if is_built(cg):
+        await cg.aclose()
+    if async_engine is not None:
+        await async_engine.dispose()
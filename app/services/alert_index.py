@@ -0,0 +1,181 @@
+import numpy as np
+
+# Rule kinds, in the order of their codes in the index
+KINDS = ("above", "below", "percent_change")
+ABOVE, BELOW, PERCENT_CHANGE = range(len(KINDS))
+
+
+def _spans(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    Return the concatenation of ``arange(lo[i], hi[i])`` for all i, without a Python loop.
+    """
+    lengths = np.maximum(hi - lo, 0)
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(lo - offsets, lengths) + np.arange(total)
+
+
+class AlertIndex:
+    """
+    In-memory index of price alert rules, finding the rules a refresh fires without looking at the others.
+
+    Every rule is reduced to the price level it fires at: rules firing on a rise
+    ("above", and "percent_change" at ``reference * (1 + threshold%)``) go to the
+    "up" levels, rules firing on a fall ("below", and "percent_change" at
+    ``reference * (1 - threshold%)``) to the "down" levels. Each side is one NumPy
+    array sorted by coin, then level, so the levels of a coin are a sorted
+    contiguous segment. The pair is encoded as a complex number (coin + 1j * level),
+    whose ordering is lexicographic, so one ``searchsorted`` call finds the segment
+    range crossed by every changed coin at once.
+
+    A rule fires when the price crosses its level: a move from ``old`` to ``new`` fires
+    the up levels in ``(old, new]`` or the down levels in ``[new, old)``. A fired
+    "percent_change" rule is re-armed around the new price.
+
+    Attributes:
+        version (str | None): Version of the rule set the index reflects.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._coin_of = {}  # CoinGecko ID -> coin number
+        self._cg_ids = []
+        self.rebuild([], None)
+
+    def __len__(self):
+        return len(self.rule_ids)
+
+    def rebuild(self, rules: list, version: str | None):
+        """
+        Replace the whole index with the given rules.
+
+        Args:
+            rules (list): Rows or tuples of ``(id, cg_id, kind, threshold, reference_price)``.
+            version (str | None): The version of the rule set.
+        """
+        self._coin_of = {}
+        self._cg_ids = []
+        count = len(rules)
+        self.rule_ids = np.fromiter((rule[0] for rule in rules), dtype=np.int64, count=count)
+        self.coins = np.fromiter((self._coin(rule[1]) for rule in rules), dtype=np.int64, count=count)
+        self.kinds = np.fromiter((KINDS.index(rule[2]) for rule in rules), dtype=np.int8, count=count)
+        self.thresholds = np.fromiter((rule[3] for rule in rules), dtype=np.float64, count=count)
+        self.references = np.fromiter(
+            (np.nan if rule[4] is None else rule[4] for rule in rules), dtype=np.float64, count=count
+        )
+        self._sort()
+        self.version = version
+
+    def _coin(self, cg_id: str) -> int:
+        coin = self._coin_of.get(cg_id)
+        if coin is None:
+            coin = self._coin_of[cg_id] = len(self._cg_ids)
+            self._cg_ids.append(cg_id)
+        return coin
+
+    def _sort(self):
+        percent = self.kinds == PERCENT_CHANGE
+        # Percent rules without a reference price have no level yet (NaN) and are left out
+        up_levels = np.where(percent, self.references * (1 + self.thresholds / 100), self.thresholds)
+        down_levels = np.where(percent, self.references * (1 - self.thresholds / 100), self.thresholds)
+        self._up_keys, self._up_rules = self._side(self.kinds != BELOW, up_levels)
+        self._down_keys, self._down_rules = self._side(self.kinds != ABOVE, down_levels)
+
+    def _side(self, mask: np.ndarray, levels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        rules = np.flatnonzero(mask & ~np.isnan(levels))
+        keys = self.coins[rules] + 1j * levels[rules]
+        order = np.argsort(keys)
+        return keys[order], rules[order]
+
+    def evaluate(self, changes: list[dict]) -> list[dict]:
+        """
+        Find the rules fired by a batch of price changes, and re-arm fired "percent_change" rules.
+
+        Args:
+            changes (list[dict]): ``{"cg_id": ..., "old_price": ..., "new_price": ...}`` items,
+                as returned by a price refresh.
+
+        Returns:
+            list[dict]: One item per fired rule with ``rule_id``, ``cg_id``, ``kind``,
+            ``threshold``, ``reference_price`` (for "percent_change" rules, the price it was
+            measured from), ``previous_price`` and ``price``.
+        """
+        moves = [
+            (self._coin_of[change["cg_id"]], change["old_price"], change["new_price"])
+            for change in changes
+            if change["cg_id"] in self._coin_of and change["old_price"] and change["new_price"]
+        ]
+        if not moves or not len(self):
+            return []
+        coins = np.fromiter((move[0] for move in moves), dtype=np.int64, count=len(moves))
+        old = np.fromiter((move[1] for move in moves), dtype=np.float64, count=len(moves))
+        new = np.fromiter((move[2] for move in moves), dtype=np.float64, count=len(moves))
+        old_keys = coins + 1j * old
+        new_keys = coins + 1j * new
+
+        up_lo = np.searchsorted(self._up_keys, old_keys, side="right")
+        up_hi = np.where(new > old, np.searchsorted(self._up_keys, new_keys, side="right"), up_lo)
+        down_lo = np.searchsorted(self._down_keys, new_keys, side="left")
+        down_hi = np.where(new < old, np.searchsorted(self._down_keys, old_keys, side="left"), down_lo)
+
+        fired = np.concatenate((self._up_rules[_spans(up_lo, up_hi)], self._down_rules[_spans(down_lo, down_hi)]))
+        if not len(fired):
+            return []
+        move_of = np.concatenate((
+            np.repeat(np.arange(len(moves)), np.maximum(up_hi - up_lo, 0)),
+            np.repeat(np.arange(len(moves)), np.maximum(down_hi - down_lo, 0)),
+        ))
+
+        kinds = self.kinds[fired]
+        percent = kinds == PERCENT_CHANGE
+        references = np.where(percent, self.references[fired], np.nan)
+        events = [
+            {
+                "rule_id": rule_id,
+                "cg_id": self._cg_ids[coin],
+                "kind": KINDS[kind],
+                "threshold": threshold,
+                "reference_price": None if reference != reference else reference,  # NaN -> None
+                "previous_price": previous,
+                "price": price,
+            }
+            for rule_id, coin, kind, threshold, reference, previous, price in zip(
+                self.rule_ids[fired].tolist(), self.coins[fired].tolist(), kinds.tolist(),
+                self.thresholds[fired].tolist(), references.tolist(), old[move_of].tolist(), new[move_of].tolist()
+            )
+        ]
+
+        if percent.any():
+            self.references[fired[percent]] = new[move_of[percent]]
+            self._rearm(fired[percent])
+        return events
+
+    def _rearm(self, rules: np.ndarray):
+        """
+        Move the levels of "percent_change" rules to their new reference price.
+
+        The old entries are dropped and the new ones merged in, which keeps both sides
+        sorted in linear time instead of sorting them again.
+        """
+        moved = np.zeros(len(self.rule_ids), dtype=bool)
+        moved[rules] = True
+        coins = self.coins[rules]
+        step = self.thresholds[rules] / 100
+        self._up_keys, self._up_rules = self._merge(
+            self._up_keys, self._up_rules, moved, coins + 1j * (self.references[rules] * (1 + step)), rules
+        )
+        self._down_keys, self._down_rules = self._merge(
+            self._down_keys, self._down_rules, moved, coins + 1j * (self.references[rules] * (1 - step)), rules
+        )
+
+    @staticmethod
+    def _merge(keys: np.ndarray, rules: np.ndarray, moved: np.ndarray, new_keys: np.ndarray,
+               new_rules: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        keep = ~moved[rules]
+        keys, rules = keys[keep], rules[keep]
+        order = np.argsort(new_keys)
+        new_keys, new_rules = new_keys[order], new_rules[order]
+        at = np.searchsorted(keys, new_keys)
+        return np.insert(keys, at, new_keys), np.insert(rules, at, new_rules)
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import ALERT_EVALUATION_SECONDS, ALERTS_FIRED
+from app.core.settings import settings
+from app.db import crud, models
+from app.services.alert_index import AlertIndex
+from app.services.clients import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+# Bumped on every change to the rule set, so that every process reloads its index
+RULES_VERSION_KEY = "alerts:rules_version"
+
+_index = AlertIndex()
+_index_lock = asyncio.Lock()
+_index_loaded = False
+
+
+def bump_rules_version() -> str | None:
+    """
+    Mark the alert rules as changed, so that the index of every process is reloaded before its next evaluation.
+
+    Returns:
+        str | None: The new rules version, or None if Redis is unavailable.
+    """
+    try:
+        return str(redis_client.incr(RULES_VERSION_KEY))
+    except RedisError:
+        logger.warning("Could not bump the alert rules version, other processes may evaluate stale rules")
+        return None
+
+
+def create_rule(db: Session, cg_id: str, kind: str, threshold: float):
+    """
+    Create a price alert rule on a tracked cryptocurrency.
+
+    The current price of the crypto becomes the reference price of the rule.
+
+    Args:
+        db (Session): The database session.
+        cg_id (str): The CoinGecko ID of the crypto.
+        kind (str): "above", "below" or "percent_change".
+        threshold (float): Price in USD, or percentage for "percent_change" rules.
+
+    Returns:
+        Row: The created rule (see ``crud.alert_rules_query``).
+
+    Raises:
+        HTTPException: 404 if the crypto is not tracked, 409 if it has no price yet.
+    """
+    crypto = crud.get_crypto_by_id(db, cg_id.lower())
+    if not crypto:
+        raise HTTPException(status_code=404, detail="Crypto not found")
+    if crypto.price is None:
+        raise HTTPException(status_code=409, detail=f"Crypto '{crypto.cg_id}' has no price yet")
+    rule_id = crud.create_alert_rule(db, models.AlertRule(
+        crypto_id=crypto.id, kind=kind, threshold=threshold, reference_price=crypto.price,
+        created_at=datetime.utcnow()
+    ))
+    bump_rules_version()
+    logger.info(f"Created {kind} alert rule {rule_id} on {crypto.cg_id} at {threshold}")
+    return crud.get_alert_rule(db, rule_id)
+
+
+def list_rules(db: Session, cg_id: str | None = None, after_id: int | None = None, limit: int = 100):
+    """
+    Retrieve a page of alert rules ordered by ID, see ``crud.get_alert_rules``.
+    """
+    return crud.get_alert_rules(db, cg_id, after_id, limit)
+
+
+def get_rule(db: Session, rule_id: int):
+    """
+    Retrieve an alert rule by its ID.
+
+    Raises:
+        HTTPException: 404 if the rule does not exist.
+    """
+    rule = crud.get_alert_rule(db, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return rule
+
+
+def update_rule(db: Session, rule_id: int, fields: dict):
+    """
+    Update the kind or threshold of an alert rule.
+
+    The rule is re-armed: its reference price becomes the current price of the crypto.
+
+    Args:
+        db (Session): The database session.
+        rule_id (int): The ID of the rule.
+        fields (dict): ``kind`` and/or ``threshold``.
+
+    Returns:
+        Row: The updated rule.
+
+    Raises:
+        HTTPException: 404 if the rule does not exist.
+    """
+    rule = get_rule(db, rule_id)
+    crypto = crud.get_crypto_by_id(db, rule.cg_id)
+    crud.update_alert_rule(db, rule_id, {**fields, "reference_price": crypto.price})
+    bump_rules_version()
+    return crud.get_alert_rule(db, rule_id)
+
+
+def delete_rule(db: Session, rule_id: int):
+    """
+    Delete an alert rule by its ID.
+
+    Raises:
+        HTTPException: 404 if the rule does not exist.
+    """
+    if not crud.delete_alert_rule(db, rule_id):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    bump_rules_version()
+
+
+async def recent_events(count: int = 100) -> list[dict]:
+    """
+    Return the most recent fired alerts from the alert stream, newest first.
+
+    Raises:
+        HTTPException: 503 if Redis is unavailable.
+    """
+    try:
+        entries = await async_redis_client.xrevrange(settings.ALERT_STREAM_KEY, count=count)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Alert stream unavailable")
+    # Missing values are stored as empty strings
+    return [
+        {"id": entry_id, **{key: value if value != "" else None for key, value in fields.items()}}
+        for entry_id, fields in entries
+    ]
+
+
+async def evaluate(db: Session, changes: list[dict]) -> list[dict]:
+    """
+    Find the alert rules fired by a price refresh and append them to the alert stream.
+
+    The rules are evaluated against an in-memory index (see ``AlertIndex``), which is
+    reloaded from the database when the rule set changed since it was built. Fired
+    rules are recorded in the database, and "percent_change" rules are re-armed
+    around the new price; re-arming bumps the rules version so that other processes
+    (e.g. another shard evaluating the same coin) pick up the new reference prices.
+
+    Args:
+        db (Session): The database session.
+        changes (list[dict]): The cryptos whose price changed, as returned by ``refresh_prices``.
+
+    Returns:
+        list[dict]: The fired alerts, as published to the stream.
+    """
+    global _index_loaded
+
+    if not changes:
+        return []
+    async with _index_lock:
+        try:
+            version = await async_redis_client.get(RULES_VERSION_KEY) or "0"
+        except RedisError:
+            logger.warning("Could not read the alert rules version, evaluating the rules loaded before")
+            version = _index.version
+        if not _index_loaded or version != _index.version:
+            rules = await run_in_threadpool(crud.get_alert_rule_states, db)
+            _index.rebuild(rules, version)
+            _index_loaded = True
+            logger.info(f"Loaded {len(rules)} alert rules (version {version})")
+
+        with ALERT_EVALUATION_SECONDS.time():
+            events = _index.evaluate(changes)
+        if not events:
+            return []
+        now = datetime.utcnow()
+        for event in events:
+            event["triggered_at"] = now.isoformat()
+            ALERTS_FIRED.labels(event["kind"]).inc()
+        await run_in_threadpool(crud.record_alert_triggers, db, [
+            {"id": event["rule_id"], "last_triggered_at": now, "reference_price": event["price"]}
+            if event["kind"] == "percent_change" else {"id": event["rule_id"], "last_triggered_at": now}
+            for event in events
+        ])
+        if any(event["kind"] == "percent_change" for event in events):
+            previous = _index.version
+            version = await run_in_threadpool(bump_rules_version)
+            # This index is re-armed already: skip its reload unless another change came in meanwhile
+            if version is not None and previous is not None and int(version) == int(previous) + 1:
+                _index.version = version
+
+    logger.info(f"{len(events)} alert rules fired")
+    await _publish(events)
+    return events
+
+
+async def _publish(events: list[dict]):
+    try:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for event in events:
+                fields = {key: "" if value is None else value for key, value in event.items()}
+                pipe.xadd(settings.ALERT_STREAM_KEY, fields, maxlen=settings.ALERT_STREAM_MAXLEN, approximate=True)
+            await pipe.execute()
+    except RedisError:
+        logger.warning(f"Could not publish {len(events)} fired alerts to the alert stream")
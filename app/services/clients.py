@@ -1,13 +1,112 @@
-from pycoingecko import CoinGeckoAPI
 import redis
+import redis.asyncio
 from app.core.settings import settings
+from app.services.cluster import RedisLease, RedisLeaseSet, WorkerRegistry
+from app.services.coin_catalog import CoinCatalog
+from app.services.coingecko_client import AsyncCoinGeckoClient
+from app.services.rate_limit import RedisTokenBucket
+from app.services.single_flight import SingleFlight
+from app.services.streaming import PriceBroadcaster
+
+
+class LazyClient:
+    """
+    Stands in for a client that is only built when it is first used.
+
+    Attribute reads and writes are forwarded to the client, which ``factory`` builds
+    on first access. Importing this module therefore constructs nothing: clients are
+    built by the code path that needs them, with the settings and libraries in place
+    at that time.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_instance", None)
+
+    def _lazy_get(self):
+        if self._lazy_instance is None:
+            object.__setattr__(self, "_lazy_instance", self._lazy_factory())
+        return self._lazy_instance
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_get(), name, value)
+
+
+def is_built(client) -> bool:
+    """
+    Return whether a lazy client has been built (plain objects always are).
+    """
+    return not isinstance(client, LazyClient) or client._lazy_instance is not None
 
-# Initialize CoinGecko API client
-cg = CoinGeckoAPI()
 
 # Set up Redis client for caching
-redis_client = redis.Redis(
+redis_client = LazyClient(lambda: redis.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    decode_responses=True
+))
+
+# Asyncio Redis client for code running on the event loop
+async_redis_client = LazyClient(lambda: redis.asyncio.Redis(
     host=settings.REDIS_HOST,
     port=settings.REDIS_PORT,
     decode_responses=True
-)
+))
+
+# CoinGecko quota shared by all replicas
+coingecko_rate_limiter = LazyClient(lambda: RedisTokenBucket(
+    async_redis_client,
+    key="ratelimit:coingecko",
+    rate_per_minute=settings.COINGECKO_RATE_LIMIT_PER_MINUTE,
+    capacity=settings.COINGECKO_RATE_LIMIT_BURST
+))
+
+# Initialize CoinGecko API client (pooled connections, bounded concurrency, shared rate limit)
+cg = LazyClient(lambda: AsyncCoinGeckoClient(
+    base_url=settings.COINGECKO_API_BASE,
+    timeout=settings.COINGECKO_TIMEOUT,
+    max_concurrency=settings.COINGECKO_MAX_CONCURRENCY,
+    max_connections=settings.COINGECKO_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.COINGECKO_MAX_KEEPALIVE,
+    rate_limiter=coingecko_rate_limiter,
+    max_retries=settings.COINGECKO_MAX_RETRIES,
+    backoff_base=settings.COINGECKO_BACKOFF_BASE,
+    backoff_max=settings.COINGECKO_BACKOFF_MAX
+))
+
+# Concurrent identical CoinGecko fetches (e.g. on a coins list cache miss) are made only once across the cluster
+coingecko_flights = LazyClient(lambda: SingleFlight(
+    async_redis_client,
+    prefix="singleflight:coingecko:",
+    lock_ttl=settings.SINGLE_FLIGHT_LOCK_SECONDS
+))
+
+# CoinGecko coins list, indexed by ID, symbol and name in Redis
+coin_catalog = LazyClient(lambda: CoinCatalog(async_redis_client, key="{catalog:coins}"))
+
+# Fan-out of live price changes to streaming clients of this process
+price_broadcaster = LazyClient(lambda: PriceBroadcaster(async_redis_client, settings.PRICE_STREAM_CHANNEL))
+
+# Only the holder of this lease runs scheduled jobs (one leader across all workers and replicas)
+scheduler_lease = LazyClient(lambda: RedisLease(
+    async_redis_client, key="scheduler:leader", ttl=settings.SCHEDULER_LEASE_SECONDS
+))
+
+# Held for the duration of a full price refresh so that refreshes never overlap
+refresh_lock = LazyClient(lambda: RedisLease(
+    async_redis_client, key="lock:refresh_prices", ttl=settings.REFRESH_LOCK_SECONDS
+))
+
+# Held on every coin a price refresh is fetching, so that overlapping refreshes (manual, leader or
+# shard refreshes across a change of the worker set) never fetch and write the same coin twice
+refresh_claims = LazyClient(lambda: RedisLeaseSet(
+    async_redis_client, prefix="lock:refresh_prices:{coins}:", ttl=settings.REFRESH_LOCK_SECONDS
+))
+
+# Live workers, used to shard scheduled refreshes when SCHEDULER_SHARDING is enabled
+worker_registry = LazyClient(lambda: WorkerRegistry(
+    async_redis_client, key="scheduler:workers", ttl=settings.SCHEDULER_LEASE_SECONDS
+))
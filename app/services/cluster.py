@@ -0,0 +1,210 @@
+import hashlib
+import os
+import socket
+import uuid
+from contextlib import asynccontextmanager
+
+# Identifies this process among all workers and replicas
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Takes the lease if it is free, or extends it if the caller already holds it
+ACQUIRE_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if not holder then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# Deletes the lease only if it is still held by the caller
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Takes (or extends, if the caller holds them) every free lease among KEYS, returns the 1-based indexes taken
+ACQUIRE_MANY_SCRIPT = """
+local acquired = {}
+for i, key in ipairs(KEYS) do
+    local holder = redis.call('GET', key)
+    if holder == ARGV[1] then
+        redis.call('PEXPIRE', key, ARGV[2])
+        acquired[#acquired + 1] = i
+    elseif not holder then
+        redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+        acquired[#acquired + 1] = i
+    end
+end
+return acquired
+"""
+
+# Deletes the leases among KEYS that are still held by the caller
+RELEASE_MANY_SCRIPT = """
+local released = 0
+for _, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        released = released + redis.call('DEL', key)
+    end
+end
+return released
+"""
+
+
+class RedisLease:
+    """
+    Time-limited exclusive lease shared by all processes through Redis.
+
+    Used both for leader election (the holder keeps extending the lease) and as a
+    lock around work that must not overlap. A holder that dies without releasing
+    the lease loses it once ``ttl`` expires.
+    """
+
+    def __init__(self, redis_client, key: str, ttl: float):
+        self.redis = redis_client
+        self.key = key
+        self.ttl_ms = max(1, int(ttl * 1000))
+        self._acquire = redis_client.register_script(ACQUIRE_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+
+    async def acquire(self, owner: str) -> bool:
+        """
+        Take the lease for ``owner``, or extend it if ``owner`` already holds it.
+        """
+        return bool(await self._acquire(keys=[self.key], args=[owner, self.ttl_ms]))
+
+    async def release(self, owner: str) -> bool:
+        """
+        Give up the lease if ``owner`` still holds it.
+        """
+        return bool(await self._release(keys=[self.key], args=[owner]))
+
+    @asynccontextmanager
+    async def hold(self, owner: str):
+        """
+        Hold the lease for the duration of the context; yields whether it was acquired.
+        """
+        acquired = await self.acquire(owner)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await self.release(owner)
+
+    async def holder(self) -> dict | None:
+        """
+        Return the current holder and the seconds left on the lease, or None if it is free.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            owner, ttl_ms = await pipe.get(self.key).pttl(self.key).execute()
+        if owner is None:
+            return None
+        return {"owner": owner, "expires_in": round(max(ttl_ms, 0) / 1000, 2)}
+
+
+class RedisLeaseSet:
+    """
+    Time-limited exclusive leases on many items, taken and released in one call.
+
+    Each item has its own lease key (``prefix`` followed by the item), so callers
+    working on overlapping batches only exclude each other on the items they share.
+    The prefix should contain a hash tag (``{...}``) so that all keys of a batch map
+    to the same Redis Cluster slot.
+    """
+
+    def __init__(self, redis_client, prefix: str, ttl: float):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl_ms = max(1, int(ttl * 1000))
+        self._acquire = redis_client.register_script(ACQUIRE_MANY_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_MANY_SCRIPT)
+
+    async def acquire(self, owner: str, items: list[str]) -> list[str]:
+        """
+        Take the leases of ``items`` that are free (or already held by ``owner``), returning those items.
+        """
+        if not items:
+            return []
+        indexes = await self._acquire(keys=[self.prefix + item for item in items], args=[owner, self.ttl_ms])
+        return [items[i - 1] for i in indexes]
+
+    async def release(self, owner: str, items: list[str]) -> int:
+        """
+        Give up the leases of ``items`` that ``owner`` still holds, returning how many were released.
+        """
+        if not items:
+            return 0
+        return await self._release(keys=[self.prefix + item for item in items], args=[owner])
+
+    @asynccontextmanager
+    async def hold(self, owner: str, items: list[str]):
+        """
+        Hold the free leases among ``items`` for the duration of the context; yields the items acquired.
+        """
+        acquired = await self.acquire(owner, items)
+        try:
+            yield acquired
+        finally:
+            await self.release(owner, acquired)
+
+
+class WorkerRegistry:
+    """
+    Set of live workers kept in a Redis sorted set scored by heartbeat expiry.
+
+    Workers that stop sending heartbeats drop out after ``ttl`` seconds.
+    """
+
+    def __init__(self, redis_client, key: str, ttl: float):
+        self.redis = redis_client
+        self.key = key
+        self.ttl = ttl
+
+    async def _now(self) -> float:
+        seconds, microseconds = await self.redis.time()
+        return seconds + microseconds / 1_000_000
+
+    async def heartbeat(self, worker_id: str):
+        """
+        Mark a worker as alive for another ``ttl`` seconds and drop expired workers.
+        """
+        now = await self._now()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            await pipe.zadd(self.key, {worker_id: now + self.ttl}).zremrangebyscore(self.key, "-inf", now).execute()
+
+    async def leave(self, worker_id: str):
+        """
+        Remove a worker, e.g. on shutdown, so its shard is reassigned right away.
+        """
+        await self.redis.zrem(self.key, worker_id)
+
+    async def live_workers(self) -> list[str]:
+        """
+        Return the IDs of all workers whose heartbeat has not expired, sorted.
+        """
+        return sorted(await self.redis.zrangebyscore(self.key, await self._now(), "+inf"))
+
+
+def shard_owner(key: str, workers: list[str]) -> str | None:
+    """
+    Pick the worker responsible for a key by rendezvous (highest random weight) hashing.
+
+    Every process computes the same owner from the same worker list, and when a worker
+    joins or leaves only the keys it owned (or will own) move.
+
+    Args:
+        key (str): The sharded key, e.g. a CoinGecko ID.
+        workers (list[str]): IDs of the live workers.
+
+    Returns:
+        str | None: The owning worker ID, or None if there are no workers.
+    """
+    if not workers:
+        return None
+    return max(workers, key=lambda worker: hashlib.blake2b(f"{worker}\0{key}".encode(), digest_size=8).digest())
@@ -0,0 +1,316 @@
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Fields written per HSET/HDEL command or script call when a catalog version is built
+WRITE_CHUNK = 1000
+
+# Hashes making up a catalog version
+INDEXES = ("ids", "symbols", "names")
+
+# Scripts reading a version take the pointer and the version's index keys in KEYS, and
+# the version they were built for in ARGV[1]. If the pointer has moved on meanwhile
+# they only return the current version (empty if the catalog is empty), so that the
+# caller retries with it.
+
+# Resolves one query (ARGV[2]) against a version: ID, then symbol, then name
+RESOLVE_SCRIPT = """
+local meta = redis.call('HMGET', KEYS[1], 'version', 'fetched_at')
+if meta[1] ~= ARGV[1] then
+    return {meta[1] or ''}
+end
+local record = redis.call('HGET', KEYS[2], ARGV[2])
+if record then
+    return {meta[1], meta[2], 'id', record}
+end
+local ids = redis.call('HGET', KEYS[3], ARGV[2])
+if ids then
+    return {meta[1], meta[2], 'symbol', ids}
+end
+local id = redis.call('HGET', KEYS[4], ARGV[2])
+if id then
+    return {meta[1], meta[2], 'name', id}
+end
+return {meta[1], meta[2], 'none', ''}
+"""
+
+# Returns the version followed by the records of several IDs (ARGV[2..])
+RECORDS_SCRIPT = """
+local version = redis.call('HGET', KEYS[1], 'version')
+if version ~= ARGV[1] then
+    return {version or ''}
+end
+local records = redis.call('HMGET', KEYS[2], unpack(ARGV, 2))
+table.insert(records, 1, version)
+return records
+"""
+
+# Writes the field/value pairs of ARGV into the hash KEYS[1] where they differ, returns the fields written
+WRITE_CHANGED_SCRIPT = """
+local changed = {}
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) ~= ARGV[i + 1] then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+        changed[#changed + 1] = ARGV[i]
+    end
+end
+return changed
+"""
+
+
+def build_indexes(coins: list[dict]) -> dict[str, dict[str, str]]:
+    """
+    Build the field indexes of a catalog version from a CoinGecko coins list.
+
+    Returns:
+        dict[str, dict[str, str]]: Index name -> hash fields: lowercase ID -> JSON
+        ``[id, symbol, name]``, lowercase symbol -> comma-separated IDs (in list order),
+        lowercase name -> ID (first match wins).
+    """
+    ids, symbols, names = {}, {}, {}
+    for coin in coins:
+        cg_id = coin["id"].lower()
+        if cg_id in ids:
+            continue
+        ids[cg_id] = json.dumps([coin["id"], coin["symbol"], coin["name"]], separators=(",", ":"))
+        symbol = coin["symbol"].lower()
+        symbols[symbol] = f"{symbols[symbol]},{coin['id']}" if symbol in symbols else coin["id"]
+        names.setdefault(coin["name"].lower(), coin["id"])
+    return {"ids": ids, "symbols": symbols, "names": names}
+
+
+def _record(raw: str) -> dict:
+    cg_id, symbol, name = json.loads(raw)
+    return {"id": cg_id, "symbol": symbol, "name": name}
+
+
+class CoinCatalog:
+    """
+    CoinGecko coins list stored in Redis as field indexes, so that a lookup moves a few small fields.
+
+    Every version of the catalog lives under its own key prefix, as hashes of
+    lowercase ID -> compact record, lowercase symbol -> IDs sharing it and lowercase
+    name -> ID. ``<key>`` itself is a hash pointing at the current version, with the
+    time it was fetched and its number of coins. ``key`` should be a hash tag
+    (``{...}``), so that all keys of the catalog map to the same Redis Cluster slot.
+
+    A refresh copies the keys of the current version inside Redis into the new
+    version, where a script writes only the fields that changed; the pointer then
+    moves to it in one transaction, so readers see either the old or the new
+    catalog. Superseded versions expire after ``retain`` seconds.
+
+    Readers address the keys of the version they last saw, and retry with the
+    current one if the pointer has moved on since. Lookups are counted per query:
+    a hit found a coin, a miss did not (including lookups in an empty catalog).
+    """
+
+    def __init__(self, redis_client, key: str, retain: int = 600):
+        self.redis = redis_client
+        self.key = key
+        self.retain = retain
+        self._version = None  # Last version seen by this process
+        self.hits = 0
+        self.misses = 0
+        self.empty_misses = 0
+        self._resolve = redis_client.register_script(RESOLVE_SCRIPT)
+        self._records = redis_client.register_script(RECORDS_SCRIPT)
+        self._write_changed = redis_client.register_script(WRITE_CHANGED_SCRIPT)
+
+    def _index_key(self, version: str, index: str) -> str:
+        return f"{self.key}:{version}:{index}"
+
+    async def _current_version(self) -> str | None:
+        self._version = await self.redis.hget(self.key, "version")
+        return self._version
+
+    async def changes(self, version: str) -> dict | None:
+        """
+        Return how a version differs from the one it was built from.
+
+        Returns:
+            dict | None: ``base`` (the previous version, None for a first build),
+            ``changed`` (IDs added or changed) and ``removed`` (IDs removed), or None if
+            the version has expired.
+        """
+        raw = await self.redis.get(self._index_key(version, "changes"))
+        return json.loads(raw) if raw is not None else None
+
+    async def current(self) -> dict | None:
+        """
+        Return the current version, its fetch time (epoch seconds) and size, or None if the catalog is empty.
+        """
+        meta = await self.redis.hgetall(self.key)
+        if not meta:
+            return None
+        self._version = meta["version"]
+        return {"version": meta["version"], "fetched_at": float(meta["fetched_at"]), "count": int(meta["count"])}
+
+    async def resolve_many(self, queries: list[str]) -> tuple[list[list[str]], dict | None]:
+        """
+        Resolve queries by exact match on ID, then symbol, then name, in one round trip.
+
+        Args:
+            queries (list[str]): Coin IDs, symbols or names (case-insensitive).
+
+        Returns:
+            tuple[list[list[str]], dict | None]: Per query no IDs, one ID or several IDs
+            sharing a symbol; and the version and fetch time of the catalog they were
+            resolved against, or None if the catalog is empty.
+        """
+        if not queries:
+            return [], None
+        version = self._version or await self._current_version()
+        while version is not None:
+            keys = [self.key, *(self._index_key(version, index) for index in INDEXES)]
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for query in queries:
+                    await self._resolve(keys=keys, args=[version, query.lower()], client=pipe)
+                replies = await pipe.execute()
+            # All replies come from the same transaction: they moved on together
+            if replies[0][0] == version:
+                break
+            version = self._version = replies[0][0] or None
+        if version is None:
+            self.misses += len(queries)
+            self.empty_misses += len(queries)
+            return [[] for _ in queries], None
+
+        meta = {"version": version, "fetched_at": float(replies[0][1])}
+        results = []
+        for _, _, kind, payload in replies:
+            if kind == "id":
+                results.append([json.loads(payload)[0]])
+            elif kind == "symbol":
+                results.append(payload.split(","))
+            elif kind == "name":
+                results.append([payload])
+            else:
+                results.append([])
+        found = sum(1 for matches in results if matches)
+        self.hits += found
+        self.misses += len(results) - found
+        return results, meta
+
+    async def records(self, cg_ids: list[str]) -> dict[str, dict]:
+        """
+        Return the ``id``, ``symbol`` and ``name`` of coins in the current version, keyed by lowercase ID.
+        """
+        records = {}
+        keys = [cg_id.lower() for cg_id in cg_ids]
+        if not keys:
+            return records
+        version = self._version or await self._current_version()
+        i = 0
+        while version is not None and i < len(keys):
+            chunk = keys[i:i + WRITE_CHUNK]
+            reply = await self._records(keys=[self.key, self._index_key(version, "ids")], args=[version, *chunk])
+            if reply[0] != version:
+                # The catalog moved on: read everything again from the current version
+                version = self._version = reply[0] or None
+                records, i = {}, 0
+                continue
+            for cg_id, raw in zip(chunk, reply[1:]):
+                if raw is not None:
+                    records[cg_id] = _record(raw)
+            i += WRITE_CHUNK
+        self.hits += len(records)
+        self.misses += len(keys) - len(records)
+        if version is None:
+            self.empty_misses += len(keys)
+        return records
+
+    def stats(self) -> dict:
+        """
+        Return the hit/miss counters of the lookups made by this process.
+
+        ``empty_misses`` are the misses of lookups made while the catalog was empty.
+        """
+        return {"hits": self.hits, "misses": self.misses, "empty_misses": self.empty_misses}
+
+    async def coins(self, version: str | None = None) -> list[dict]:
+        """
+        Return all coins of a version, by default the current one (unordered).
+        """
+        if version is None:
+            meta = await self.current()
+            if meta is None:
+                return []
+            version = meta["version"]
+        return [_record(raw) for raw in (await self.redis.hgetall(self._index_key(version, "ids"))).values()]
+
+    async def replace(self, coins: list[dict], fetched_at: float) -> dict:
+        """
+        Make ``coins`` the current catalog, writing only what changed since the current version.
+
+        Args:
+            coins (list[dict]): The CoinGecko coins list (``id``, ``symbol``, ``name``).
+            fetched_at (float): Epoch seconds at which the list was fetched.
+
+        Returns:
+            dict: The new current version, its fetch time and size.
+        """
+        indexes = build_indexes(coins)
+        previous = await self.current()
+        count = len(indexes["ids"])
+        version = uuid.uuid4().hex
+
+        # The new version starts as a server-side copy of the current one, updated by a script so that
+        # only the changed fields travel back; it expires unless it gets published
+        changes = {}
+        for index, fields in indexes.items():
+            key = self._index_key(version, index)
+            items = [part for item in fields.items() for part in item]
+            async with self.redis.pipeline(transaction=False) as pipe:
+                if previous:
+                    pipe.copy(self._index_key(previous["version"], index), key)
+                    for i in range(0, len(items), 2 * WRITE_CHUNK):
+                        await self._write_changed(keys=[key], args=items[i:i + 2 * WRITE_CHUNK], client=pipe)
+                else:
+                    # A first build has nothing to compare with
+                    for i in range(0, len(items), 2 * WRITE_CHUNK):
+                        pipe.hset(key, items=items[i:i + 2 * WRITE_CHUNK])
+                pipe.expire(key, self.retain)
+                pipe.hlen(key)
+                replies = await pipe.execute()
+            changed = [field for reply in replies[1:-2] for field in reply] if previous else list(fields)
+            # Fields of the current version that are gone, only looked for if there are any
+            removed = []
+            if replies[-1] > len(fields):
+                async for field, _ in self.redis.hscan_iter(key, count=WRITE_CHUNK):
+                    if field not in fields:
+                        removed.append(field)
+                for i in range(0, len(removed), WRITE_CHUNK):
+                    await self.redis.hdel(key, *removed[i:i + WRITE_CHUNK])
+            changes[index] = (changed, removed)
+
+        if previous and not any(changed or removed for changed, removed in changes.values()):
+            await self.redis.delete(*(self._index_key(version, index) for index in INDEXES))
+            await self.redis.hset(self.key, mapping={"fetched_at": fetched_at})
+            logger.info(f"Coin catalog unchanged, version {previous['version']} ({count} coins) confirmed")
+            return {**previous, "fetched_at": fetched_at}
+
+        # Lets readers holding the previous version (e.g. search indexes) catch up incrementally
+        diff = {
+            "base": previous["version"] if previous else None,
+            "changed": changes["ids"][0],
+            "removed": changes["ids"][1],
+        }
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._index_key(version, "changes"), json.dumps(diff))
+            for index in INDEXES:
+                pipe.persist(self._index_key(version, index))
+            if previous:
+                pipe.expire(self._index_key(previous["version"], "changes"), self.retain)
+                for index in INDEXES:
+                    pipe.expire(self._index_key(previous["version"], index), self.retain)
+            pipe.hset(self.key, mapping={"version": version, "fetched_at": fetched_at, "count": count})
+            await pipe.execute()
+        self._version = version
+
+        logger.info(
+            f"Coin catalog version {version}: {count} coins, "
+            f"{len(diff['changed'])} added or changed, {len(diff['removed'])} removed"
+        )
+        return {"version": version, "fetched_at": fetched_at, "count": count}
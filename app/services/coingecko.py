@@ -1,44 +1,247 @@
-import json
+import asyncio
 import logging
 import time
 
 from fastapi import HTTPException
 
 from app.core.settings import settings
-from .clients import cg, redis_client as r
+from .clients import cg, coin_catalog, coingecko_flights
+from .suggest_index import SuggestIndex
 
 logger = logging.getLogger(__name__)
 
+COINS_LIST_KEY = "coins_list"
 
-def get_cached_coins_list():
+# Seconds before a failed background refresh of the coins list is retried
+COINS_LIST_RETRY_SECONDS = 60
+
+# Seconds between checks whether the suggest index is behind the coin catalog
+SUGGEST_SYNC_SECONDS = 5
+
+_coins_list_refresh: asyncio.Task | None = None
+_coins_list_retry_at = 0.0
+
+_suggest_index = SuggestIndex()
+_suggest_lock = asyncio.Lock()
+_suggest_synced_at = 0.0
+
+
+async def load_catalog() -> dict:
     """
-    Retrieve the list of coins, either from Redis cache or Coingecko API.
+    Return the version of the coin catalog in Redis, fetching the coins list from Coingecko if it is empty.
 
-    Caches the coin list in Redis for subsequent requests to avoid repeated API calls.
+    A populated catalog is used whatever its age: once it is older than
+    REDIS_CACHE_TTL it is refreshed in the background. Only an empty catalog makes
+    the caller wait for Coingecko; concurrent callers, in this and in other
+    processes, share a single call.
 
     Returns:
-        list: A list of coins fetched from Coingecko or Redis cache.
+        dict: The catalog version, its fetch time (epoch seconds) and number of coins.
 
     Raises:
-        HTTPException: If fetching coins from Coingecko fails.
+        HTTPException: If the catalog is empty and fetching coins from Coingecko fails.
     """
-    cached = r.get("coins_list")
-    if cached:
-        logger.debug("Loaded coins list from Redis cache")
-        return json.loads(cached)
+    meta = await coin_catalog.current()
+    if meta is not None:
+        _revalidate_coins_list(meta["fetched_at"])
+        return meta
 
-    logger.info("Fetching coins list from Coingecko API")
     try:
-        coins = cg.get_coins_list()
-        r.set("coins_list", json.dumps(coins), ex=settings.REDIS_CACHE_TTL)
-        logger.info(f"Cached {len(coins)} coins to Redis")
-        return coins
-    except Exception as e:
+        return await coingecko_flights.do(COINS_LIST_KEY, _fetch_coins_list, load=_fresh_catalog)
+    except Exception:
         logger.exception("Failed to fetch coins list from Coingecko")
         raise HTTPException(status_code=502, detail="Failed to fetch coins list from external API")
 
 
-def resolve_to_id(query: str) -> str | None:
+async def _fetch_coins_list() -> dict:
+    """
+    Fetch the coins list from Coingecko and store it as the new catalog version.
+
+    The catalog does not expire, so that it can still be served while Coingecko is down.
+    """
+    logger.info("Fetching coins list from Coingecko API")
+    coins = await cg.get_coins_list()
+    return await coin_catalog.replace(coins, fetched_at=time.time())
+
+
+async def _fresh_catalog() -> dict | None:
+    """
+    Return the catalog version once another caller has stored a fresh one, else None.
+    """
+    meta = await coin_catalog.current()
+    if meta is None or time.time() - meta["fetched_at"] >= settings.REDIS_CACHE_TTL:
+        return None
+    return meta
+
+
+def _revalidate_coins_list(fetched_at: float):
+    """
+    Start a background refresh of the coins list if it is older than REDIS_CACHE_TTL.
+
+    At most one refresh runs per process, and a failed one is retried after
+    COINS_LIST_RETRY_SECONDS; callers keep using the current catalog meanwhile.
+    """
+    global _coins_list_refresh
+
+    age = time.time() - fetched_at
+    if age < settings.REDIS_CACHE_TTL:
+        return
+    if _coins_list_refresh is not None and not _coins_list_refresh.done():
+        return
+    if time.monotonic() < _coins_list_retry_at:
+        return
+    logger.info(f"Coins list is {age:.0f}s old, refreshing it in the background")
+    _coins_list_refresh = asyncio.create_task(_refresh_coins_list())
+
+
+async def _refresh_coins_list():
+    global _coins_list_retry_at
+
+    try:
+        await coingecko_flights.do(COINS_LIST_KEY, _fetch_coins_list, load=_fresh_catalog)
+    except Exception:
+        _coins_list_retry_at = time.monotonic() + COINS_LIST_RETRY_SECONDS
+        logger.exception("Background refresh of the coins list failed, serving the current catalog")
+
+
+async def get_cached_coins_list():
+    """
+    Retrieve the list of coins from the coin catalog, fetching it from Coingecko if it is empty.
+
+    Returns:
+        list: A list of coins (``id``, ``symbol``, ``name``), unordered.
+
+    Raises:
+        HTTPException: If the catalog is empty and fetching coins from Coingecko fails.
+    """
+    await load_catalog()
+    return await coin_catalog.coins()
+
+
+async def coins_list_status() -> dict:
+    """
+    Report the version and age of the coin catalog.
+
+    Returns:
+        dict: Version, size and age in seconds of the catalog, whether it is past
+        COINS_LIST_HARD_TTL (``stale``) and whether this process is refreshing it.
+    """
+    meta = await coin_catalog.current()
+    age = time.time() - meta["fetched_at"] if meta is not None else None
+    return {
+        "version": meta["version"] if meta is not None else None,
+        "count": meta["count"] if meta is not None else 0,
+        "age_seconds": round(age, 1) if age is not None else None,
+        "stale": age is not None and age >= settings.COINS_LIST_HARD_TTL,
+        "refreshing": _coins_list_refresh is not None and not _coins_list_refresh.done(),
+    }
+
+
+async def resolve_many(queries: list[str]) -> list[list[str]]:
+    """
+    Resolve queries (coin symbols, names or IDs) to CoinGecko IDs with one catalog lookup.
+
+    Args:
+        queries (list[str]): The queries to resolve.
+
+    Returns:
+        list[list[str]]: Per query no IDs, one ID, or several IDs for a symbol shared by multiple coins.
+
+    Raises:
+        HTTPException: If the catalog is empty and fetching coins from Coingecko fails.
+    """
+    matches, meta = await coin_catalog.resolve_many(queries)
+    if meta is None:
+        await load_catalog()
+        matches, meta = await coin_catalog.resolve_many(queries)
+    if meta is not None:
+        _revalidate_coins_list(meta["fetched_at"])
+    return matches
+
+
+async def get_coins(cg_ids: list[str]) -> dict[str, dict]:
+    """
+    Return the catalog entries (``id``, ``symbol``, ``name``) of CoinGecko IDs, keyed by lowercase ID.
+
+    IDs missing from the catalog are left out.
+    """
+    return await coin_catalog.records(cg_ids)
+
+
+async def describe_coins(cg_ids: list[str]) -> list[str]:
+    """
+    Return human-readable "id (name)" labels for CoinGecko IDs.
+    """
+    coins = await get_coins(cg_ids)
+    return [f"{cg_id} ({coins[cg_id.lower()]['name']})" if cg_id.lower() in coins else cg_id for cg_id in cg_ids]
+
+
+async def suggest_coins(query: str, limit: int = 10) -> list[dict]:
+    """
+    Return the coins best matching a partial symbol, name or ID, for type-ahead.
+
+    Suggestions come from an in-memory index of the whole catalog in this process,
+    brought up to date with the catalog every SUGGEST_SYNC_SECONDS.
+
+    Args:
+        query (str): What the user typed so far.
+        limit (int): Maximum number of suggestions.
+
+    Returns:
+        list[dict]: Coins (``id``, ``symbol``, ``name``), best match first.
+
+    Raises:
+        HTTPException: If the catalog is empty and fetching coins from Coingecko fails.
+    """
+    if not _suggest_index.version or time.monotonic() - _suggest_synced_at >= SUGGEST_SYNC_SECONDS:
+        await _sync_suggest_index()
+    return _suggest_index.suggest(query, limit)
+
+
+async def warm_up():
+    """
+    Load the coin catalog, fetching it from Coingecko if Redis has none, and build the suggest index of this process.
+
+    Raises:
+        HTTPException: If the catalog is empty and fetching coins from Coingecko fails.
+    """
+    await _sync_suggest_index()
+
+
+async def _sync_suggest_index():
+    """
+    Bring the suggest index to the current catalog version.
+
+    If the catalog moved on by one version, only the coins in its diff are re-indexed;
+    otherwise (first use, or several versions behind) the index is rebuilt.
+    """
+    global _suggest_synced_at
+
+    async with _suggest_lock:
+        if _suggest_index.version and time.monotonic() - _suggest_synced_at < SUGGEST_SYNC_SECONDS:
+            return
+        meta = await load_catalog()
+        version = meta["version"]
+        if version != _suggest_index.version:
+            changes = await coin_catalog.changes(version)
+            if _suggest_index.version and changes and changes["base"] == _suggest_index.version:
+                changed = await coin_catalog.records(changes["changed"])
+                _suggest_index.apply(list(changed.values()), changes["removed"], version)
+                logger.info(
+                    f"Updated suggest index to version {version}: "
+                    f"{len(changed)} coins re-indexed, {len(changes['removed'])} removed"
+                )
+            else:
+                start = time.perf_counter()
+                _suggest_index.rebuild(await coin_catalog.coins(version), version)
+                logger.info(
+                    f"Built suggest index for {len(_suggest_index)} coins (version {version}) "
+                    f"in {time.perf_counter() - start:.3f}s"
+                )
+        _suggest_synced_at = time.monotonic()
+
+
+async def resolve_to_id(query: str) -> str | None:
     """
     Resolve a query (coin symbol, name, or ID) to a CoinGecko ID.
 
@@ -53,20 +256,11 @@ def resolve_to_id(query: str) -> str | None:
     Raises:
         HTTPException: If there are multiple matches for a symbol or no match found.
     """
-    query_lower = query.lower()
-    coins = get_cached_coins_list()
-
-    # 1. Exact match on CoinGecko ID
-    for coin in coins:
-        if coin["id"].lower() == query_lower:
-            logger.debug(f"Resolved '{query}' as exact Coingecko ID")
-            return coin["id"]
+    matches = (await resolve_many([query]))[0]
 
-    # 2. Exact match on symbol
-    matches = [coin for coin in coins if coin["symbol"].lower() == query_lower]
     if len(matches) == 1:
-        logger.debug(f"Resolved '{query}' to ID via symbol match: {matches[0]['id']}")
-        return matches[0]["id"]
+        logger.debug(f"Resolved '{query}' to ID: {matches[0]}")
+        return matches[0]
     elif len(matches) > 1:
         logger.warning(f"Ambiguous symbol '{query}': multiple matches")
         raise HTTPException(
@@ -74,21 +268,15 @@ def resolve_to_id(query: str) -> str | None:
             detail={
                 "error": f"Symbol '{query}' is ambiguous.",
                 "message": "Multiple coins found with this symbol. Please use full coin ID.",
-                "options": [f"{coin['id']} ({coin['name']})" for coin in matches]
+                "options": await describe_coins(matches)
             }
         )
 
-    # 3. Exact match on name
-    for coin in coins:
-        if coin["name"].lower() == query_lower:
-            logger.debug(f"Resolved '{query}' to ID via name match: {coin['id']}")
-            return coin["id"]
-
     logger.warning(f"Failed to resolve '{query}' to any known coin")
     return None
 
 
-def fetch_crypto_data(query: str):
+async def fetch_crypto_data(query: str):
     """
     Fetch market data for a cryptocurrency from CoinGecko.
 
@@ -98,22 +286,81 @@ def fetch_crypto_data(query: str):
     Returns:
         dict | None: A dictionary containing the coin's market data or None if not found.
     """
-    start = time.time()
-    coin_id = resolve_to_id(query)
-    duration = round(time.time() - start, 2)
-    logger.info(f"Coingecko API responded in {duration}s for {coin_id}")
+    start = time.perf_counter()
+    coin_id = await resolve_to_id(query)
+    logger.info(f"Resolved '{query}' to {coin_id} in {time.perf_counter() - start:.3f}s")
     if not coin_id:
         logger.warning(f"Coin '{query}' not found in Coingecko")
         return None
     try:
-        data = cg.get_coin_by_id(id=coin_id)
-        logger.info(f"Fetched market data for coin '{coin_id}'")
-        return {
-            "id": data["id"],
-            "name": data["name"],
-            "symbol": data["symbol"],
-            "price": data["market_data"]["current_price"]["usd"]
-        }
+        start = time.perf_counter()
+        # Users adding the same coin at the same time share one Coingecko call
+        data = await coingecko_flights.do(f"coins:{coin_id}", lambda: _fetch_coin(coin_id))
+        logger.info(f"Fetched market data for coin '{coin_id}' in {time.perf_counter() - start:.3f}s")
+        return data
     except Exception:
         logger.exception(f"Failed to fetch market data for coin '{coin_id}'")
         return None
+
+
+async def _fetch_coin(coin_id: str) -> dict:
+    """
+    Fetch a coin from Coingecko, keeping only the fields stored for a crypto.
+    """
+    data = await cg.get_coin_by_id(id=coin_id)
+    return {
+        "id": data["id"],
+        "name": data["name"],
+        "symbol": data["symbol"],
+        "price": data["market_data"]["current_price"]["usd"]
+    }
+
+
+async def fetch_prices(cg_ids: list[str], partial: bool = True) -> dict[str, float]:
+    """
+    Fetch current USD prices for many coins using batched CoinGecko simple-price calls.
+
+    The IDs are split into chunks of ``PRICE_BATCH_SIZE`` and each chunk is requested
+    with a single call; chunks are requested concurrently. A failed chunk is logged
+    and, with ``partial``, skipped so the rest of the refresh can still go through.
+
+    Args:
+        cg_ids (list[str]): CoinGecko IDs that are already resolved (e.g. stored ``cg_id`` values).
+        partial (bool): Return the prices of the chunks that succeeded if others failed.
+
+    Returns:
+        dict[str, float]: A mapping of CoinGecko ID to its current USD price. Coins
+        Coingecko has no USD price for are left out.
+
+    Raises:
+        HTTPException: 502 if a chunk failed and ``partial`` is False.
+    """
+    batch_size = max(1, settings.PRICE_BATCH_SIZE)
+    chunks = [cg_ids[i:i + batch_size] for i in range(0, len(cg_ids), batch_size)]
+    results = await asyncio.gather(*(_fetch_price_chunk(chunk) for chunk in chunks))
+
+    failed = sum(chunk_prices is None for chunk_prices in results)
+    if failed and not partial:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to fetch prices from external API for {failed} of {len(chunks)} batches, please retry"
+        )
+    prices = {}
+    for chunk_prices in results:
+        prices.update(chunk_prices or {})
+    return prices
+
+
+async def _fetch_price_chunk(chunk: list[str]) -> dict[str, float] | None:
+    """
+    Fetch USD prices for one chunk of CoinGecko IDs, returning None on failure.
+    """
+    start = time.time()
+    try:
+        data = await cg.get_price(ids=chunk, vs_currencies="usd")
+    except Exception:
+        logger.exception(f"Failed to fetch prices for a batch of {len(chunk)} coins")
+        return None
+    duration = round(time.time() - start, 2)
+    logger.info(f"Fetched prices for {len(chunk)} coins in {duration}s")
+    return {cg_id: quote["usd"] for cg_id, quote in data.items() if quote.get("usd") is not None}
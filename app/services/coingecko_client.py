@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from app.core.metrics import UPSTREAM_REQUEST_SECONDS
+from app.services.rate_limit import RedisTokenBucket
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 503}
+
+
+class AsyncCoinGeckoClient:
+    """
+    Asyncio-based CoinGecko API client.
+
+    Requests share one keep-alive connection pool, every request has a timeout and
+    at most ``max_concurrency`` requests are in flight at the same time. The
+    underlying ``httpx.AsyncClient`` is created lazily on first use so that it is
+    bound to the running event loop.
+
+    When a ``rate_limiter`` is given, every request first takes a token from it.
+    Throttled responses (429/503) pause the limiter for ``Retry-After`` seconds and
+    are retried with jittered exponential backoff up to ``max_retries`` times.
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            timeout: float,
+            max_concurrency: int,
+            max_connections: int,
+            max_keepalive_connections: int,
+            rate_limiter: RedisTokenBucket | None = None,
+            max_retries: int = 3,
+            backoff_base: float = 1.0,
+            backoff_max: float = 60.0
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                headers={"Accept": "application/json"}
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def _get(self, path: str, params: dict | None = None, endpoint: str | None = None):
+        """
+        Perform a GET request against the CoinGecko API and return the decoded JSON body.
+
+        The latency of every attempt is recorded under ``endpoint`` (the path template,
+        defaults to ``path``).
+
+        Raises:
+            httpx.HTTPError: If the request fails, times out or returns an error status.
+        """
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            async with self._semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, params=params)
+                except httpx.HTTPError as e:
+                    UPSTREAM_REQUEST_SECONDS.labels(endpoint or path, type(e).__name__).observe(
+                        time.perf_counter() - started
+                    )
+                    raise
+            UPSTREAM_REQUEST_SECONDS.labels(endpoint or path, response.status_code).observe(
+                time.perf_counter() - started
+            )
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                break
+
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            backoff = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            delay = min(self.backoff_max, retry_after or 0) + random.uniform(0, backoff)
+            if self.rate_limiter:
+                await self.rate_limiter.pause(delay)
+            logger.warning(
+                f"CoinGecko throttled {path} with {response.status_code}, "
+                f"retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})"
+            )
+            await asyncio.sleep(delay)
+
+        response.raise_for_status()
+        return response.json()
+
+    async def get_coins_list(self) -> list[dict]:
+        """
+        Return the full list of supported coins (id, symbol, name).
+        """
+        return await self._get("/coins/list")
+
+    async def get_coin_by_id(self, id: str) -> dict:
+        """
+        Return the full coin data, including market data, for a CoinGecko ID.
+        """
+        return await self._get(f"/coins/{id}", endpoint="/coins/{id}", params={
+            "localization": "false",
+            "tickers": "false",
+            "community_data": "false",
+            "developer_data": "false"
+        })
+
+    async def get_price(self, ids: list[str], vs_currencies: str) -> dict:
+        """
+        Return current prices for several coins in one simple-price request.
+        """
+        return await self._get("/simple/price", params={
+            "ids": ",".join(ids),
+            "vs_currencies": vs_currencies
+        })
+
+    async def aclose(self):
+        """
+        Close the connection pool.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a ``Retry-After`` header given either in seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -1,8 +1,33 @@
+import base64
+import json
+import logging
+import math
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import REFRESH_COINS, REFRESH_SECONDS
+from app.core.settings import settings
+from app.db import crud, crud_async, models
+from app.services import alerts, coingecko, refresh_policy
+from app.services.clients import price_broadcaster, refresh_claims, refresh_lock
+from app.services.cluster import WORKER_ID
+from app.services.http_cache import bump_data_version
 
-from app.db import crud, models
-from app.services import coingecko
+logger = logging.getLogger(__name__)
+
+# Supported history bucket sizes and the default range returned for each of them
+HISTORY_INTERVALS = {
+    "1m": (60, timedelta(days=1)),
+    "1h": (3600, timedelta(days=7)),
+    "1d": (86400, timedelta(days=365)),
+}
 
 
 def list_cryptos(db: Session):
@@ -18,10 +43,114 @@ def list_cryptos(db: Session):
     return crud.get_all_cryptos(db)
 
 
-def create_crypto_from_query(db: Session, query: str) -> models.Crypto:
+async def _read(db: Session | AsyncSession, operation: str, *args, **kwargs):
+    """
+    Run a read function of ``crud`` on the given session.
+
+    Async sessions use the counterpart from ``crud_async``; sync sessions run the
+    ``crud`` function in the threadpool so that the event loop is never blocked.
+    """
+    if isinstance(db, AsyncSession):
+        return await getattr(crud_async, operation)(db, *args, **kwargs)
+    return await run_in_threadpool(getattr(crud, operation), db, *args, **kwargs)
+
+
+async def list_cryptos_page(db: Session | AsyncSession, limit: int, cursor: str | None = None, sort: str = "id",
+                            order: str = "asc", rows: bool = False, **filters) -> dict:
+    """
+    Retrieve one page of cryptocurrencies using keyset pagination.
+
+    Args:
+        db (Session | AsyncSession): The database session.
+        limit (int): Page size; capped at ``PAGE_SIZE_MAX``.
+        cursor (str | None): The ``next_cursor`` token of the previous page.
+        sort (str): Name of the sort column.
+        order (str): "asc" or "desc".
+        rows (bool): Return plain column rows instead of ORM objects.
+        **filters: Filters passed on to ``crud.get_cryptos_page`` (search, symbol, name_prefix, min_price, max_price).
+
+    Returns:
+        dict: The page as ``{"items": [...], "next_cursor": ...}``.
+    """
+    limit = max(1, min(limit, settings.PAGE_SIZE_MAX))
+    after = _decode_cursor(cursor, sort, order) if cursor else None
+    items = await _read(
+        db, "get_cryptos_page", limit + 1, sort=sort, descending=order == "desc", after=after, rows=rows, **filters
+    )
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = _encode_cursor(sort, order, getattr(last, sort), last.id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _encode_cursor(sort: str, order: str, value, last_id: int) -> str:
+    """
+    Encode the position after a row as an opaque, URL-safe cursor token.
+    """
+    payload = json.dumps([sort, order, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> tuple:
+    """
+    Decode a cursor token into a ``(sort value, id)`` pair, validating it against the current sort.
+
+    The ID must be an integer and the sort value of the type of the sort column, or
+    null for a nullable column, so that a forged cursor cannot reach the query.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort or cursor_order != order:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+    if not _is_cursor_value(last_id, int, nullable=False) or not _is_cursor_value(value, *_cursor_type(sort)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
+
+def _cursor_type(sort: str) -> tuple[type, bool]:
+    column = crud.SORT_COLUMNS[sort]
+    return column.type.python_type, column.nullable and not column.primary_key
+
+
+def _is_cursor_value(value, python_type: type, nullable: bool) -> bool:
+    if value is None:
+        return nullable
+    if isinstance(value, bool):
+        return False
+    if python_type is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, python_type)
+
+
+async def get_crypto_row_by_id(db: Session | AsyncSession, cg_id: str):
+    """
+    Retrieve a cryptocurrency as a plain column row by its CoinGecko ID.
+
+    Args:
+        db (Session | AsyncSession): The database session.
+        cg_id (str): The CoinGecko ID of the cryptocurrency.
+
+    Returns:
+        Row: The requested crypto row.
+    """
+    row = await _read(db, "get_crypto_row_by_id", cg_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Crypto not found")
+    return row
+
+
+async def create_crypto_from_query(db: Session, query: str) -> models.Crypto:
     """
     Create a new crypto record based on a query (symbol or name).
 
+    The CoinGecko lookup is awaited on the event loop; database work runs in the threadpool.
+
     Args:
         db (Session): The database session.
         query (str): The symbol or name of the cryptocurrency.
@@ -29,20 +158,113 @@ def create_crypto_from_query(db: Session, query: str) -> models.Crypto:
     Returns:
         models.Crypto: The created crypto record.
     """
-    data = coingecko.fetch_crypto_data(query)
+    data = await coingecko.fetch_crypto_data(query)
     if not data:
         raise HTTPException(status_code=404, detail=f"Symbol or name '{query}' not found on Coingecko")
+    return await run_in_threadpool(_store_crypto, db, data)
 
+
+def _store_crypto(db: Session, data: dict) -> models.Crypto:
+    """
+    Store fetched CoinGecko data as a new crypto record, rejecting duplicates.
+    """
     cg_id = data["id"].lower()
     if crud.get_crypto_by_id(db, cg_id):
         raise HTTPException(status_code=400, detail=f"Crypto '{cg_id}' already exists")
 
-    return crud.create_crypto(db, models.Crypto(
+    crypto = crud.create_crypto(db, models.Crypto(
         cg_id=cg_id,
         symbol=data["symbol"].lower(),
         name=data["name"],
         price=data["price"]
     ))
+    bump_data_version()
+    return crypto
+
+
+async def bulk_create_cryptos(db: Session, queries: list[str]) -> list[dict]:
+    """
+    Create many crypto records at once from symbols, names or CoinGecko IDs.
+
+    All queries are resolved with one lookup in the coin catalog, existing coins are
+    detected with one IN query, prices come from batched simple-price calls and the
+    new records are inserted in a single statement.
+
+    Args:
+        db (Session): The database session.
+        queries (list[str]): Symbols, names or CoinGecko IDs to add.
+
+    Returns:
+        list[dict]: One result per query with its status ("created", "duplicate",
+        "ambiguous", "not_found", or "unavailable" for a coin Coingecko has no
+        price for) and the resolved CoinGecko ID.
+
+    Raises:
+        HTTPException: 502 if fetching the prices from Coingecko failed; nothing is created.
+    """
+    if len(queries) > settings.BULK_CREATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BULK_CREATE_MAX_ITEMS} items can be created at once"
+        )
+
+    if not queries:
+        return []
+
+    queries = [query.strip() for query in queries]
+    all_matches = await coingecko.resolve_many(queries)
+    ambiguous = {cg_id for matches in all_matches if len(matches) > 1 for cg_id in matches}
+    labels = dict(zip(ambiguous, await coingecko.describe_coins(list(ambiguous)))) if ambiguous else {}
+    results = []
+    resolved = {}  # cg_id -> result of the first query resolving to it
+    for query, matches in zip(queries, all_matches):
+        if not matches:
+            results.append({"query": query, "status": "not_found"})
+        elif len(matches) > 1:
+            results.append({
+                "query": query,
+                "status": "ambiguous",
+                "options": [labels[cg_id] for cg_id in matches]
+            })
+        else:
+            cg_id = matches[0].lower()
+            result = {"query": query, "status": "duplicate", "cg_id": cg_id}
+            resolved.setdefault(cg_id, result)
+            results.append(result)
+
+    existing = await run_in_threadpool(crud.get_existing_cg_ids, db, list(resolved))
+    new_ids = [cg_id for cg_id in resolved if cg_id not in existing]
+    prices = await coingecko.fetch_prices(new_ids, partial=False)
+
+    coins = await coingecko.get_coins(new_ids)
+
+    rows = []
+    for cg_id in new_ids:
+        coin = coins.get(cg_id)
+        if coin is None:
+            resolved[cg_id]["status"] = "not_found"
+            continue
+        if prices.get(cg_id) is None:
+            resolved[cg_id]["status"] = "unavailable"
+            continue
+        rows.append({
+            "cg_id": cg_id,
+            "symbol": coin["symbol"].lower(),
+            "name": coin["name"],
+            "price": prices[cg_id]
+        })
+        resolved[cg_id]["status"] = "created"
+
+    try:
+        await run_in_threadpool(crud.create_cryptos, db, rows)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Some cryptos were created concurrently, please retry")
+    if rows:
+        bump_data_version()
+
+    logger.info(f"Bulk created {len(rows)} of {len(queries)} requested cryptos")
+    return results
 
 
 def delete_crypto(db: Session, cg_id: str):
@@ -57,20 +279,23 @@ def delete_crypto(db: Session, cg_id: str):
     if not crypto:
         raise HTTPException(status_code=404, detail="Crypto not found")
     crud.delete_crypto(db, cg_id)
+    bump_data_version()
+    # Its alert rules were deleted along with it
+    alerts.bump_rules_version()
 
 
-def get_crypto_by_id(db: Session, cg_id: str):
+async def get_crypto_by_id(db: Session | AsyncSession, cg_id: str):
     """
     Retrieve a cryptocurrency record by its CoinGecko ID.
 
     Args:
-        db (Session): The database session.
+        db (Session | AsyncSession): The database session.
         cg_id (str): The CoinGecko ID of the cryptocurrency.
 
     Returns:
         models.Crypto: The requested crypto record.
     """
-    crypto = crud.get_crypto_by_id(db, cg_id.lower())
+    crypto = await _read(db, "get_crypto_by_id", cg_id.lower())
     if not crypto:
         raise HTTPException(status_code=404, detail="Crypto not found")
     return crypto
@@ -91,6 +316,7 @@ def update_crypto_fields(db: Session, cg_id: str, fields: dict):
     updated = crud.update_crypto(db, cg_id.lower(), fields)
     if not updated:
         raise HTTPException(status_code=404, detail="Crypto not found")
+    bump_data_version()
     return updated
 
 
@@ -106,4 +332,215 @@ def update_crypto_price(db: Session, crypto, new_price: float):
     Returns:
         models.Crypto: The updated crypto record.
     """
-    return crud.update_crypto_price(db, crypto, new_price)
+    updated = crud.update_crypto_price(db, crypto, new_price)
+    bump_data_version()
+    return updated
+
+
+async def refresh_prices(db: Session, owns: Callable[[str], bool] | None = None,
+                         budget: int | None = None) -> list[dict]:
+    """
+    Refresh the prices of stored cryptocurrencies with batched CoinGecko calls.
+
+    Shared by the scheduled job and the manual update endpoint. Every coin is leased
+    while its price is fetched and written, and coins leased by an overlapping refresh
+    are skipped, so that sharded, leader and manual refreshes never update the same
+    coin at the same time. All new prices are written in one transaction; coins whose
+    price moved by more than PRICE_CHANGE_EPSILON are returned, published as a delta
+    to the live price stream and checked against the price alert rules. Every
+    refreshed coin gets its next due time from how recently it was read and how
+    volatile it is.
+
+    Args:
+        db (Session): The database session.
+        owns (Callable[[str], bool] | None): Restricts the refresh to the CoinGecko IDs
+            it accepts (the shard of this worker); all cryptos are refreshed if omitted.
+        budget (int | None): If given, only the most urgent of the cryptos due for a
+            refresh are refreshed, at most this many; otherwise all of them.
+
+    Returns:
+        list[dict]: The cryptos whose price changed, as ``{"cg_id": ..., "new_price": ..., "old_price": ...}`` items.
+    """
+    mode = "full" if budget is None else "due"
+    with REFRESH_SECONDS.labels(mode).time():
+        refreshed, changed = await _refresh_prices(db, owns, budget)
+    REFRESH_COINS.labels(mode).observe(refreshed)
+    return changed
+
+
+async def _refresh_prices(db: Session, owns: Callable[[str], bool] | None,
+                          budget: int | None) -> tuple[int, list[dict]]:
+    """
+    Select the cryptos to refresh, fetch their prices and apply them (see ``refresh_prices``).
+
+    Returns:
+        tuple[int, list[dict]]: The number of refreshed cryptos and the changed ones.
+    """
+    now = datetime.utcnow()
+    if budget is None:
+        cryptos = await run_in_threadpool(crud.get_all_cryptos, db)
+    else:
+        cryptos = await run_in_threadpool(crud.get_due_cryptos, db, now)
+    if owns is not None:
+        cryptos = [crypto for crypto in cryptos if owns(crypto.cg_id)]
+    read_times = await refresh_policy.get_read_times()
+    if budget is not None:
+        cryptos = refresh_policy.pick_due(cryptos, read_times, now, budget)
+    if not cryptos:
+        return 0, []
+
+    # Coins being refreshed by an overlapping refresh (in this or another process) are left to it
+    owner = f"{WORKER_ID}:{uuid.uuid4().hex[:8]}"
+    async with refresh_claims.hold(owner, [crypto.cg_id for crypto in cryptos]) as claimed:
+        if len(claimed) < len(cryptos):
+            logger.info(f"Skipping {len(cryptos) - len(claimed)} cryptos that another refresh is updating")
+            claimed = set(claimed)
+            cryptos = [crypto for crypto in cryptos if crypto.cg_id in claimed]
+        if not cryptos:
+            return 0, []
+        prices = await coingecko.fetch_prices([crypto.cg_id for crypto in cryptos])
+        refreshed, changed = await run_in_threadpool(_apply_prices, db, cryptos, prices, read_times)
+    logger.info(f"Updated prices for {refreshed} of {len(cryptos)} cryptos, {len(changed)} changed")
+
+    await price_broadcaster.publish(changed)
+    try:
+        await alerts.evaluate(db, changed)
+    except Exception:
+        logger.exception("Error while evaluating price alerts")
+    return refreshed, changed
+
+
+async def refresh_prices_exclusive(db: Session, budget: int | None = None) -> list[dict] | None:
+    """
+    Refresh prices unless a refresh is already running anywhere in the cluster.
+
+    Args:
+        db (Session): The database session.
+        budget (int | None): Maximum number of due cryptos to refresh; all cryptos if omitted.
+
+    Returns:
+        list[dict] | None: The cryptos whose price changed, or None if another refresh holds the lock.
+    """
+    # Unique per run, so that two refreshes in the same process also exclude each other
+    owner = f"{WORKER_ID}:{uuid.uuid4().hex[:8]}"
+    async with refresh_lock.hold(owner) as acquired:
+        if not acquired:
+            logger.info("Skipping price refresh, another refresh is still running")
+            return None
+        return await refresh_prices(db, budget=budget)
+
+
+def _apply_prices(db: Session, cryptos: list[models.Crypto], prices: dict[str, float],
+                  read_times: dict[str, float]) -> tuple[int, list[dict]]:
+    """
+    Write fetched prices, refresh schedules and price history points in one transaction.
+
+    Returns:
+        tuple[int, list[dict]]: The number of cryptos with a price and the ones whose price changed.
+    """
+    now = datetime.utcnow()
+    now_ts = now.replace(tzinfo=timezone.utc).timestamp()
+    updates = []
+    points = []
+    unpriced = []
+    for crypto in cryptos:
+        price = prices.get(crypto.cg_id)
+        if not price:
+            unpriced.append(crypto.id)
+            continue
+        elapsed = (now - crypto.last_updated).total_seconds() if crypto.last_updated else None
+        volatility = refresh_policy.update_volatility(crypto.volatility or 0.0, crypto.price, price, elapsed)
+        hot = refresh_policy.hotness(read_times.get(crypto.cg_id), now_ts)
+        updates.append({
+            "id": crypto.id,
+            "cg_id": crypto.cg_id,
+            "old_price": crypto.price,
+            "price": price,
+            "last_updated": now,
+            "next_due": now + timedelta(seconds=refresh_policy.refresh_interval(hot, volatility)),
+            "volatility": volatility,
+        })
+        points.append({"crypto_id": crypto.id, "timestamp": now, "price": price})
+
+    # Coins CoinGecko has no price for move to the slowest cadence instead of taking up the budget
+    next_due = now + timedelta(minutes=settings.UPDATE_INTERVAL_MINUTES)
+    changed = crud.update_crypto_prices(
+        db, updates, points, epsilon=settings.PRICE_CHANGE_EPSILON,
+        postponed=[{"id": crypto_id, "next_due": next_due} for crypto_id in unpriced]
+    )
+    if changed:
+        bump_data_version()
+    return len(updates), changed
+
+
+async def get_price_history(db: Session | AsyncSession, cg_id: str, interval: str,
+                            start: datetime | None = None, end: datetime | None = None) -> list[dict]:
+    """
+    Retrieve the price history of a cryptocurrency downsampled into OHLC buckets.
+
+    Args:
+        db (Session | AsyncSession): The database session.
+        cg_id (str): The CoinGecko ID of the cryptocurrency.
+        interval (str): Bucket size, one of ``HISTORY_INTERVALS``.
+        start (datetime | None): UTC start of the range; defaults to a window depending on the interval.
+        end (datetime | None): UTC end of the range; defaults to now.
+
+    Returns:
+        list[dict]: OHLC buckets ordered by time.
+
+    Raises:
+        HTTPException: 400 if ``start`` is after ``end`` or the range spans more than
+        PRICE_HISTORY_MAX_BUCKETS buckets of the interval.
+    """
+    bucket_seconds, default_window = HISTORY_INTERVALS[interval]
+    end = _to_naive_utc(end) if end else datetime.utcnow()
+    start = _to_naive_utc(start) if start else end - default_window
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    buckets = math.ceil((end - start).total_seconds() / bucket_seconds)
+    if buckets > settings.PRICE_HISTORY_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The range spans {buckets} {interval} buckets, at most {settings.PRICE_HISTORY_MAX_BUCKETS} "
+                   f"are allowed; use a coarser interval or a shorter range"
+        )
+    crypto = await get_crypto_by_id(db, cg_id)
+    rows = await _read(db, "get_price_candles", crypto.id, bucket_seconds, start, end)
+    return [{
+        "timestamp": datetime.utcfromtimestamp(int(row.bucket)),
+        "open": row.open,
+        "high": row.high,
+        "low": row.low,
+        "close": row.close,
+        "points": row.points
+    } for row in rows]
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """
+    Convert a datetime to naive UTC, the format price history timestamps are stored in.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def compact_price_history(db: Session) -> int:
+    """
+    Roll old raw price points into hourly buckets and very old ones into daily buckets.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        int: The number of removed price points.
+    """
+    now = datetime.utcnow()
+    removed = crud.compact_price_history(
+        db, now - timedelta(days=settings.PRICE_HISTORY_HOURLY_AFTER_DAYS), 3600
+    )
+    removed += crud.compact_price_history(
+        db, now - timedelta(days=settings.PRICE_HISTORY_DAILY_AFTER_DAYS), 86400
+    )
+    logger.info(f"Compacted price history, removed {removed} points")
+    return removed
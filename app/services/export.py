@@ -0,0 +1,126 @@
+import csv
+import io
+import logging
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import orjson
+
+from app.core.settings import settings
+from app.db import crud
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Export format -> media type
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Exported columns, in the order of the export queries
+CRYPTO_EXPORT_FIELDS = ("cg_id", "symbol", "name", "price", "last_updated")
+HISTORY_EXPORT_FIELDS = ("cg_id", "timestamp", "price")
+
+
+def encode_ndjson(batches: Iterable[list], fields: tuple[str, ...]) -> Iterator[bytes]:
+    """
+    Encode batches of rows as newline-delimited JSON objects, one chunk per batch.
+    """
+    for rows in batches:
+        yield b"".join(orjson.dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+def encode_csv(batches: Iterable[list], fields: tuple[str, ...]) -> Iterator[bytes]:
+    """
+    Encode batches of rows as CSV with a header line, one chunk per batch.
+
+    Datetimes are written in ISO 8601, like in the JSON exports.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(fields)
+    for rows in batches:
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Compress a stream of chunks into one gzip stream as they are produced.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_rows(query, fields: tuple[str, ...], fmt: str, gzip: bool = False) -> Iterator[bytes]:
+    """
+    Stream the rows of a query as an export body.
+
+    The rows are read from a server-side cursor in batches of ``EXPORT_BATCH_SIZE``
+    on a session of their own, which is closed once the body has been sent (or the
+    client went away), so memory stays flat whatever the number of rows.
+
+    Args:
+        query: The select statement; its columns match ``fields``.
+        fields (tuple[str, ...]): Names of the exported columns.
+        fmt (str): "ndjson" or "csv".
+        gzip (bool): Compress the body with gzip on the fly.
+
+    Yields:
+        bytes: The next chunk of the body.
+    """
+    encode = encode_ndjson if fmt == "ndjson" else encode_csv
+    db = SessionLocal()
+    exported = 0
+    try:
+        def batches():
+            nonlocal exported
+            for rows in crud.stream_rows(db, query, settings.EXPORT_BATCH_SIZE):
+                exported += len(rows)
+                yield rows
+
+        chunks = encode(batches(), fields)
+        yield from gzip_chunks(chunks) if gzip else chunks
+        logger.info(f"Exported {exported} rows as {fmt}{' (gzip)' if gzip else ''}")
+    finally:
+        db.close()
+
+
+def export_cryptos(fmt: str, gzip: bool = False) -> Iterator[bytes]:
+    """
+    Stream all cryptos (``CRYPTO_EXPORT_FIELDS``) ordered by ID, see ``export_rows``.
+    """
+    return export_rows(crud.cryptos_export_query(), CRYPTO_EXPORT_FIELDS, fmt, gzip)
+
+
+def export_price_history(
+        fmt: str,
+        gzip: bool = False,
+        cg_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None
+) -> Iterator[bytes]:
+    """
+    Stream price points (``HISTORY_EXPORT_FIELDS``) ordered by crypto and time, see ``export_rows``.
+
+    Args:
+        fmt (str): "ndjson" or "csv".
+        gzip (bool): Compress the body with gzip on the fly.
+        cg_id (str | None): Only export the points of this crypto.
+        start (datetime | None): Inclusive UTC start of the range.
+        end (datetime | None): Inclusive UTC end of the range.
+    """
+    query = crud.price_history_export_query(cg_id, start, end)
+    return export_rows(query, HISTORY_EXPORT_FIELDS, fmt, gzip)
@@ -0,0 +1,86 @@
+import hashlib
+import logging
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+
+from app.core.settings import settings
+from app.services.cache import LocalCache
+from app.services.clients import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "cryptos:data_version"
+
+# Serialized read responses of this process, keyed by URL: (data version, body, etag)
+response_cache = LocalCache(
+    ttl=settings.RESPONSE_CACHE_TTL,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES
+)
+
+
+def bump_data_version():
+    """
+    Mark the crypto data as changed, invalidating cached read responses in every process.
+    """
+    try:
+        redis_client.incr(DATA_VERSION_KEY)
+    except RedisError:
+        logger.warning("Could not bump the data version, cached responses may be stale until they expire")
+
+
+async def current_data_version() -> str | None:
+    """
+    Return the current data version, or None if it cannot be read (caching is then bypassed).
+    """
+    try:
+        return await async_redis_client.get(DATA_VERSION_KEY) or "0"
+    except RedisError:
+        logger.warning("Could not read the data version, serving uncached response")
+        return None
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def cached_json_response(request: Request, build: Callable[[], Awaitable[bytes]]) -> Response:
+    """
+    Serve a JSON read response from the per-process cache, keyed by URL and data version.
+
+    ``build`` is only called when the data version changed since the body was cached.
+    Responses carry a strong ETag, and a matching ``If-None-Match`` yields 304 without a body.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        build (Callable[[], Awaitable[bytes]]): Coroutine function producing the serialized JSON body.
+
+    Returns:
+        Response: The (possibly 304) response with ETag and Cache-Control headers.
+    """
+    key = str(request.url)
+    version = await current_data_version()
+    entry = response_cache.get(key) if version is not None else None
+
+    if entry is not None and entry[0] == version:
+        _, body, etag = entry
+    else:
+        body = await build()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if version is not None:
+            response_cache.set(key, (version, body, etag), size=len(body))
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate"
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
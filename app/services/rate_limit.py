@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import random
+
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Refills the bucket based on the Redis server clock (shared by all replicas), then
+# tries to take the requested number of tokens. While the pause key exists (set after
+# a 429 from upstream) no tokens are handed out.
+# Returns {allowed, tokens, wait_ms}; tokens is a string because Lua numbers are truncated.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+
+local paused = redis.call('PTTL', KEYS[2])
+local allowed = 0
+local wait = 0
+if paused > 0 then
+    wait = paused
+elseif tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    wait = math.ceil((requested - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, tostring(tokens), wait}
+"""
+
+
+class RedisTokenBucket:
+    """
+    Token-bucket rate limiter shared by all processes through Redis.
+
+    The bucket refills at ``rate_per_minute`` tokens per minute up to ``capacity``.
+    ``pause`` blocks the whole bucket for a while, e.g. after upstream answered 429.
+    If Redis is unavailable the limiter fails open, so requests are not blocked by it.
+    """
+
+    def __init__(self, redis_client, key: str, rate_per_minute: float, capacity: int):
+        self.redis = redis_client
+        self.key = key
+        self.pause_key = f"{key}:paused"
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def _take(self, requested: int) -> tuple[bool, float, int]:
+        allowed, tokens, wait_ms = await self._script(
+            keys=[self.key, self.pause_key],
+            args=[self.rate, self.capacity, requested]
+        )
+        return bool(allowed), float(tokens), int(wait_ms)
+
+    async def acquire(self):
+        """
+        Wait until a token is available and take it.
+        """
+        while True:
+            try:
+                allowed, _, wait_ms = await self._take(1)
+            except RedisError:
+                logger.warning("Rate limiter unavailable, proceeding without it")
+                return
+            if allowed:
+                return
+            # Small jitter so that waiting workers do not retry in lockstep
+            await asyncio.sleep(wait_ms / 1000 + random.uniform(0, 0.1))
+
+    async def pause(self, seconds: float):
+        """
+        Stop handing out tokens to every process for the given number of seconds.
+        """
+        try:
+            await self.redis.set(self.pause_key, 1, px=max(1, int(seconds * 1000)))
+        except RedisError:
+            logger.warning("Rate limiter unavailable, could not pause it")
+
+    async def remaining(self) -> dict:
+        """
+        Report the budget left in the bucket without consuming it.
+
+        Returns:
+            dict: Tokens left, bucket capacity, refill rate and the remaining pause.
+        """
+        _, tokens, paused_ms = await self._take(0)
+        return {
+            "tokens": round(tokens, 2),
+            "capacity": self.capacity,
+            "rate_per_minute": round(self.rate * 60, 2),
+            "paused_seconds": round(paused_ms / 1000, 2),
+        }
@@ -0,0 +1,123 @@
+import heapq
+import logging
+import math
+import time
+from datetime import datetime
+
+from redis.exceptions import RedisError
+
+from app.core.settings import settings
+from app.db import models
+from app.services.clients import async_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of CoinGecko ID -> epoch seconds of the last API read
+READS_KEY = "cryptos:read_at"
+
+# Weight of the newest return in the volatility EWMA
+VOLATILITY_ALPHA = 0.3
+
+# Volatility (absolute log return per square-root minute) that halves the refresh interval
+VOLATILITY_REFERENCE = 0.002
+
+# How much more urgent a coin that was just read is than one nobody reads
+READ_WEIGHT = 4.0
+
+# Reads older than this many half-lives no longer make a difference and are dropped
+READ_RETENTION_HALF_LIVES = 10
+
+
+async def record_read(cg_id: str):
+    """
+    Remember that a crypto was just read, raising its refresh priority.
+    """
+    try:
+        await async_redis_client.zadd(READS_KEY, {cg_id: time.time()})
+    except RedisError:
+        logger.warning(f"Could not record read of {cg_id}")
+
+
+async def get_read_times() -> dict[str, float]:
+    """
+    Return the epoch seconds of the last read of every recently read crypto.
+    """
+    half_life = settings.REFRESH_READ_HALF_LIFE_MINUTES * 60
+    try:
+        await async_redis_client.zremrangebyscore(
+            READS_KEY, "-inf", time.time() - READ_RETENTION_HALF_LIVES * half_life
+        )
+        return dict(await async_redis_client.zrange(READS_KEY, 0, -1, withscores=True))
+    except RedisError:
+        logger.warning("Could not load read times, refreshing by staleness and volatility only")
+        return {}
+
+
+def hotness(read_at: float | None, now: float) -> float:
+    """
+    Return 1.0 for a crypto read just now, halving every REFRESH_READ_HALF_LIFE_MINUTES, 0.0 if never read.
+    """
+    if read_at is None:
+        return 0.0
+    return 0.5 ** (max(0.0, now - read_at) / (settings.REFRESH_READ_HALF_LIFE_MINUTES * 60))
+
+
+def update_volatility(volatility: float, old_price: float | None, new_price: float, elapsed: float | None) -> float:
+    """
+    Fold the return between two refreshes into the volatility EWMA.
+
+    Args:
+        volatility (float): The current volatility estimate.
+        old_price (float | None): The previous price.
+        new_price (float): The refreshed price.
+        elapsed (float | None): Seconds since the previous refresh.
+
+    Returns:
+        float: The updated estimate, in absolute log return per square-root minute.
+    """
+    if not old_price or not elapsed or elapsed <= 0:
+        return volatility
+    sample = abs(math.log(new_price / old_price)) / math.sqrt(elapsed / 60)
+    return VOLATILITY_ALPHA * sample + (1 - VOLATILITY_ALPHA) * volatility
+
+
+def refresh_interval(hot: float, volatility: float) -> float:
+    """
+    Return the seconds until a crypto's next refresh.
+
+    Read cryptos move from the UPDATE_INTERVAL_MINUTES cadence towards
+    REFRESH_MIN_INTERVAL_SECONDS; volatility shortens the interval further.
+    """
+    slowest = settings.UPDATE_INTERVAL_MINUTES * 60
+    fastest = min(settings.REFRESH_MIN_INTERVAL_SECONDS, slowest)
+    interval = (slowest - (slowest - fastest) * hot) / (1 + volatility / VOLATILITY_REFERENCE)
+    return max(fastest, min(slowest, interval))
+
+
+def pick_due(cryptos: list[models.Crypto], read_times: dict[str, float], now: datetime,
+             budget: int) -> list[models.Crypto]:
+    """
+    Choose the due cryptos to refresh within a budget, most urgent first.
+
+    Urgency grows with the time since the last refresh, and is boosted for recently
+    read and for volatile cryptos. Cryptos never refreshed come first.
+
+    Args:
+        cryptos (list[models.Crypto]): The cryptos due for a refresh.
+        read_times (dict[str, float]): Epoch seconds of the last read per CoinGecko ID.
+        now (datetime): The current UTC time.
+        budget (int): Maximum number of cryptos to pick.
+
+    Returns:
+        list[models.Crypto]: Up to ``budget`` cryptos, most urgent first.
+    """
+    now_ts = time.time()
+
+    def urgency(crypto: models.Crypto) -> float:
+        if crypto.last_updated is None:
+            return math.inf
+        staleness = (now - crypto.last_updated).total_seconds()
+        hot = hotness(read_times.get(crypto.cg_id), now_ts)
+        return staleness * (1 + READ_WEIGHT * hot) * (1 + (crypto.volatility or 0.0) / VOLATILITY_REFERENCE)
+
+    return heapq.nlargest(budget, cryptos, key=urgency)
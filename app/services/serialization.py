@@ -0,0 +1,30 @@
+import orjson
+
+# Field order of schemas.Crypto
+CRYPTO_FIELDS = ("symbol", "cg_id", "name", "price")
+
+
+def crypto_row_to_dict(row) -> dict:
+    """
+    Convert a plain crypto row (see ``crud.get_cryptos_page(rows=True)``) to its API representation.
+    """
+    return {field: getattr(row, field) for field in CRYPTO_FIELDS}
+
+
+def dump_crypto(row) -> bytes:
+    """
+    Serialize a single crypto row to JSON without Pydantic validation.
+    """
+    return orjson.dumps(crypto_row_to_dict(row))
+
+
+def dump_crypto_page(rows, next_cursor: str | None) -> bytes:
+    """
+    Serialize a page of crypto rows to JSON without Pydantic validation.
+
+    Rows come straight from the database, so they are trusted to match ``schemas.CryptoPage``.
+    """
+    return orjson.dumps({
+        "items": [crypto_row_to_dict(row) for row in rows],
+        "next_cursor": next_cursor
+    })
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from app.services.cluster import RELEASE_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+# Polling of callers waiting for another process: first delay and upper bound, in seconds
+POLL_INITIAL = 0.02
+POLL_MAX = 0.5
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent fetches of the same key so that only one caller does the work.
+
+    Within a process, concurrent ``do`` calls for a key share one in-flight call.
+    Across processes, the call that takes the Redis lock ``<prefix><key>`` fetches,
+    while the others poll for its result until it shows up. Callers that pass
+    ``load`` find the result where ``fetch`` stored it (e.g. a cache); otherwise the
+    result is published as JSON under ``<prefix><key>:result`` for ``result_ttl``
+    seconds. If the fetching process fails or dies, the lock is freed (or expires
+    after ``lock_ttl``) and one of the waiting processes takes over.
+
+    Without Redis, calls are still coalesced within the process.
+    """
+
+    def __init__(self, redis_client, prefix: str, lock_ttl: float, result_ttl: float = 5):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.lock_ttl_ms = max(1, int(lock_ttl * 1000))
+        self.result_ttl_ms = max(1, int(result_ttl * 1000))
+        self.fetches = 0
+        self.shared_local = 0
+        self.shared_remote = 0
+        self._calls: dict[str, asyncio.Future] = {}
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable], load: Callable[[], Awaitable] | None = None):
+        """
+        Return the result of ``fetch`` for a key, running it at most once at a time across all processes.
+
+        Args:
+            key (str): Identifies the result, e.g. the cache key or the upstream request.
+            fetch (Callable[[], Awaitable]): Produces the result; only called by the caller that holds the lock.
+            load (Callable[[], Awaitable] | None): Returns the result stored by ``fetch`` elsewhere,
+                or None if it is not there yet. Without it, the result must be JSON-serializable.
+
+        Returns:
+            The result of the single ``fetch`` call, shared by all waiting callers.
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            self.shared_local += 1
+            return await asyncio.shield(call)
+
+        call = asyncio.ensure_future(self._run(key, fetch, load))
+        self._calls[key] = call
+        call.add_done_callback(lambda _: self._calls.pop(key, None) if self._calls.get(key) is call else None)
+        # Shielded, so that a caller going away does not cancel the call for the others
+        return await asyncio.shield(call)
+
+    async def _run(self, key: str, fetch: Callable[[], Awaitable], load: Callable[[], Awaitable] | None):
+        lock_key = f"{self.prefix}{key}"
+        token = uuid.uuid4().hex
+        delay = POLL_INITIAL
+        try:
+            while True:
+                if await self.redis.set(lock_key, token, nx=True, px=self.lock_ttl_ms):
+                    break
+                # Another process is fetching: wait for its result, or for its lock to go away
+                while True:
+                    result = await self._lookup(key, load)
+                    if result is not None:
+                        self.shared_remote += 1
+                        return result
+                    if not await self.redis.exists(lock_key):
+                        break
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, POLL_MAX)
+            # The previous holder may have stored the result just before we took the lock
+            result = await self._lookup(key, load)
+            if result is not None:
+                await self._unlock(lock_key, token)
+                self.shared_remote += 1
+                return result
+        except RedisError:
+            logger.warning(f"Single-flight lock for '{key}' unavailable, fetching without cross-process coalescing")
+            self.fetches += 1
+            return await fetch()
+
+        try:
+            self.fetches += 1
+            result = await fetch()
+            if load is None:
+                await self._publish(key, result)
+            return result
+        finally:
+            await self._unlock(lock_key, token)
+
+    async def _lookup(self, key: str, load: Callable[[], Awaitable] | None):
+        if load is not None:
+            return await load()
+        raw = await self.redis.get(f"{self.prefix}{key}:result")
+        return json.loads(raw) if raw is not None else None
+
+    async def _publish(self, key: str, result):
+        try:
+            await self.redis.set(f"{self.prefix}{key}:result", json.dumps(result), px=self.result_ttl_ms)
+        except RedisError:
+            logger.warning(f"Could not share the result for '{key}' with other processes")
+
+    async def _unlock(self, lock_key: str, token: str):
+        try:
+            await self._release(keys=[lock_key], args=[token])
+        except RedisError:
+            logger.warning(f"Could not release single-flight lock '{lock_key}', it will expire on its own")
+
+    def stats(self) -> dict:
+        """
+        Return how many calls fetched and how many shared a result fetched by another call.
+        """
+        return {
+            "hits": self.shared_local + self.shared_remote,
+            "misses": self.fetches,
+            "shared_local": self.shared_local,
+            "shared_remote": self.shared_remote,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSubscriber:
+    """
+    Pending price changes of one streaming client.
+
+    Changes are coalesced per coin, so a slow client receives the latest price of
+    every changed coin instead of a growing backlog; memory per client is bounded
+    by the number of tracked coins.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._event = asyncio.Event()
+
+    def push(self, changes: list[dict]):
+        for change in changes:
+            self._pending[change["cg_id"]] = change
+        self._event.set()
+
+    async def next(self, timeout: float | None = None) -> list[dict]:
+        """
+        Wait for pending changes and take them; returns an empty list on timeout.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._event.clear()
+        changes = list(self._pending.values())
+        self._pending.clear()
+        return changes
+
+
+class PriceBroadcaster:
+    """
+    Fans price-change deltas published on a Redis channel out to local subscribers.
+
+    One Redis subscription per process is shared by all streaming clients. It is
+    started with the first subscriber and reconnects if Redis goes away.
+    """
+
+    def __init__(self, redis_client, channel: str):
+        self.redis = redis_client
+        self.channel = channel
+        self._subscribers: set[PriceSubscriber] = set()
+        self._task: asyncio.Task | None = None
+
+    async def publish(self, changes: list[dict]):
+        """
+        Publish price changes to every process listening on the channel.
+        """
+        if not changes:
+            return
+        try:
+            await self.redis.publish(self.channel, json.dumps({"type": "prices", "changes": changes}))
+        except RedisError:
+            logger.warning(f"Could not publish {len(changes)} price changes")
+
+    @asynccontextmanager
+    async def subscribe(self):
+        """
+        Register a subscriber for the duration of the context.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        subscriber = PriceSubscriber()
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        changes = json.loads(message["data"])["changes"]
+                        for subscriber in list(self._subscribers):
+                            subscriber.push(changes)
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError, ValueError) as e:
+                logger.warning(f"Price stream subscription failed ({e}), reconnecting")
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        """
+        Stop listening on the Redis channel.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
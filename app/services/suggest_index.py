@@ -0,0 +1,232 @@
+import bisect
+import heapq
+import os
+import re
+from collections import Counter
+
+# Fields a term comes from, best match first
+FIELD_SYMBOL = 0
+FIELD_ID = 1
+FIELD_NAME = 2
+FIELD_NAME_WORD = 3
+
+# Terms looked at per query for prefix matches; exact matches always come first
+PREFIX_SCAN_LIMIT = 500
+
+# Trigrams shared by more coins than this are skipped for fuzzy matching when rarer ones exist
+FUZZY_MAX_POSTING = 2000
+
+# Share of the query's trigrams a coin must contain to be a fuzzy match
+FUZZY_MIN_SIMILARITY = 0.5
+
+# Queries up to this length match long runs of terms; their results are memoized per index state
+SHORT_QUERY_LENGTH = 2
+SHORT_RESULTS_MAX_ENTRIES = 10000
+
+# Term diffs up to this size are applied in place instead of rebuilding the sorted list
+SMALL_DIFF_TERMS = 64
+
+_WORD_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Return the set of three-character substrings of a lowercase string.
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _merge_terms(terms: list, stale: set, added: list) -> list:
+    """
+    Return the sorted ``terms`` without ``stale`` and with ``added``, in linear time.
+
+    Stale terms are located by binary search and the list is rebuilt from the slices
+    between them; the added terms are then merged in the same way. This replaces an
+    O(n) ``del`` or ``insort`` per term, which is still cheaper for a few terms (a
+    memmove each) and is kept, on ``terms`` in place, for diffs up to SMALL_DIFF_TERMS.
+    """
+    if len(stale) + len(added) <= SMALL_DIFF_TERMS:
+        for term in stale:
+            i = bisect.bisect_left(terms, term)
+            if i < len(terms) and terms[i] == term:
+                del terms[i]
+        for term in added:
+            bisect.insort(terms, term)
+        return terms
+
+    cuts = sorted(bisect.bisect_left(terms, term) for term in stale)
+    kept, start = [], 0
+    for i in cuts:
+        if i < len(terms) and terms[i] in stale:
+            kept += terms[start:i]
+            start = i + 1
+    kept += terms[start:]
+
+    merged, start = [], 0
+    for term in sorted(added):
+        i = bisect.bisect_left(kept, term, start)
+        merged += kept[start:i]
+        merged.append(term)
+        start = i
+    merged += kept[start:]
+    return merged
+
+
+class SuggestIndex:
+    """
+    In-memory autocomplete index over the coin catalog.
+
+    The lowercase symbol, ID, name and name words of every coin are kept in one
+    sorted list of ``(term, field, id)``, which works as a flattened prefix trie: the
+    terms starting with a prefix are a contiguous run found by binary search, with an
+    exact match first. A trigram index adds fuzzy matches (typos, infixes) when the
+    prefix matches do not fill the result. Results of one- and two-character queries,
+    which match the longest runs, are memoized until the index changes.
+
+    Both structures are maintained per coin, so applying a catalog diff only derives
+    the terms and trigrams of the coins that changed; their terms are merged into the
+    sorted list in one pass.
+
+    Attributes:
+        version (str | None): Catalog version the index reflects.
+        coins (dict[str, dict]): Lowercase ID -> coin (``id``, ``symbol``, ``name``).
+    """
+
+    def __init__(self):
+        self.version = None
+        self.coins = {}
+        self._terms = []
+        self._trigrams = {}
+        self._short_results = {}
+
+    def __len__(self):
+        return len(self.coins)
+
+    @staticmethod
+    def _terms_of(coin: dict) -> set[tuple[str, int, str]]:
+        cg_id = coin["id"].lower()
+        name = coin["name"].lower()
+        terms = {(coin["symbol"].lower(), FIELD_SYMBOL, cg_id), (cg_id, FIELD_ID, cg_id), (name, FIELD_NAME, cg_id)}
+        terms.update((word, FIELD_NAME_WORD, cg_id) for word in _WORD_SPLIT.split(name) if word and word != name)
+        return terms
+
+    @staticmethod
+    def _trigrams_of(coin: dict) -> set[str]:
+        return trigrams(coin["id"].lower()) | trigrams(coin["name"].lower())
+
+    def rebuild(self, coins: list[dict], version: str | None):
+        """
+        Replace the whole index with the given coins.
+        """
+        self.coins = {}
+        self._trigrams = {}
+        terms = []
+        for coin in coins:
+            cg_id = coin["id"].lower()
+            if cg_id in self.coins:
+                continue
+            self.coins[cg_id] = coin
+            terms.extend(self._terms_of(coin))
+            for gram in self._trigrams_of(coin):
+                self._trigrams.setdefault(gram, set()).add(cg_id)
+        terms.sort()
+        self._terms = terms
+        self._short_results = {}
+        self.version = version
+
+    def apply(self, changed: list[dict], removed: list[str], version: str | None):
+        """
+        Update the index for coins added, changed or removed since its version.
+
+        Args:
+            changed (list[dict]): Coins added or changed.
+            removed (list[str]): IDs of removed coins.
+            version (str | None): The catalog version the index reflects afterwards.
+        """
+        stale = set()
+        for cg_id in [*removed, *(coin["id"] for coin in changed)]:
+            stale |= self._remove(cg_id.lower())
+        added = []
+        for coin in changed:
+            cg_id = coin["id"].lower()
+            self.coins[cg_id] = coin
+            added.extend(self._terms_of(coin))
+            for gram in self._trigrams_of(coin):
+                self._trigrams.setdefault(gram, set()).add(cg_id)
+        self._terms = _merge_terms(self._terms, stale, added)
+        self._short_results = {}
+        self.version = version
+
+    def _remove(self, cg_id: str) -> set[tuple[str, int, str]]:
+        """
+        Drop a coin from the coins and the trigram index, returning its terms for the caller to drop.
+        """
+        coin = self.coins.pop(cg_id, None)
+        if coin is None:
+            return set()
+        for gram in self._trigrams_of(coin):
+            ids = self._trigrams.get(gram)
+            if ids is not None:
+                ids.discard(cg_id)
+                if not ids:
+                    del self._trigrams[gram]
+        return self._terms_of(coin)
+
+    def suggest(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Return the best matching coins for a partial query.
+
+        Exact matches rank first, then prefix matches (by field: symbol, ID, name,
+        name word; then shorter terms), then fuzzy matches by trigram similarity
+        (then shorter names).
+
+        Args:
+            query (str): What the user typed so far.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            list[dict]: Up to ``limit`` coins (``id``, ``symbol``, ``name``), best first.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        if len(query) <= SHORT_QUERY_LENGTH:
+            key = (query, limit)
+            if key not in self._short_results:
+                if len(self._short_results) >= SHORT_RESULTS_MAX_ENTRIES:
+                    self._short_results.clear()
+                self._short_results[key] = self._suggest(query, limit)
+            return self._short_results[key]
+        return self._suggest(query, limit)
+
+    def _suggest(self, query: str, limit: int) -> list[dict]:
+        ranks = {}  # lowercase ID -> best rank, lower is better
+        i = bisect.bisect_left(self._terms, (query,))
+        end = min(len(self._terms), i + PREFIX_SCAN_LIMIT)
+        while i < end and self._terms[i][0].startswith(query):
+            term, field, cg_id = self._terms[i]
+            rank = (0 if term == query else 1, field, len(term))
+            if cg_id not in ranks or rank < ranks[cg_id]:
+                ranks[cg_id] = rank
+            i += 1
+
+        if len(ranks) < limit and len(query) >= 3:
+            self._add_fuzzy(query, ranks)
+
+        best = heapq.nsmallest(limit, ranks.items(), key=lambda item: (item[1], item[0]))
+        return [self.coins[cg_id] for cg_id, _ in best]
+
+    def _add_fuzzy(self, query: str, ranks: dict):
+        grams = trigrams(query)
+        postings = [self._trigrams[gram] for gram in grams if gram in self._trigrams]
+        if not postings:
+            return
+        rare = [ids for ids in postings if len(ids) <= FUZZY_MAX_POSTING]
+        counts = Counter()
+        for ids in rare or [min(postings, key=len)]:
+            counts.update(ids)
+        for cg_id, count in counts.items():
+            similarity = count / len(grams)
+            if similarity >= FUZZY_MIN_SIMILARITY and cg_id not in ranks:
+                name = self.coins[cg_id]["name"].lower()
+                ranks[cg_id] = (2, -similarity, -len(os.path.commonprefix([query, name])), len(name))
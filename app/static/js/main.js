@@ -0,0 +1,71 @@
+// Live price updates: subscribe to the price stream and update dashboard rows in place
+(function () {
+    if (!window.EventSource || !document.querySelector("tr[data-cg-id]")) {
+        return;
+    }
+
+    const source = new EventSource("/cryptos/stream");
+
+    source.onmessage = function (event) {
+        const message = JSON.parse(event.data);
+        if (message.type !== "prices") {
+            return;
+        }
+        message.changes.forEach(function (change) {
+            const row = document.querySelector(`tr[data-cg-id="${CSS.escape(change.cg_id)}"]`);
+            if (!row) {
+                return;
+            }
+            const cell = row.querySelector(".col-price");
+            cell.textContent = "$" + change.new_price.toFixed(2);
+            cell.classList.remove("price-up", "price-down");
+            if (change.old_price !== null) {
+                cell.classList.add(change.new_price >= change.old_price ? "price-up" : "price-down");
+            }
+            setTimeout(function () {
+                cell.classList.remove("price-up", "price-down");
+            }, 2000);
+        });
+    };
+})();
+
+// Type-ahead for the add form: suggest catalog coins while typing
+(function () {
+    const input = document.querySelector("input[name='symbol'][list]");
+    const list = input && document.getElementById(input.getAttribute("list"));
+    if (!list || !window.fetch) {
+        return;
+    }
+
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener("input", function () {
+        clearTimeout(timer);
+        const query = input.value.trim();
+        if (!query) {
+            list.replaceChildren();
+            return;
+        }
+        timer = setTimeout(function () {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            fetch(`/coins/suggest?limit=8&q=${encodeURIComponent(query)}`, {signal: controller.signal})
+                .then(function (response) {
+                    return response.ok ? response.json() : [];
+                })
+                .then(function (coins) {
+                    list.replaceChildren(...coins.map(function (coin) {
+                        const option = document.createElement("option");
+                        option.value = coin.id;
+                        option.label = `${coin.name} (${coin.symbol.toUpperCase()})`;
+                        return option;
+                    }));
+                })
+                .catch(function () {
+                });
+        }, 150);
+    });
+})();
@@ -1,11 +1,13 @@
 import logging
 from fastapi import APIRouter, Request, Form, Depends, HTTPException
 from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.templating import Jinja2Templates
 from starlette import status
 
-from app.db.database import get_db
+from app.core.settings import settings
+from app.db.database import get_db, get_read_db
 from app.services import crypto_service
 
 templates = Jinja2Templates(directory="app/templates")
@@ -14,38 +16,36 @@ logger = logging.getLogger(__name__)
 
 
 @router.get("/")
-def dashboard(request: Request, q: str = "", db: Session = Depends(get_db)):
+async def dashboard(request: Request, q: str = "", cursor: str | None = None,
+                    db: Session | AsyncSession = Depends(get_read_db)):
     """
-    Retrieve and display the list of cryptocurrencies, with optional search functionality.
+    Retrieve and display a page of cryptocurrencies, with optional search functionality.
+
+    Search and paging run in the database, so rendering cost does not grow with
+    the number of tracked cryptocurrencies.
 
     Args:
         request (Request): The incoming HTTP request.
         q (str): The query parameter for searching cryptocurrencies by symbol or name.
-        db (Session): The database session dependency.
+        cursor (str | None): The cursor of the page to display.
+        db (Session | AsyncSession): The read database session dependency.
 
     Returns:
         TemplateResponse: A rendered template displaying the cryptocurrencies.
     """
-    all_cryptos = crypto_service.list_cryptos(db)
-    query = q.strip().lower()
-
-    if query:
-        cryptos = [
-            c for c in all_cryptos
-            if query in c.symbol.lower() or query in c.name.lower()
-        ]
-    else:
-        cryptos = all_cryptos
+    page = await crypto_service.list_cryptos_page(db, settings.DASHBOARD_PAGE_SIZE, cursor, search=q.strip() or None)
 
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
-        "cryptos": cryptos,
+        "cryptos": page["items"],
+        "next_cursor": page["next_cursor"],
+        "cursor": cursor,
         "q": q
     })
 
 
 @router.post("/add")
-def add_crypto(request: Request, symbol: str = Form(...), db: Session = Depends(get_db)):
+async def add_crypto(request: Request, symbol: str = Form(...), db: Session = Depends(get_db)):
     """
     Add a new cryptocurrency to the database by querying CoinGecko.
 
@@ -58,7 +58,7 @@ def add_crypto(request: Request, symbol: str = Form(...), db: Session = Depends(
         RedirectResponse: Redirect to the dashboard after the operation.
     """
     try:
-        crypto_service.create_crypto_from_query(db, symbol)
+        await crypto_service.create_crypto_from_query(db, symbol)
     except HTTPException as e:
         logger.warning(f"Add crypto failed: {e.detail}")
 
@@ -74,7 +74,7 @@ def add_crypto(request: Request, symbol: str = Form(...), db: Session = Depends(
 
         return templates.TemplateResponse("dashboard.html", {
             "request": request,
-            "cryptos": crypto_service.list_cryptos(db),
+            "cryptos": (await crypto_service.list_cryptos_page(db, settings.DASHBOARD_PAGE_SIZE))["items"],
             "error": error,
             "message": message,
             "options": options,
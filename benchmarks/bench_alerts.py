@@ -0,0 +1,145 @@
+"""
+Benchmark of the price alert engine.
+
+Generates ``--rules`` alert rules (a third each of "above", "below" and "percent_change",
+with levels within ±20% of the price) spread over ``--coins`` coins, then runs
+``--ticks`` refreshes that move every coin by a random walk step of ``--volatility``
+(relative standard deviation). For every tick it measures how long
+``AlertIndex.evaluate`` takes to find the fired rules (including the re-arming of fired
+"percent_change" rules), and compares it with a plain Python loop over all rules.
+
+Usage:
+    python -m benchmarks.bench_alerts [--rules 100000] [--coins 1000] [--ticks 50] [--volatility 0.01]
+        [--baseline-ticks 5] [--output results.json]
+
+Runs in memory: no database or Redis is needed.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import time
+
+import numpy as np
+
+from app.services.alert_index import KINDS, AlertIndex
+
+
+def summarize(timings: list[float]) -> dict:
+    """
+    Return count, mean, p50 and p99 in milliseconds of a list of durations in seconds.
+    """
+    quantiles = statistics.quantiles(timings, n=100, method="inclusive") if len(timings) > 1 else timings * 99
+    return {
+        "count": len(timings),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+    }
+
+
+def generate(rules: int, coins: int, rng: random.Random) -> tuple[dict[str, float], list[list]]:
+    prices = {f"coin-{i}": 10 ** rng.uniform(-4, 4) for i in range(coins)}
+    cg_ids = list(prices)
+    generated = []
+    for rule_id in range(rules):
+        cg_id = rng.choice(cg_ids)
+        kind = KINDS[rule_id % len(KINDS)]
+        if kind == "percent_change":
+            threshold = rng.uniform(1, 20)
+        else:
+            threshold = prices[cg_id] * rng.uniform(0.8, 1.2)
+        generated.append([rule_id, cg_id, kind, threshold, prices[cg_id]])
+    return prices, generated
+
+
+def tick(prices: dict[str, float], volatility: float, rng: random.Random) -> list[dict]:
+    changes = []
+    for cg_id, old in prices.items():
+        new = old * max(0.01, 1 + rng.gauss(0, volatility))
+        changes.append({"cg_id": cg_id, "old_price": old, "new_price": new})
+        prices[cg_id] = new
+    return changes
+
+
+def evaluate_loop(rules: list[list], changes: list[dict]) -> list[int]:
+    """
+    Reference implementation: check every rule against the change of its coin.
+    """
+    moves = {change["cg_id"]: change for change in changes}
+    fired = []
+    for rule in rules:
+        rule_id, cg_id, kind, threshold, reference = rule
+        change = moves.get(cg_id)
+        if change is None:
+            continue
+        old, new = change["old_price"], change["new_price"]
+        if kind == "above":
+            hit = old < threshold <= new
+        elif kind == "below":
+            hit = new <= threshold < old
+        else:
+            hit = old < reference * (1 + threshold / 100) <= new or new <= reference * (1 - threshold / 100) < old
+            if hit:
+                rule[4] = new
+        if hit:
+            fired.append(rule_id)
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=100000)
+    parser.add_argument("--coins", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--volatility", type=float, default=0.01)
+    parser.add_argument("--baseline-ticks", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    prices, rules = generate(args.rules, args.coins, rng)
+
+    index = AlertIndex()
+    start = time.perf_counter()
+    index.rebuild([tuple(rule) for rule in rules], "bench")
+    build = time.perf_counter() - start
+
+    timings, fired, baseline = [], [], []
+    for i in range(args.ticks):
+        changes = tick(prices, args.volatility, rng)
+        start = time.perf_counter()
+        events = index.evaluate(changes)
+        timings.append(time.perf_counter() - start)
+        fired.append(len(events))
+        if i < args.baseline_ticks:
+            start = time.perf_counter()
+            expected = evaluate_loop(rules, changes)
+            baseline.append(time.perf_counter() - start)
+            assert sorted(event["rule_id"] for event in events) == sorted(expected)
+        else:
+            # Keep the references of the reference rules in step for later comparisons
+            evaluate_loop(rules, changes)
+
+    results = {
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "build_ms": round(build * 1000, 3),
+        "fired_per_tick": round(statistics.fmean(fired), 1),
+        "index": summarize(timings),
+        "python_loop": summarize(baseline) if baseline else None,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Offline end-to-end benchmark of the price refresh pipeline and the read API.
+
+The app runs in-process against a local CoinGecko stub (``benchmarks.coingecko_stub``)
+and an in-process fakeredis server, so no network access or Redis is needed. For
+every table size it measures:
+
+- refresh: a full price refresh, in coins per second, with the upstream calls made;
+- list: p50/p99 latency of ``GET /cryptos/`` for a repeated first page (served from
+  the response cache), for paging through the table and for substring searches.
+
+``resolve_to_id`` latency (cold, including the coins list download, and warm) is
+measured once against the full stub coins list.
+
+Usage:
+    python -m benchmarks.bench_app [--sizes 1000 5000 15000] [--requests 200] [--coins 15000]
+        [--latency-ms 20] [--error-rate 0.0] [--throttle-rate 0.0] [--output results.json]
+
+Runs against a temporary SQLite database unless DATABASE_URL is set (e.g. a local
+PostgreSQL). The CoinGecko rate limit is lifted unless set in the environment.
+Results are printed as JSON, or written to ``--output``, so that runs can be compared.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_app.db")
+# Measure the app, not the CoinGecko quota
+os.environ.setdefault("COINGECKO_RATE_LIMIT_PER_MINUTE", "1000000")
+os.environ.setdefault("COINGECKO_RATE_LIMIT_BURST", "1000")
+os.environ.setdefault("COINGECKO_BACKOFF_BASE", "0.05")
+
+import httpx  # noqa: E402
+
+from benchmarks.coingecko_stub import SYLLABLES, CoinGeckoStub  # noqa: E402
+
+
+def use_fake_redis():
+    """
+    Make every Redis client the app creates talk to one in-process fakeredis server.
+    """
+    import fakeredis
+    import redis
+    import redis.asyncio
+
+    server = fakeredis.FakeServer()
+    redis.Redis = functools.partial(fakeredis.FakeRedis, server=server)
+    redis.asyncio.Redis = functools.partial(fakeredis.aioredis.FakeRedis, server=server)
+
+
+def summarize(timings: list[float]) -> dict:
+    """
+    Return count, mean, p50 and p99 in milliseconds of a list of durations in seconds.
+    """
+    quantiles = statistics.quantiles(timings, n=100, method="inclusive") if len(timings) > 1 else timings * 99
+    return {
+        "count": len(timings),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+    }
+
+
+def seed(db, coins: list[dict]):
+    from sqlalchemy import delete, insert
+
+    from app.db import models
+
+    db.execute(delete(models.PriceHistory))
+    db.execute(delete(models.Crypto))
+    db.execute(insert(models.Crypto), [
+        {"cg_id": coin["id"], "symbol": coin["symbol"], "name": coin["name"], "price": 1.0}
+        for coin in coins
+    ])
+    db.commit()
+
+
+async def bench_resolve(stub: CoinGeckoStub, samples: int) -> dict:
+    from fastapi import HTTPException
+
+    from app.services import coingecko
+
+    start = time.perf_counter()
+    await coingecko.load_catalog()
+    cold = time.perf_counter() - start
+
+    rng = random.Random(1)
+    coins = rng.sample(stub.coins, min(samples, len(stub.coins)))
+    queries = (
+        [coin["id"] for coin in coins]
+        + [coin["symbol"] for coin in coins]
+        + [coin["name"] for coin in coins]
+        + [f"missing-{i}" for i in range(len(coins))]
+    )
+    rng.shuffle(queries)
+
+    timings = []
+    ambiguous = 0
+    for query in queries:
+        start = time.perf_counter()
+        try:
+            await coingecko.resolve_to_id(query)
+        except HTTPException:
+            ambiguous += 1
+        timings.append(time.perf_counter() - start)
+    return {"coins_list_size": len(stub.coins), "cold_ms": round(cold * 1000, 3),
+            "ambiguous": ambiguous, **summarize(timings)}
+
+
+async def bench_refresh(db, stub: CoinGeckoStub, size: int) -> dict:
+    from app.services import crypto_service
+
+    stub.tick += 1
+    requests_before = stub.requests.copy()
+    start = time.perf_counter()
+    changed = await crypto_service.refresh_prices(db)
+    elapsed = time.perf_counter() - start
+    calls = stub.requests - requests_before
+    return {
+        "rows": size,
+        "changed": len(changed),
+        "seconds": round(elapsed, 3),
+        "coins_per_second": round(size / elapsed, 1),
+        "upstream_calls": {f"{endpoint} {status}": count for (endpoint, status), count in sorted(calls.items())},
+    }
+
+
+async def bench_list(client: httpx.AsyncClient, size: int, requests: int) -> list[dict]:
+    async def timed(url: str) -> tuple[float, dict]:
+        start = time.perf_counter()
+        response = await client.get(url)
+        elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        return elapsed, response.json()
+
+    results = []
+
+    timings = [(await timed("/cryptos/?limit=100"))[0] for _ in range(requests)]
+    results.append({"rows": size, "scenario": "first_page", **summarize(timings)})
+
+    timings = []
+    cursor = None
+    for _ in range(requests):
+        elapsed, page = await timed(f"/cryptos/?limit=100&sort=price&order=desc&cursor={cursor or ''}")
+        timings.append(elapsed)
+        cursor = page["next_cursor"]
+    results.append({"rows": size, "scenario": "paging_by_price", **summarize(timings)})
+
+    rng = random.Random(2)
+    timings = [(await timed(f"/cryptos/?limit=100&q={rng.choice(SYLLABLES)}{rng.choice(SYLLABLES)}"))[0]
+               for _ in range(requests)]
+    results.append({"rows": size, "scenario": "search", **summarize(timings)})
+    return results
+
+
+async def run(args, stub: CoinGeckoStub) -> dict:
+    # The app reads its settings on import, after the stub is up
+    from app.db.database import SessionLocal, init_db
+    from app.main import app
+    from app.services.clients import cg
+
+    # The ASGI transport does not run the startup warm-up
+    init_db()
+
+    # Per-request log lines would drown the results
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        },
+        "resolve_to_id": await bench_resolve(stub, args.requests),
+        "refresh": [],
+        "list": [],
+    }
+
+    db = SessionLocal()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    try:
+        for size in args.sizes:
+            seed(db, stub.coins[:size])
+            results["refresh"].append(await bench_refresh(db, stub, size))
+            results["list"].extend(await bench_list(client, size, args.requests))
+    finally:
+        await client.aclose()
+        await cg.aclose()
+        db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 15000])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--coins", type=int, default=15000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    stub = CoinGeckoStub(
+        coins=max([args.coins, *args.sizes]), latency=args.latency_ms / 1000, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after
+    )
+    os.environ["COINGECKO_API_BASE"] = stub.start()
+    use_fake_redis()
+    try:
+        results = asyncio.run(run(args, stub))
+    finally:
+        stub.stop()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
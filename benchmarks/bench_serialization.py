@@ -0,0 +1,104 @@
+"""
+Benchmark of the crypto list serialization paths.
+
+Compares three ways of producing a page of 1k, 10k and 100k rows, including the query:
+
+- response_model: ORM objects through FastAPI's ``response_model`` handling
+  (validate, dump to JSON-compatible Python, encode with the standard ``json`` module);
+- standard: ORM objects validated through ``schemas.CryptoPage`` and encoded by Pydantic
+  (the default path of the read routes);
+- fast: column tuples encoded with orjson (``FAST_SERIALIZATION=true``).
+
+Usage:
+    python -m benchmarks.bench_serialization [--sizes 1000 10000 100000] [--repeat 5]
+
+Runs against a temporary SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_serialization.db")
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import delete, insert  # noqa: E402
+
+from app.db import crud, models, schemas  # noqa: E402
+from app.db.database import SessionLocal, init_db  # noqa: E402
+from app.services import serialization  # noqa: E402
+
+
+def seed(db, size: int):
+    db.execute(delete(models.Crypto))
+    db.execute(insert(models.Crypto), [
+        {"cg_id": f"coin-{i}", "symbol": f"c{i}", "name": f"Coin {i}", "price": i * 1.2345}
+        for i in range(size)
+    ])
+    db.commit()
+
+
+CRYPTO_LIST = TypeAdapter(list[schemas.Crypto])
+
+
+def response_model_path(db, size: int) -> bytes:
+    items = crud.get_cryptos_page(db, size)
+    validated = CRYPTO_LIST.validate_python(items, from_attributes=True)
+    content = {"items": CRYPTO_LIST.dump_python(validated, mode="json"), "next_cursor": None}
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def standard_path(db, size: int) -> bytes:
+    items = crud.get_cryptos_page(db, size)
+    page = {"items": items, "next_cursor": None}
+    return schemas.CryptoPage.model_validate(page, from_attributes=True).model_dump_json().encode()
+
+
+def fast_path(db, size: int) -> bytes:
+    rows = crud.get_cryptos_page(db, size, rows=True)
+    return serialization.dump_crypto_page(rows, None)
+
+
+def measure(func, db, size: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        db.expunge_all()
+        start = time.perf_counter()
+        func(db, size)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    results = []
+    try:
+        for size in args.sizes:
+            seed(db, size)
+            assert json.loads(response_model_path(db, size)) == json.loads(fast_path(db, size))
+            response_model = measure(response_model_path, db, size, args.repeat)
+            standard = measure(standard_path, db, size, args.repeat)
+            fast = measure(fast_path, db, size, args.repeat)
+            results.append({
+                "rows": size,
+                "response_model_ms": round(response_model * 1000, 2),
+                "standard_ms": round(standard * 1000, 2),
+                "fast_ms": round(fast * 1000, 2),
+                "speedup_vs_response_model": round(response_model / fast, 2),
+                "speedup_vs_standard": round(standard / fast, 2),
+            })
+    finally:
+        db.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Local stand-in for the CoinGecko API, for benchmarks.
+
+Serves ``/coins/list``, ``/coins/{id}`` and ``/simple/price`` from a generated,
+deterministic coins list (about 15k coins by default, including symbols shared by
+several coins, like the real list). Every response can be delayed, and a share of
+requests can be answered with 500 or with 429 and ``Retry-After``.
+
+Usage:
+    python -m benchmarks.coingecko_stub [--port 8765] [--coins 15000] [--latency-ms 50]
+        [--error-rate 0.01] [--throttle-rate 0.05] [--retry-after 1]
+
+Then point the app at it with ``COINGECKO_API_BASE=http://127.0.0.1:8765/api/v3``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/api/v3"
+
+# A few well-known coins at the top of the list, so that realistic queries resolve
+KNOWN_COINS = [
+    ("bitcoin", "btc", "Bitcoin"),
+    ("ethereum", "eth", "Ethereum"),
+    ("tether", "usdt", "Tether"),
+    ("binancecoin", "bnb", "BNB"),
+    ("solana", "sol", "Solana"),
+    ("ripple", "xrp", "XRP"),
+    ("usd-coin", "usdc", "USDC"),
+    ("cardano", "ada", "Cardano"),
+    ("dogecoin", "doge", "Dogecoin"),
+    ("tron", "trx", "TRON"),
+]
+
+SYLLABLES = ["ba", "co", "da", "fi", "go", "ka", "lu", "mi", "no", "pa", "qu", "ra", "si", "to", "vu", "xe", "zo"]
+
+
+def generate_coins(count: int, seed: int = 0) -> list[dict]:
+    """
+    Generate a deterministic coins list of ``count`` entries shaped like CoinGecko's.
+
+    About one coin in ten reuses the symbol of an earlier coin.
+    """
+    rng = random.Random(seed)
+    coins = [{"id": cg_id, "symbol": symbol, "name": name} for cg_id, symbol, name in KNOWN_COINS[:count]]
+    symbols = [coin["symbol"] for coin in coins]
+    for i in range(len(coins), count):
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if symbols and rng.random() < 0.1:
+            symbol = rng.choice(symbols)
+        else:
+            symbol = f"{word[:4]}{i % 100}"
+        symbols.append(symbol)
+        coins.append({"id": f"{word}-{i}", "symbol": symbol, "name": f"{word.title()} {i}"})
+    return coins
+
+
+def price_of(cg_id: str, tick: int = 0) -> float:
+    """
+    Return a deterministic price for a coin, moving a little with every ``tick``.
+    """
+    base = zlib.crc32(cg_id.encode()) % 100_000 / 100 + 0.01
+    return round(base * (1 + 0.001 * (zlib.crc32(f"{cg_id}:{tick}".encode()) % 21 - 10)), 6)
+
+
+def endpoint_of(path: str) -> str:
+    """
+    Return the endpoint template of a request path, e.g. ``/coins/{id}``.
+    """
+    path = path.removeprefix(API_PREFIX)
+    if path.startswith("/coins/") and path != "/coins/list":
+        return "/coins/{id}"
+    return path
+
+
+class CoinGeckoStub:
+    """
+    Threaded HTTP server imitating the CoinGecko endpoints used by the app.
+
+    Args:
+        coins (int): Size of the generated coins list.
+        latency (float): Delay in seconds added to every response.
+        error_rate (float): Share of requests answered with 500.
+        throttle_rate (float): Share of requests answered with 429.
+        retry_after (int): ``Retry-After`` seconds sent with 429 responses.
+        port (int): Port to listen on; 0 picks a free one.
+        seed (int): Seed of the generated coins list and of the failure rolls.
+    """
+
+    def __init__(self, coins: int = 15000, latency: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 1, port: int = 0, seed: int = 0):
+        self.coins = generate_coins(coins, seed)
+        self.by_id = {coin["id"]: coin for coin in self.coins}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.tick = 0
+        self.requests = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> str:
+        """
+        Serve in a background thread and return the API base URL.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """
+        Stop serving and close the listening socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def _outcome(self) -> int:
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return 200
+
+    def _route(self, path: str, query: dict) -> tuple[int, object]:
+        if not path.startswith(API_PREFIX):
+            return 404, {"error": "not found"}
+        path = path[len(API_PREFIX):]
+        if path == "/coins/list":
+            return 200, self.coins
+        if path == "/simple/price":
+            ids = query.get("ids", [""])[0].split(",")
+            currency = query.get("vs_currencies", ["usd"])[0]
+            return 200, {cg_id: {currency: price_of(cg_id, self.tick)} for cg_id in ids if cg_id in self.by_id}
+        if path.startswith("/coins/"):
+            coin = self.by_id.get(path[len("/coins/"):])
+            if coin is None:
+                return 404, {"error": "coin not found"}
+            return 200, {**coin, "market_data": {"current_price": {"usd": price_of(coin["id"], self.tick)}}}
+        return 404, {"error": "not found"}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status = stub._outcome()
+                if status == 200:
+                    status, payload = stub._route(url.path, parse_qs(url.query))
+                else:
+                    payload = {"error": "stubbed failure"}
+                with stub._lock:
+                    stub.requests[(endpoint_of(url.path), status)] += 1
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", str(stub.retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--coins", type=int, default=15000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    stub = CoinGeckoStub(
+        coins=args.coins, latency=args.latency_ms / 1000, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after, port=args.port
+    )
+    print(f"Serving {len(stub.coins)} coins at {stub.base_url}")
+    stub.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
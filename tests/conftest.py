@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+# Settings are read on import: point the app at a throwaway SQLite database before anything imports it
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ.setdefault("DB_ASYNC", "false")
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.db.database import Base, SessionLocal, engine, init_db
+from app.services import clients
+
+
+@pytest.fixture
+def redis():
+    """
+    Back the shared Redis clients with a fresh in-memory fakeredis server.
+
+    The lazy clients are reset afterwards, so that clients built on top of Redis
+    (catalog, leases, ...) are rebuilt on the next test's server. Tests reach the
+    clients through the ``clients`` module: a lazy client imported by name into a
+    test module is built (against the real Redis) when pytest inspects the module.
+    """
+    server = fakeredis.FakeServer()
+    fake = fakeredis.FakeRedis(server=server, decode_responses=True)
+    object.__setattr__(clients.redis_client, "_lazy_instance", fake)
+    object.__setattr__(
+        clients.async_redis_client, "_lazy_instance", fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    )
+    try:
+        yield fake
+    finally:
+        for client in vars(clients).values():
+            if isinstance(client, clients.LazyClient):
+                object.__setattr__(client, "_lazy_instance", None)
+
+
+@pytest.fixture
+def db(redis):
+    """
+    Provide a session on a freshly created schema, emptied again after the test.
+    """
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from app.services.alert_index import AlertIndex
+
+
+def _move(cg_id: str, old: float, new: float) -> dict:
+    return {"cg_id": cg_id, "old_price": old, "new_price": new}
+
+
+def _fired(index: AlertIndex, *changes: dict) -> list[int]:
+    return sorted(event["rule_id"] for event in index.evaluate(list(changes)))
+
+
+@pytest.mark.parametrize("old, new, fires", [
+    (90, 100, True),  # reaching the level fires
+    (90, 110, True),
+    (100, 110, False),  # already at the level before the move
+    (90, 99.99, False),
+    (110, 90, False),
+])
+def test_above_fires_on_levels_in_old_new(old, new, fires):
+    index = AlertIndex()
+    index.rebuild([(1, "bitcoin", "above", 100.0, None)], "1")
+    assert _fired(index, _move("bitcoin", old, new)) == ([1] if fires else [])
+
+
+@pytest.mark.parametrize("old, new, fires", [
+    (110, 100, True),
+    (110, 90, True),
+    (100, 90, False),
+    (110, 100.01, False),
+    (90, 110, False),
+])
+def test_below_fires_on_levels_in_new_old(old, new, fires):
+    index = AlertIndex()
+    index.rebuild([(1, "bitcoin", "below", 100.0, None)], "1")
+    assert _fired(index, _move("bitcoin", old, new)) == ([1] if fires else [])
+
+
+def test_percent_change_fires_both_ways_and_is_rearmed():
+    index = AlertIndex()
+    index.rebuild([(1, "bitcoin", "percent_change", 25.0, 100.0)], "1")
+
+    assert _fired(index, _move("bitcoin", 100, 124)) == []
+    events = index.evaluate([_move("bitcoin", 124, 125)])
+    assert [(event["rule_id"], event["reference_price"], event["price"]) for event in events] == [(1, 100.0, 125)]
+
+    # Re-armed around 125: 156.25 and 93.75 are the new levels, 125 -> 100 no longer fires
+    assert _fired(index, _move("bitcoin", 125, 100)) == []
+    assert _fired(index, _move("bitcoin", 100, 93.75)) == [1]
+    assert _fired(index, _move("bitcoin", 93.75, 100)) == []
+    assert _fired(index, _move("bitcoin", 100, 117.1875)) == [1]
+
+
+def test_percent_change_without_reference_never_fires():
+    index = AlertIndex()
+    index.rebuild([(1, "bitcoin", "percent_change", 10.0, None)], "1")
+    assert _fired(index, _move("bitcoin", 1, 1000), _move("bitcoin", 1000, 1)) == []
+
+
+def test_only_rules_of_the_moved_coins_fire():
+    index = AlertIndex()
+    index.rebuild([
+        (1, "bitcoin", "above", 100.0, None),
+        (2, "ethereum", "above", 100.0, None),
+        (3, "ethereum", "below", 50.0, None),
+        (4, "solana", "above", 1.0, None),
+    ], "1")
+    assert _fired(index, _move("bitcoin", 90, 200), _move("ethereum", 60, 40), _move("dogecoin", 0.1, 5)) == [1, 3]
+    assert _fired(index, _move("bitcoin", 0, 200), _move("ethereum", 60, None)) == []
+
+
+def test_evaluate_matches_a_brute_force():
+    rng = random.Random(3)
+    coins = [f"coin-{i}" for i in range(20)]
+    rules = []
+    for rule_id in range(1, 501):
+        kind = rng.choice(["above", "below", "percent_change"])
+        if kind == "percent_change":
+            rules.append((rule_id, rng.choice(coins), kind, rng.uniform(1, 50), rng.choice([None, rng.uniform(50, 150)])))
+        else:
+            rules.append((rule_id, rng.choice(coins), kind, rng.uniform(50, 150), None))
+    index = AlertIndex()
+    index.rebuild(rules, "1")
+    references = {rule[0]: rule[4] for rule in rules}
+    prices = {cg_id: rng.uniform(50, 150) for cg_id in coins}
+    fired = 0
+
+    for _ in range(20):
+        changes = []
+        for cg_id in rng.sample(coins, 10):
+            changes.append(_move(cg_id, prices[cg_id], rng.uniform(50, 150)))
+            prices[cg_id] = changes[-1]["new_price"]
+        moves = {change["cg_id"]: (change["old_price"], change["new_price"]) for change in changes}
+
+        expected = []
+        for rule_id, cg_id, kind, threshold, _ in rules:
+            if cg_id not in moves:
+                continue
+            old, new = moves[cg_id]
+            if kind == "above":
+                fires = old < threshold <= new
+            elif kind == "below":
+                fires = new <= threshold < old
+            else:
+                reference = references[rule_id]
+                if reference is None:
+                    continue
+                up, down = reference * (1 + threshold / 100), reference * (1 - threshold / 100)
+                fires = old < up <= new or new <= down < old
+                if fires:
+                    references[rule_id] = new
+            if fires:
+                expected.append(rule_id)
+
+        assert _fired(index, *changes) == sorted(expected)
+        fired += len(expected)
+    assert fired > 100
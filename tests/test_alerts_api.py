@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import crud, models
+from app.main import app
+from app.services import alerts
+
+
+@pytest.fixture
+def client(db):
+    # Not used as a context manager, so the startup warm-up (scheduler, Coingecko) does not run
+    return TestClient(app)
+
+
+@pytest.fixture
+def bitcoin(db):
+    crypto = models.Crypto(cg_id="bitcoin", symbol="btc", name="Bitcoin", price=100.0)
+    db.add(crypto)
+    db.commit()
+    return crypto
+
+
+def _create(client, **fields) -> dict:
+    response = client.post("/alerts/", json={"cg_id": "bitcoin", "kind": "above", "threshold": 150, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_create_rule_uses_the_current_price_as_reference(client, bitcoin, redis):
+    rule = _create(client, kind="percent_change", threshold=5)
+    assert (rule["cg_id"], rule["kind"], rule["threshold"], rule["reference_price"]) == (
+        "bitcoin", "percent_change", 5, 100.0
+    )
+    assert redis.get(alerts.RULES_VERSION_KEY) == "1"
+    assert client.get(f"/alerts/{rule['id']}").json() == rule
+
+
+def test_create_rule_on_untracked_crypto_is_404(client, bitcoin):
+    assert client.post("/alerts/", json={"cg_id": "ethereum", "kind": "above", "threshold": 1}).status_code == 404
+
+
+def test_update_rule_changes_only_the_sent_fields_and_rearms_it(client, bitcoin, db, redis):
+    rule = _create(client)
+    bitcoin.price = 120.0
+    db.commit()
+
+    response = client.put(f"/alerts/{rule['id']}", json={"threshold": 200})
+    assert response.status_code == 200
+    assert (response.json()["kind"], response.json()["threshold"], response.json()["reference_price"]) == (
+        "above", 200, 120.0
+    )
+    assert redis.get(alerts.RULES_VERSION_KEY) == "2"
+
+
+@pytest.mark.parametrize("body", [{"threshold": None}, {"kind": None}, {"threshold": 0}, {"kind": "sideways"}])
+def test_update_rule_rejects_invalid_fields(client, bitcoin, body):
+    rule = _create(client)
+    assert client.put(f"/alerts/{rule['id']}", json=body).status_code == 422
+    assert client.get(f"/alerts/{rule['id']}").json() == rule
+
+
+def test_update_missing_rule_is_404(client, bitcoin):
+    assert client.put("/alerts/1", json={"threshold": 1}).status_code == 404
+
+
+def test_delete_rule(client, bitcoin, redis):
+    rule = _create(client)
+    assert client.delete(f"/alerts/{rule['id']}").status_code == 200
+    assert client.get(f"/alerts/{rule['id']}").status_code == 404
+    assert client.delete(f"/alerts/{rule['id']}").status_code == 404
+    assert redis.get(alerts.RULES_VERSION_KEY) == "2"
+
+
+def test_evaluate_records_rearms_and_bumps_the_rules_version(client, bitcoin, db, redis):
+    rule = _create(client, kind="percent_change", threshold=25)
+    alerts._index_loaded = False
+    change = {"cg_id": "bitcoin", "old_price": 100.0, "new_price": 125.0}
+
+    events = asyncio.run(alerts.evaluate(db, [change]))
+
+    assert [event["rule_id"] for event in events] == [rule["id"]]
+    stored = crud.get_alert_rule(db, rule["id"])
+    assert stored.reference_price == 125.0
+    assert stored.last_triggered_at is not None
+    # Other processes reload the re-armed rule; this one already has it
+    assert redis.get(alerts.RULES_VERSION_KEY) == "2"
+    assert alerts._index.version == "2"
+    assert redis.xlen(alerts.settings.ALERT_STREAM_KEY) == 1
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.core.settings import settings
+from app.db import crud, models
+from app.services.crypto_service import _apply_prices
+
+
+def test_prices_history_and_postponed_refreshes_are_written_in_one_commit(db):
+    crud.create_cryptos(db, [
+        {"cg_id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "price": 100.0},
+        {"cg_id": "delisted", "symbol": "dls", "name": "Delisted", "price": 1.0},
+    ])
+    cryptos = crud.get_all_cryptos(db)
+    commits = []
+    event.listen(db, "after_commit", commits.append)
+
+    count, changed = _apply_prices(db, cryptos, {"bitcoin": 110.0}, {})
+
+    assert len(commits) == 1
+    assert (count, changed) == (1, [{"cg_id": "bitcoin", "new_price": 110.0, "old_price": 100.0}])
+    bitcoin, delisted = (crud.get_crypto_by_id(db, cg_id) for cg_id in ("bitcoin", "delisted"))
+    assert bitcoin.price == 110.0
+    assert delisted.price == 1.0
+    assert delisted.next_due - datetime.utcnow() > timedelta(minutes=settings.UPDATE_INTERVAL_MINUTES - 1)
+    assert db.query(models.PriceHistory).count() == 1
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.db import crud
+from app.services import clients, crypto_service
+
+COINS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    {"id": "delisted", "symbol": "dls", "name": "Delisted"},
+]
+
+
+class FakeCoingecko:
+    def __init__(self, prices: dict | None = None, error: Exception | None = None):
+        self.prices = prices or {}
+        self.error = error
+
+    async def get_price(self, ids, vs_currencies):
+        if self.error is not None:
+            raise self.error
+        return {cg_id: {"usd": self.prices[cg_id]} if cg_id in self.prices else {} for cg_id in ids}
+
+
+@pytest.fixture
+def catalog(redis):
+    asyncio.run(clients.coin_catalog.replace(COINS, fetched_at=time.time()))
+
+
+def _use(fake: FakeCoingecko):
+    object.__setattr__(clients.cg, "_lazy_instance", fake)
+
+
+def _bulk_create(db, *queries: str) -> list[dict]:
+    return asyncio.run(crypto_service.bulk_create_cryptos(db, list(queries)))
+
+
+def test_statuses(db, catalog):
+    _use(FakeCoingecko({"bitcoin": 100.0, "ethereum": 10.0}))
+
+    results = _bulk_create(db, "btc", "ethereum", "bitcoin", "dls", "nope")
+
+    assert [(result["query"], result["status"]) for result in results] == [
+        ("btc", "created"), ("ethereum", "created"), ("bitcoin", "duplicate"), ("dls", "unavailable"), ("nope", "not_found")
+    ]
+    assert {crypto.cg_id: crypto.price for crypto in crud.get_all_cryptos(db)} == {"bitcoin": 100.0, "ethereum": 10.0}
+    assert _bulk_create(db, "eth")[0]["status"] == "duplicate"
+
+
+def test_failing_price_call_is_502_and_creates_nothing(db, catalog):
+    _use(FakeCoingecko(error=RuntimeError("429 Too Many Requests")))
+
+    with pytest.raises(HTTPException) as error:
+        _bulk_create(db, "btc", "nope")
+
+    assert error.value.status_code == 502
+    assert crud.get_all_cryptos(db) == []
+
+
+def test_empty_request_does_nothing(db):
+    assert _bulk_create(db) == []
@@ -0,0 +1,38 @@
+import asyncio
+
+from app.services import clients
+from app.services.cluster import shard_owner
+
+
+def test_lease_set_only_grants_free_items(redis):
+    async def run():
+        assert await clients.refresh_claims.acquire("a", ["btc", "eth"]) == ["btc", "eth"]
+        assert await clients.refresh_claims.acquire("b", ["eth", "sol", "btc"]) == ["sol"]
+        # The holder extends its own leases
+        assert await clients.refresh_claims.acquire("a", ["eth"]) == ["eth"]
+        # Only the holder's leases are released
+        assert await clients.refresh_claims.release("b", ["btc", "sol"]) == 1
+        assert await clients.refresh_claims.acquire("b", ["sol"]) == ["sol"]
+
+    asyncio.run(run())
+
+
+def test_lease_set_hold_releases_on_exit(redis):
+    async def run():
+        async with clients.refresh_claims.hold("a", ["btc", "eth"]) as held:
+            assert held == ["btc", "eth"]
+            async with clients.refresh_claims.hold("b", ["btc", "sol"]) as other:
+                assert other == ["sol"]
+        assert await clients.refresh_claims.acquire("b", ["btc", "eth", "sol"]) == ["btc", "eth", "sol"]
+
+    asyncio.run(run())
+
+
+def test_shard_owner_moves_only_keys_of_changed_workers():
+    keys = [f"coin-{i}" for i in range(200)]
+    before = {key: shard_owner(key, ["w1", "w2", "w3"]) for key in keys}
+    after = {key: shard_owner(key, ["w1", "w2"]) for key in keys}
+
+    assert set(before.values()) == {"w1", "w2", "w3"}
+    assert all(after[key] == owner for key, owner in before.items() if owner != "w3")
+    assert shard_owner("btc", []) is None
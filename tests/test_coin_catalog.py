@@ -0,0 +1,113 @@
+import asyncio
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.services.coin_catalog import CoinCatalog
+
+KEY = "{catalog:coins}"
+COINS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    {"id": "btc2", "symbol": "btc", "name": "Bitcoin Two"},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    {"id": "solana", "symbol": "sol", "name": "Solana"},
+]
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def _catalog(server) -> CoinCatalog:
+    return CoinCatalog(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), key=KEY)
+
+
+def _resolve(catalog: CoinCatalog, *queries: str):
+    return asyncio.run(catalog.resolve_many(list(queries)))
+
+
+def test_resolves_by_id_then_symbol_then_name(server):
+    catalog = _catalog(server)
+    meta = asyncio.run(catalog.replace(COINS, fetched_at=100.0))
+
+    matches, resolved_meta = _resolve(catalog, "ETHEREUM", "btc", "Solana", "nope")
+
+    assert matches == [["ethereum"], ["bitcoin", "btc2"], ["solana"], []]
+    assert resolved_meta == {"version": meta["version"], "fetched_at": 100.0}
+    assert asyncio.run(catalog.records(["SOLANA", "nope"])) == {
+        "solana": {"id": "solana", "symbol": "sol", "name": "Solana"}
+    }
+
+
+def test_empty_catalog_resolves_nothing(server):
+    catalog = _catalog(server)
+
+    assert _resolve(catalog, "btc") == ([[]], None)
+    assert asyncio.run(catalog.records(["bitcoin"])) == {}
+    assert asyncio.run(catalog.current()) is None
+
+
+def test_replace_writes_a_new_version_with_its_diff(server):
+    catalog = _catalog(server)
+    redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+    first = asyncio.run(catalog.replace(COINS, fetched_at=100.0))
+    coins = [coin for coin in COINS if coin["id"] != "btc2"]
+    coins = [dict(coin, name="Solana X") if coin["id"] == "solana" else coin for coin in coins]
+    coins.append({"id": "dogecoin", "symbol": "doge", "name": "Dogecoin"})
+
+    second = asyncio.run(catalog.replace(coins, fetched_at=200.0))
+
+    assert second["version"] != first["version"]
+    assert second["count"] == 4
+    changes = asyncio.run(catalog.changes(second["version"]))
+    assert changes["base"] == first["version"]
+    assert sorted(changes["changed"]) == ["dogecoin", "solana"]
+    assert changes["removed"] == ["btc2"]
+    matches, _ = _resolve(catalog, "btc", "solana x", "solana", "doge")
+    assert matches == [["bitcoin"], ["solana"], ["solana"], ["dogecoin"]]
+    assert _resolve(catalog, "Bitcoin Two", "btc2")[0] == [[], []]
+    # The new version is permanent, the previous one is kept for a while for readers still on it
+    assert redis.ttl(f"{KEY}:{second['version']}:ids") == -1
+    assert 0 < redis.ttl(f"{KEY}:{first['version']}:ids") <= catalog.retain
+    assert all(key.startswith(KEY) for key in redis.keys("*"))
+
+
+def test_unchanged_list_keeps_the_version(server):
+    catalog = _catalog(server)
+    redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+    first = asyncio.run(catalog.replace(COINS, fetched_at=100.0))
+    keys = set(redis.keys("*"))
+
+    second = asyncio.run(catalog.replace([dict(coin) for coin in COINS], fetched_at=200.0))
+
+    assert second == {**first, "fetched_at": 200.0}
+    assert set(redis.keys("*")) == keys
+    assert asyncio.run(catalog.current())["fetched_at"] == 200.0
+
+
+def test_readers_follow_a_version_published_by_another_process(server):
+    reader, writer = _catalog(server), _catalog(server)
+    asyncio.run(writer.replace(COINS, fetched_at=100.0))
+    assert _resolve(reader, "eth")[0] == [["ethereum"]]
+
+    renamed = [dict(coin, symbol="ether") if coin["id"] == "ethereum" else coin for coin in COINS]
+    latest = asyncio.run(writer.replace(renamed, fetched_at=200.0))
+
+    matches, meta = _resolve(reader, "eth", "ether")
+    assert matches == [[], ["ethereum"]]
+    assert meta["version"] == latest["version"]
+    assert asyncio.run(reader.records(["ethereum"]))["ethereum"]["symbol"] == "ether"
+
+
+def test_lookups_are_counted(server):
+    catalog = _catalog(server)
+    _resolve(catalog, "btc", "nope")
+    assert catalog.stats() == {"hits": 0, "misses": 2, "empty_misses": 2}
+
+    asyncio.run(catalog.replace(COINS, fetched_at=100.0))
+    _resolve(catalog, "btc", "nope", "Solana")
+    asyncio.run(catalog.records(["ethereum", "nope"]))
+
+    assert catalog.stats() == {"hits": 3, "misses": 4, "empty_misses": 2}
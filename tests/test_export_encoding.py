@@ -0,0 +1,28 @@
+import pytest
+from starlette.requests import Request
+
+from app.api.routes_crypto import _accepts_gzip
+
+
+def _request(accept_encoding: str | None) -> Request:
+    headers = [] if accept_encoding is None else [(b"accept-encoding", accept_encoding.encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.mark.parametrize("header, accepted", [
+    (None, False),
+    ("", False),
+    ("gzip", True),
+    ("deflate, gzip;q=0.5", True),
+    ("GZIP", True),
+    ("x-gzip", True),
+    ("*", True),
+    ("br, *;q=0.1", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, *", False),
+    ("*;q=0", False),
+    ("br, deflate", False),
+    ("gzip;q=nope", False),
+])
+def test_accepts_gzip_honours_q_values(header, accepted):
+    assert _accepts_gzip(_request(header)) is accepted
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.db import crud
+from app.services import crypto_service
+from app.services.crypto_service import _decode_cursor, _encode_cursor
+
+
+@pytest.fixture
+def cryptos(db):
+    # Few distinct names and prices, so that pages split runs of equal sort values
+    crud.create_cryptos(db, [
+        {"cg_id": f"coin-{i:02d}", "symbol": f"c{i % 5}", "name": f"Coin {i % 3}", "price": float(i % 4)}
+        for i in range(23)
+    ])
+    return crud.get_all_cryptos(db)
+
+
+def _sorted(cryptos, sort: str, order: str) -> list:
+    # NULL sort values come last in both orders
+    present = [crypto for crypto in cryptos if getattr(crypto, sort) is not None]
+    missing = [crypto for crypto in cryptos if getattr(crypto, sort) is None]
+    descending = order == "desc"
+    return (
+        sorted(present, key=lambda crypto: (getattr(crypto, sort), crypto.id), reverse=descending)
+        + sorted(missing, key=lambda crypto: crypto.id, reverse=descending)
+    )
+
+
+def _all_pages(db, sort: str, order: str, limit: int) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        page = asyncio.run(crypto_service.list_cryptos_page(db, limit, cursor, sort=sort, order=order))
+        ids += [crypto.id for crypto in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_cursor_round_trip():
+    cursor = _encode_cursor("price", "desc", 1.5, 42)
+
+    assert "=" not in cursor
+    assert _decode_cursor(cursor, "price", "desc") == (1.5, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "e30", _encode_cursor("id", "asc", 1, 1)[:-3]])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(cursor, "id", "asc")
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("sort, value, last_id", [
+    ("price", 1.0, None),
+    ("price", 1.0, "1"),
+    ("price", 1.0, 1.5),
+    ("price", 1.0, True),
+    ("price", "1.0", 1),
+    ("price", {"$gt": 0}, 1),
+    ("price", [1], 1),
+    ("price", False, 1),
+    ("name", 1, 1),
+    ("id", None, 1),
+    ("id", "1", 1),
+])
+def test_cursor_with_wrong_types_is_rejected(sort, value, last_id):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(_encode_cursor(sort, "asc", value, last_id), sort, "asc")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid cursor"
+
+
+@pytest.mark.parametrize("sort, value", [("price", 2), ("price", 2.5), ("price", None), ("name", "Coin"), ("name", None)])
+def test_cursor_values_of_the_sort_column_type_are_accepted(sort, value):
+    assert _decode_cursor(_encode_cursor(sort, "asc", value, 7), sort, "asc") == (value, 7)
+
+
+def test_cursor_of_another_sort_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(_encode_cursor("price", "asc", 1.0, 3), "price", "desc")
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("sort", list(crud.SORT_COLUMNS))
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_follow_sort_order_with_id_tie_breaker(db, cryptos, sort, order):
+    assert _all_pages(db, sort, order, limit=4) == [crypto.id for crypto in _sorted(cryptos, sort, order)]
+
+
+@pytest.mark.parametrize("sort", ["name", "price"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_include_rows_without_a_sort_value(db, cryptos, sort, order):
+    for crypto in cryptos[::3]:
+        setattr(crypto, sort, None)
+    db.commit()
+
+    assert _all_pages(db, sort, order, limit=4) == [crypto.id for crypto in _sorted(cryptos, sort, order)]
+
+
+def test_pages_apply_filters(db, cryptos):
+    page = asyncio.run(crypto_service.list_cryptos_page(db, 100, sort="price", min_price=2, symbol="C1"))
+
+    assert [crypto.cg_id for crypto in page["items"]] == ["coin-06", "coin-11"]
+    assert page["next_cursor"] is None
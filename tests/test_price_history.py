@@ -0,0 +1,100 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.settings import settings
+from app.db import crud, models
+from app.services import crypto_service
+
+START = datetime(2024, 1, 1)
+END = START + timedelta(days=5)
+
+
+def _crypto_with_history(db, minutes: int) -> int:
+    crypto = models.Crypto(cg_id="bitcoin", symbol="btc", name="Bitcoin", price=1.0)
+    db.add(crypto)
+    db.commit()
+    rng = random.Random(1)
+    crud.add_price_points(db, [
+        {"crypto_id": crypto.id, "timestamp": START + timedelta(minutes=i), "price": rng.uniform(1, 100)}
+        for i in range(minutes)
+    ])
+    return crypto.id
+
+
+def _ohlc(db, crypto_id: int, bucket_seconds: int) -> list[tuple]:
+    return [
+        (row.bucket, row.open, row.high, row.low, row.close)
+        for row in crud.get_price_candles(db, crypto_id, bucket_seconds, START, END)
+    ]
+
+
+def test_compaction_keeps_ohlc_of_compacted_buckets(db):
+    crypto_id = _crypto_with_history(db, 60 * 6)
+    hourly = _ohlc(db, crypto_id, 3600)
+
+    removed = crud.compact_price_history(db, START + timedelta(hours=4), 3600)
+
+    assert removed > 0
+    assert _ohlc(db, crypto_id, 3600) == hourly
+    points = [row.points for row in crud.get_price_candles(db, crypto_id, 3600, START, END)]
+    assert all(count <= 4 for count in points[:4])
+    assert points[4:] == [60, 60]
+
+
+def test_compaction_cutoff_is_aligned_to_bucket_boundary(db):
+    crypto_id = _crypto_with_history(db, 60 * 3)
+
+    crud.compact_price_history(db, START + timedelta(hours=1, minutes=30), 3600)
+
+    points = [row.points for row in crud.get_price_candles(db, crypto_id, 3600, START, END)]
+    # The bucket straddling the cutoff is left whole
+    assert points[0] <= 4
+    assert points[1:] == [60, 60]
+
+
+def test_compaction_is_idempotent_and_nests(db):
+    crypto_id = _crypto_with_history(db, 60 * 24 * 3)
+    daily = _ohlc(db, crypto_id, 86400)
+
+    crud.compact_price_history(db, START + timedelta(days=2), 3600)
+    assert crud.compact_price_history(db, START + timedelta(days=2), 3600) == 0
+    crud.compact_price_history(db, START + timedelta(days=2), 86400)
+
+    assert _ohlc(db, crypto_id, 86400) == daily
+
+
+def _history(db, interval: str, start: datetime, end: datetime) -> list[dict]:
+    return asyncio.run(crypto_service.get_price_history(db, "bitcoin", interval, start, end))
+
+
+def test_history_returns_candles_of_the_range(db):
+    _crypto_with_history(db, 60 * 3)
+
+    candles = _history(db, "1h", START, START + timedelta(hours=2))
+
+    assert [candle["timestamp"] for candle in candles] == [START, START + timedelta(hours=1), START + timedelta(hours=2)]
+    assert [candle["points"] for candle in candles] == [60, 60, 1]
+
+
+@pytest.mark.parametrize("interval, start, end", [
+    ("1h", END, START),  # start after end
+    ("1m", START, START + timedelta(minutes=settings.PRICE_HISTORY_MAX_BUCKETS + 1)),
+    ("1h", START - timedelta(days=365 * 3), START),
+])
+def test_history_rejects_invalid_ranges(db, interval, start, end):
+    _crypto_with_history(db, 10)
+
+    with pytest.raises(HTTPException) as error:
+        _history(db, interval, start, end)
+    assert error.value.status_code == 400
+
+
+def test_history_allows_the_largest_range(db):
+    _crypto_with_history(db, 10)
+    end = START + timedelta(minutes=settings.PRICE_HISTORY_MAX_BUCKETS)
+
+    assert len(_history(db, "1m", START, end)) == 10
@@ -0,0 +1,128 @@
+import asyncio
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def _flight(server: fakeredis.FakeServer) -> SingleFlight:
+    return SingleFlight(
+        fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), prefix="sf:", lock_ttl=5
+    )
+
+
+def test_concurrent_calls_share_one_fetch():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def run():
+        flight = _flight(fakeredis.FakeServer())
+        results = await asyncio.gather(*(flight.do("coins", fetch) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(run())
+    assert results == [{"value": 42}] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"hits": 4, "misses": 1, "shared_local": 4, "shared_remote": 0, "in_flight": 0}
+
+
+def test_error_propagates_to_every_waiter_and_frees_the_key():
+    server = fakeredis.FakeServer()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def run():
+        flight = _flight(server)
+        results = await asyncio.gather(*(flight.do("coins", failing) for _ in range(3)), return_exceptions=True)
+        # Neither the in-process call nor the Redis lock outlives the failure
+        retried = await asyncio.wait_for(flight.do("coins", lambda: asyncio.sleep(0, result=[1])), timeout=1)
+        return flight, results, retried
+
+    flight, results, retried = asyncio.run(run())
+    assert len(attempts) == 1
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert retried == [1]
+    assert not fakeredis.FakeRedis(server=server).exists("sf:coins")
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        flight = _flight(fakeredis.FakeServer())
+        first = asyncio.ensure_future(flight.do("coins", slow))
+        second = asyncio.ensure_future(flight.do("coins", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_other_process_waits_for_the_published_result():
+    server = fakeredis.FakeServer()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["btc"]
+
+    async def run():
+        leader, follower = _flight(server), _flight(server)
+        leading = asyncio.ensure_future(leader.do("coins", fetch))
+        await asyncio.sleep(0.01)
+        following = await follower.do("coins", fetch)
+        return await leading, following, follower
+
+    leading, following, follower = asyncio.run(run())
+    assert leading == following == ["btc"]
+    assert len(calls) == 1
+    assert follower.stats()["shared_remote"] == 1
+
+
+def test_other_process_takes_over_when_the_fetch_fails():
+    server = fakeredis.FakeServer()
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise ValueError("upstream down")
+
+    async def fetch():
+        return ["eth"]
+
+    async def run():
+        leader, follower = _flight(server), _flight(server)
+        leading = asyncio.ensure_future(leader.do("coins", failing))
+        await asyncio.sleep(0.01)
+        following = await follower.do("coins", fetch)
+        with pytest.raises(ValueError):
+            await leading
+        return following, follower
+
+    following, follower = asyncio.run(run())
+    assert following == ["eth"]
+    assert follower.stats()["misses"] == 1
+
+
+def test_fetches_without_redis():
+    server = fakeredis.FakeServer()
+    server.connected = False
+
+    async def run():
+        return await _flight(server).do("coins", lambda: asyncio.sleep(0, result="fetched"))
+
+    assert asyncio.run(run()) == "fetched"
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from app.services.suggest_index import SuggestIndex, trigrams
+
+COINS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    {"id": "bitcoin-cash", "symbol": "bch", "name": "Bitcoin Cash"},
+    {"id": "wrapped-bitcoin", "symbol": "wbtc", "name": "Wrapped Bitcoin"},
+    {"id": "btc-token", "symbol": "btct", "name": "BTC Token"},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    {"id": "ethena", "symbol": "ena", "name": "Ethena"},
+    {"id": "solana", "symbol": "sol", "name": "Solana"},
+]
+
+
+def _ids(coins: list[dict]) -> list[str]:
+    return [coin["id"] for coin in coins]
+
+
+def _index(coins=COINS) -> SuggestIndex:
+    index = SuggestIndex()
+    index.rebuild(coins, "v1")
+    return index
+
+
+def test_trigrams():
+    assert trigrams("btc") == {"btc"}
+    assert trigrams("ethereum") == {"eth", "the", "her", "ere", "reu", "eum"}
+    assert trigrams("et") == set()
+
+
+def test_exact_match_ranks_first_then_fields_then_length():
+    index = _index()
+
+    # Exact matches (symbol before name word) come before prefix matches
+    assert _ids(index.suggest("BTC")) == ["bitcoin", "btc-token"]
+    # Prefix matches by field (symbol, then name word), then shorter terms, then ID
+    assert _ids(index.suggest("b")) == ["bitcoin", "bitcoin-cash", "btc-token", "wrapped-bitcoin"]
+    assert _ids(index.suggest("b", limit=2)) == ["bitcoin", "bitcoin-cash"]
+    assert _ids(index.suggest("bitcoin")) == ["bitcoin", "bitcoin-cash", "wrapped-bitcoin"]
+    assert _ids(index.suggest("eth")) == ["ethereum", "ethena"]
+    assert _ids(index.suggest("  Sol ")) == ["solana"]
+    assert index.suggest("") == []
+
+
+def test_fuzzy_matches_fill_the_result_after_prefix_matches():
+    index = _index()
+
+    # A typo has no prefix match but shares most trigrams with the name
+    assert _ids(index.suggest("etherium"))[:1] == ["ethereum"]
+    # Infix: "cash" only matches as a name word, "coin" only by trigrams
+    assert _ids(index.suggest("cash")) == ["bitcoin-cash"]
+    assert set(_ids(index.suggest("tcoin"))) >= {"bitcoin", "bitcoin-cash", "wrapped-bitcoin"}
+    assert index.suggest("zzzz") == []
+
+
+@pytest.mark.parametrize("size", [1, 40])  # applied in place, or merged
+def test_apply_matches_a_rebuild(size):
+    rng = random.Random(7)
+    coins = [{"id": f"coin-{i}", "symbol": f"c{i % 50}", "name": f"Coin {rng.choice('abcdef')}{i}"} for i in range(500)]
+    index = _index(coins)
+    removed = [coin["id"] for coin in coins[:size]]
+    changed = [dict(coin, name=f"Renamed {coin['name']}") for coin in coins[100:100 + size]]
+    changed += [{"id": f"new-{i}", "symbol": "c1", "name": f"New Coin {i}"} for i in range(size)]
+
+    index.apply(changed, removed, "v2")
+
+    latest = {coin["id"]: coin for coin in coins[size:]}
+    latest.update({coin["id"]: coin for coin in changed})
+    expected = _index(list(latest.values()))
+    assert index.version == "v2"
+    assert index.coins == expected.coins
+    assert index._terms == expected._terms
+    assert index._trigrams == expected._trigrams
+    for query in ["c1", "coin-1", "renamed", "new", "coin a", "renamd coin"]:
+        assert index.suggest(query) == expected.suggest(query)
+
+
+def test_apply_invalidates_memoized_short_queries():
+    index = _index()
+    assert _ids(index.suggest("so")) == ["solana"]
+
+    index.apply([{"id": "solana", "symbol": "sola", "name": "Solana"}, {"id": "so", "symbol": "so", "name": "So"}],
+                [], "v2")
+
+    assert _ids(index.suggest("so")) == ["so", "solana"]
+    index.apply([], ["so"], "v3")
+    assert _ids(index.suggest("so")) == ["solana"]